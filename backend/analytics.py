@@ -0,0 +1,239 @@
+"""Columnar (NumPy) trade analytics for large fill histories.
+
+Назначение:
+        - Разбор за квартал (50k–500k сделок) без прохода по спискам `TradeSample`:
+            сделки один раз загружаются в колонки NumPy (`TradeColumns`), дальше все
+            метрики считаются векторно — те же, что у `backend.metrics.compute_metrics`,
+            плюс Sortino, Calmar, expectancy и разбивка по символам.
+
+Контракт:
+        - `TradeColumns.from_trades(trades)` — сырые payload'ы `userTrades` (нормализация
+            как в `backend.metrics`: нечитаемые сделки пропускаются); колонки `pnl`,
+            `quote_volume`, `timestamp` (секунды), `symbol` (код в `symbols`).
+        - `columns.since(ts)` — срез колонок по времени сделки (без повторной загрузки).
+        - `compute_analytics(columns, equity=..., baseline_equity=..., unrealized_total=...)` →
+            словарь с ключами `compute_metrics` (значения совпадают с ним до ошибки
+            округления суммирования) и дополнительными:
+            `sortinoRatio` — как `sharpeRatio`, но знаменатель — downside deviation доходностей;
+            `equityDrawdown` — максимальная просадка кривой `baseline + накопленный PnL` в %
+                (≤ 0; в отличие от `maxDrawdown`, считается от equity, а не от пика PnL);
+            `calmarRatio` — годовая доходность реализованного PnL к baseline, делённая на
+                `|equityDrawdown|`;
+            `expectancy` — средний PnL на учтённую (не flat) сделку;
+            `bySymbol` — `{symbol: {totalTrades, winningTrades, losingTrades, flatTrades,
+                winRate, realizedPnL, avgWin, avgLoss, profitFactor, expectancy, volume}}`.
+        - `available()` — установлен ли NumPy.
+
+CLI/Примеры:
+        `GET /analytics?range=90D` (`backend.main`), бенчмарк — `python -m benchmarks.analytics`.
+
+Ограничения/Политики:
+        - NumPy — опциональная зависимость: без него `TradeColumns` бросает `RuntimeError`,
+            а `/analytics` отвечает 503; онлайн-метрики (`MetricsAccumulator`) от NumPy не зависят.
+        - Загрузка из dict'ов остаётся O(n) на Python; выигрыш — в расчётах по уже
+            загруженным колонкам (несколько диапазонов, разбивки, повторные запросы).
+
+ENV/Файлы состояния:
+        - Не читает окружение.
+
+Интеграции:
+        - `backend.metrics` (нормализация сделок и классификация win/loss/flat),
+            `backend.trade_store.TradeStore.history`, `GET /analytics`.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Dict, Iterable, List, Optional
+
+from .metrics import _normalize_user_trade, _profit_factor
+
+try:  # optional dependency
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on environment
+    np = None
+
+_YEAR_SECONDS = 365 * 86_400
+
+
+def available() -> bool:
+    return np is not None
+
+
+class TradeColumns:
+    """Normalized trades as parallel NumPy columns."""
+
+    def __init__(self, pnl, quote_volume, timestamp, symbol, symbols: List[str]) -> None:
+        if np is None:
+            raise RuntimeError("numpy is not installed; columnar analytics are unavailable")
+        self.pnl = pnl
+        self.quote_volume = quote_volume
+        self.timestamp = timestamp
+        self.symbol = symbol
+        self.symbols = symbols
+
+    def __len__(self) -> int:
+        return len(self.pnl)
+
+    @classmethod
+    def from_trades(cls, trades: Iterable[dict]) -> "TradeColumns":
+        if np is None:
+            raise RuntimeError("numpy is not installed; columnar analytics are unavailable")
+        pnl: List[float] = []
+        quote: List[float] = []
+        stamps: List[int] = []
+        codes: List[int] = []
+        index: Dict[str, int] = {}
+        for raw in trades:
+            sample = _normalize_user_trade(raw)
+            if sample is None:
+                continue
+            symbol = (raw.get("symbol") or "").upper()
+            code = index.get(symbol)
+            if code is None:
+                code = index[symbol] = len(index)
+            pnl.append(sample.pnl)
+            quote.append(sample.quote_volume)
+            stamps.append(sample.timestamp)
+            codes.append(code)
+        return cls(
+            np.array(pnl, dtype=np.float64),
+            np.array(quote, dtype=np.float64),
+            np.array(stamps, dtype=np.int64),
+            np.array(codes, dtype=np.int32),
+            list(index),
+        )
+
+    def since(self, ts: float) -> "TradeColumns":
+        mask = self.timestamp >= ts
+        return TradeColumns(
+            self.pnl[mask], self.quote_volume[mask], self.timestamp[mask], self.symbol[mask], self.symbols
+        )
+
+
+def _max_drawdown_percent(pnl_by_time) -> float:
+    """Drawdown of cumulative PnL relative to its final peak, as in `compute_metrics`."""
+
+    if not len(pnl_by_time):
+        return 0.0
+    cumulative = np.cumsum(pnl_by_time)
+    peak = np.maximum.accumulate(np.maximum(cumulative, 0.0))
+    worst = float(np.min(cumulative - peak))
+    final_peak = float(peak[-1])
+    if final_peak <= 0:
+        return 0.0
+    return min(worst, 0.0) / final_peak * 100
+
+
+def _equity_drawdown_percent(pnl_by_time, baseline: float) -> float:
+    if not len(pnl_by_time) or baseline <= 0:
+        return 0.0
+    curve = baseline + np.concatenate(([0.0], np.cumsum(pnl_by_time)))
+    peak = np.maximum.accumulate(curve)
+    return float(np.min(curve / peak - 1.0)) * 100
+
+
+def _by_symbol(columns: TradeColumns, win, loss, flat) -> Dict[str, dict]:
+    size = len(columns.symbols)
+    codes = columns.symbol
+    wins_n = np.bincount(codes, weights=win, minlength=size)
+    losses_n = np.bincount(codes, weights=loss, minlength=size)
+    flats_n = np.bincount(codes, weights=flat, minlength=size)
+    wins_sum = np.bincount(codes, weights=np.where(win, columns.pnl, 0.0), minlength=size)
+    losses_sum = np.bincount(codes, weights=np.where(loss, columns.pnl, 0.0), minlength=size)
+    volume = np.bincount(codes, weights=columns.quote_volume, minlength=size)
+
+    out: Dict[str, dict] = {}
+    for code, symbol in enumerate(columns.symbols):
+        w, l, f = int(wins_n[code]), int(losses_n[code]), int(flats_n[code])
+        if w + l + f == 0:
+            continue
+        ws, ls = float(wins_sum[code]), float(losses_sum[code])
+        total = w + l
+        out[symbol] = {
+            "totalTrades": total,
+            "winningTrades": w,
+            "losingTrades": l,
+            "flatTrades": f,
+            "winRate": (w / total * 100) if total else 0.0,
+            "realizedPnL": ws + ls,
+            "avgWin": ws / w if w else 0.0,
+            "avgLoss": ls / l if l else 0.0,
+            "profitFactor": _profit_factor(ws, ls, w),
+            "expectancy": (ws + ls) / total if total else 0.0,
+            "volume": float(volume[code]),
+        }
+    return out
+
+
+def compute_analytics(
+    columns: TradeColumns,
+    *,
+    equity: float,
+    baseline_equity: Optional[float],
+    unrealized_total: float,
+) -> dict:
+    """Vectorized `compute_metrics` plus Sortino, Calmar, expectancy and per-symbol stats."""
+
+    pnl = columns.pnl
+    quote = columns.quote_volume
+
+    # Классификация как в metrics._classify: |pnl| ниже динамического порога — flat
+    flat = np.abs(pnl) < np.maximum(0.05, 0.0005 * quote)
+    win = ~flat & (pnl > 0)
+    loss = ~flat & (pnl < 0)
+    winning_trades = int(np.count_nonzero(win))
+    losing_trades = int(np.count_nonzero(loss))
+    flat_trades = int(len(pnl) - winning_trades - losing_trades)
+    total_trades = winning_trades + losing_trades
+    wins_sum = float(pnl[win].sum())
+    losses_sum = float(pnl[loss].sum())
+    realized_sum = wins_sum + losses_sum
+
+    traded = quote > 0
+    returns = pnl[traded] / quote[traded]
+    sharpe_ratio = 0.0
+    sortino_ratio = 0.0
+    if len(returns) >= 2:
+        avg_return = float(returns.mean())
+        std_return = float(returns.std())
+        scale = math.sqrt(len(returns))
+        if std_return > 0:
+            sharpe_ratio = avg_return / std_return * scale
+        downside = math.sqrt(float(np.mean(np.minimum(returns, 0.0) ** 2)))
+        if downside > 0:
+            sortino_ratio = avg_return / downside * scale
+
+    baseline = baseline_equity if baseline_equity and baseline_equity > 0 else equity or 1.0
+    total_pnl = equity - baseline
+    total_pnl_percent = (total_pnl / baseline * 100) if baseline else 0.0
+
+    pnl_by_time = pnl[np.argsort(columns.timestamp, kind="stable")]
+    equity_drawdown = _equity_drawdown_percent(pnl_by_time, baseline)
+    span = float(columns.timestamp.max() - columns.timestamp.min()) if len(pnl) else 0.0
+    calmar_ratio = 0.0
+    if span > 0 and equity_drawdown < 0:
+        annual_return = float(pnl.sum()) / baseline * 100 * (_YEAR_SECONDS / span)
+        calmar_ratio = annual_return / abs(equity_drawdown)
+
+    return {
+        "totalPnL": total_pnl,
+        "totalPnLPercent": total_pnl_percent,
+        "winRate": (winning_trades / total_trades * 100) if total_trades else 0.0,
+        "sharpeRatio": sharpe_ratio,
+        "maxDrawdown": _max_drawdown_percent(pnl_by_time),
+        "avgWin": (wins_sum / winning_trades) if winning_trades else 0.0,
+        "avgLoss": (losses_sum / losing_trades) if losing_trades else 0.0,
+        "profitFactor": _profit_factor(wins_sum, losses_sum, winning_trades),
+        "totalTrades": total_trades,
+        "winningTrades": winning_trades,
+        "losingTrades": losing_trades,
+        "realizedPnL": realized_sum,
+        "unrealizedPnL": unrealized_total,
+        "flatTrades": flat_trades,
+        "sortinoRatio": sortino_ratio,
+        "calmarRatio": calmar_ratio,
+        "equityDrawdown": equity_drawdown,
+        "expectancy": realized_sum / total_trades if total_trades else 0.0,
+        "bySymbol": _by_symbol(columns, win, loss, flat),
+    }
@@ -1,21 +1,45 @@
 """Binance connectivity helpers (WebSocket + REST) for the FastAPI backend.
 
 Назначение:
-        - `BinanceBookTickerClient`: слушает публичный Futures stream `bookTicker` и
-            выдаёт среднюю цену bid/ask плюс отдельные котировки для фронтенда.
+        - `BinanceBookTickerClient`: слушает публичный Futures `bookTicker` для набора
+            символов через combined stream (`/stream?streams=a@bookTicker/b@bookTicker`)
+            и выдаёт среднюю цену bid/ask плюс отдельные котировки для фронтенда.
         - `BinanceFuturesRestClient`: выполняет подписанные REST-запросы (account,
             positions, trades) и публичные 24h tickers для расчёта equity/метрик.
 
 Контракт:
-        - BookTicker: асинхронный итератор событий `{'symbol': str, 'price': float, 'bid': float,
-            'ask': float, 'ts': int}`.
+        - BookTicker: асинхронный итератор событий `BookTickerEvent` (slotted-объект с
+            атрибутами `symbol`, `price`, `bid`, `ask`, `ts`). Символы делятся на соединения по
+            `APILimits.max_streams_per_connection`; события демультиплексируются по имени
+            стрима. `set_symbols()` меняет набор на лету (пересоздаёт соединения).
+            Если потребитель `run()` отстаёт, по символу ждёт только последняя котировка:
+            промежуточные заменяются (`binance_bookticker_superseded_total`), очередь
+            ограничена числом символов.
+        - `BinanceTickerArrayClient`: all-market стрим `!ticker@arr` — батчи
+            `{'symbol', 'lastPrice', 'priceChangePercent', 'ts'}` по изменившимся символам.
+        - `recorder=` у обоих WS-клиентов — объект с `record(stream, raw)`
+            (`backend.replay.FrameRecorder`), получает каждый сырой фрейм до разбора.
         - REST-клиент: асинхронные методы `get_account_overview`, `get_positions`,
-            `get_recent_trades`, `get_ticker_24h`. Все возвращают реальные данные Binance
-            либо бросают `RuntimeError` при ошибках HTTP/подписи.
+            `get_recent_trades`, `get_ticker_24h`, `get_all_tickers_24h` (bulk), а также listenKey
+            (`create_listen_key`/`keepalive_listen_key`/`close_listen_key`). Все возвращают
+            реальные данные Binance либо бросают `RuntimeError` при ошибках HTTP/подписи.
+            GET-чтения принимают `max_age` (сек): ответ не старше `max_age` берётся из
+            кэша, одинаковые параллельные запросы разделяют один вызов (single-flight);
+            без `max_age` действует TTL эндпоинта (`_ENDPOINT_TTL`, 1–5 с), `max_age=0` —
+            только свежий ответ (или уже летящий запрос). Ответы из кэша общие —
+            вызывающий код не должен их изменять. Кэш не больше `cache_max_entries`
+            (256): сначала выбрасываются протухшие записи, затем самые старые.
+            Передайте `pool=RestClientPool(...)`, чтобы несколько клиентов делили одно
+            соединение/пул и один `WeightRateLimiter` (`pool.limiter`); `warm_up()`
+            открывает соединения заранее.
 
 Ограничения/Политики:
         - Live-only: запросы к реальному Binance Futures (либо testnet при `BINANCE_TESTNET=true`).
-        - Ограничение на частоту запросов соблюдаем через backoff в вызывающем коде.
+        - Частота запросов ограничивается `WeightRateLimiter`: token bucket по весу
+            (`APILimits.futures_requests_per_minute`, веса из `futures_endpoint_weights`),
+            синхронизация по `X-MBX-USED-WEIGHT-1M` (только в сторону уменьшения бюджета),
+            пауза по `Retry-After` при 429/418;
+            account/positions обслуживаются раньше тикеров и income.
 
 ENV/Файлы состояния:
         - `BINANCE_API_KEY` / `BINANCE_API_SECRET` — для подписанных запросов.
@@ -23,61 +47,397 @@ ENV/Файлы состояния:
 
 Интеграции:
         - websockets==12.* для WS.
-        - httpx==0.27.* для REST (с HMAC-SHA256 подписью).
+        - `config.api_config.APILimits` — лимиты стримов на соединение и числа соединений,
+            бюджет и веса REST-запросов.
+        - httpx==0.27.* для REST (с HMAC-SHA256 подписью) через `backend.rest_pool.RestClientPool`.
+        - `backend.telemetry`: латентность и вес REST по эндпоинтам, ожидание лимитера,
+            переподключения стримов.
 """
 
 from __future__ import annotations
 
 import asyncio
+import heapq
 import hmac
 import hashlib
-import json
+import itertools
 import logging
 import time
-from typing import AsyncIterator, Dict, Iterable, List, Optional
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional
 from urllib.parse import urlencode
 
 import httpx
 import websockets
 
+from config.api_config import APILimits
+
+from .encoding import json_loads
+from .rest_pool import RestClientPool
+from .telemetry import (
+    BINANCE_BOOKTICKER_SUPERSEDED,
+    BINANCE_REST_LIMITER_WAIT_SECONDS,
+    BINANCE_REST_SECONDS,
+    BINANCE_REST_WEIGHT,
+    BINANCE_WS_RECONNECTS,
+    timed,
+)
+
 logger = logging.getLogger(__name__)
 
 
+_RESHARD = object()
+
+
+class BookTickerEvent:
+    """Best bid/ask update for one symbol; `price` is the mid, `ts` is in milliseconds."""
+
+    __slots__ = ("symbol", "price", "bid", "ask", "ts")
+
+    def __init__(self, symbol: str, price: float, bid: float, ask: float, ts: float) -> None:
+        self.symbol = symbol
+        self.price = price
+        self.bid = bid
+        self.ask = ask
+        self.ts = ts
+
+    def __repr__(self) -> str:
+        return f"BookTickerEvent({self.symbol} {self.bid}/{self.ask} @ {self.ts})"
+
+
 class BinanceBookTickerClient:
-    def __init__(self, symbol: str, reconnect_delay: float = 3.0):
-        self.symbol = symbol.lower()
-        self.stream_url = f"wss://fstream.binance.com/ws/{self.symbol}@bookTicker"
+    """Combined-stream `bookTicker` client for a set of Futures symbols.
+
+    Symbols are split into shards of at most `max_streams_per_connection` streams,
+    each served by its own `/stream?streams=...` connection; events are demultiplexed
+    by stream name and yielded from a single `run()` iterator.
+    """
+
+    def __init__(
+        self,
+        symbols: str | Iterable[str],
+        reconnect_delay: float = 3.0,
+        *,
+        max_streams_per_connection: Optional[int] = None,
+        base_url: str = "wss://fstream.binance.com",
+        recorder=None,
+    ):
+        limits = APILimits()
+        self.base_url = base_url.rstrip("/")
+        self.reconnect_delay = reconnect_delay
+        self.max_streams_per_connection = max_streams_per_connection or limits.max_streams_per_connection
+        self.max_connections = limits.max_ws_connections
+        self.symbols = self._normalize(symbols)
+        self.recorder = recorder
+        self._stop = asyncio.Event()
+        # Последнее непрочитанное событие по символу; в очереди — символы с новым событием
+        # и `_RESHARD`, поэтому она не длиннее числа символов (плюс маркеры)
+        self._pending: Dict[str, BookTickerEvent] = {}
+        self._queue: asyncio.Queue = asyncio.Queue()
+
+    @staticmethod
+    def _normalize(symbols: str | Iterable[str]) -> List[str]:
+        if isinstance(symbols, str):
+            symbols = [symbols]
+        return sorted({s.strip().lower() for s in symbols if s and s.strip()})
+
+    @staticmethod
+    def stream_name(symbol: str) -> str:
+        return f"{symbol.lower()}@bookTicker"
+
+    @property
+    def stream_urls(self) -> List[str]:
+        """Combined-stream URLs, one per shard of `max_streams_per_connection` streams."""
+
+        size = max(1, self.max_streams_per_connection)
+        urls = []
+        for start in range(0, len(self.symbols), size):
+            streams = "/".join(self.stream_name(s) for s in self.symbols[start:start + size])
+            urls.append(f"{self.base_url}/stream?streams={streams}")
+        return urls
+
+    def set_symbols(self, symbols: Iterable[str]) -> bool:
+        """Replace the watched symbol set; reconnects shards only if it changed."""
+
+        normalized = self._normalize(symbols)
+        if normalized == self.symbols:
+            return False
+        self.symbols = normalized
+        self._queue.put_nowait(_RESHARD)
+        return True
+
+    async def stop(self):
+        self._stop.set()
+        self._queue.put_nowait(_RESHARD)
+
+    async def run(self) -> AsyncIterator[BookTickerEvent]:
+        while not self._stop.is_set():
+            urls = self.stream_urls
+            if len(urls) > self.max_connections:
+                logger.warning(
+                    "bookTicker needs %d connections for %d symbols (limit %d)",
+                    len(urls),
+                    len(self.symbols),
+                    self.max_connections,
+                )
+            # Streams map stream name -> symbol for demultiplexing combined payloads
+            streams = {self.stream_name(s): s.upper() for s in self.symbols}
+            shards = [asyncio.create_task(self._pump_shard(url, streams)) for url in urls]
+            try:
+                while not self._stop.is_set():
+                    item = await self._queue.get()
+                    if item is _RESHARD:
+                        break
+                    yield self._pending.pop(item)
+            finally:
+                for task in shards:
+                    task.cancel()
+                await asyncio.gather(*shards, return_exceptions=True)
+
+    async def _pump_shard(self, url: str, streams: Dict[str, str]) -> None:
+        attempts = 0
+        while not self._stop.is_set():
+            if attempts:
+                BINANCE_WS_RECONNECTS.labels(stream="bookTicker").inc()
+            attempts += 1
+            try:
+                async with websockets.connect(url, ping_interval=20, ping_timeout=20) as ws:
+                    async for msg in ws:
+                        if self._stop.is_set():
+                            break
+                        if self.recorder is not None:
+                            self.recorder.record("bookTicker", msg)
+                        try:
+                            event = self._parse(msg, streams)
+                        except Exception:
+                            continue
+                        if event is not None:
+                            self._offer(event)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                await asyncio.sleep(self.reconnect_delay)
+
+    def _offer(self, event: BookTickerEvent) -> None:
+        if event.symbol in self._pending:
+            # Потребитель отстаёт — устаревшая котировка заменяется, а не копится
+            BINANCE_BOOKTICKER_SUPERSEDED.inc()
+        else:
+            self._queue.put_nowait(event.symbol)
+        self._pending[event.symbol] = event
+
+    @staticmethod
+    def _parse(msg, streams: Dict[str, str]) -> Optional[BookTickerEvent]:
+        envelope = json_loads(msg)
+        data = envelope.get("data", envelope)
+        stream = envelope.get("stream")
+        s = streams.get(stream) if stream else None
+        if s is None:
+            s = data.get("s") or data.get("S")
+        b = data.get("b")
+        a = data.get("a")
+        t = data.get("E") or data.get("T") or int(time.time() * 1000)
+        if s is None or b is None or a is None:
+            return None
+        bid = float(b)
+        ask = float(a)
+        return BookTickerEvent(s, (bid + ask) / 2.0, bid, ask, t)
+
+
+class BinanceTickerArrayClient:
+    """All-market 24h ticker stream (`!ticker@arr` or `!miniTicker@arr`).
+
+    Yields batches of normalized rows `{'symbol', 'lastPrice', 'priceChangePercent', 'ts'}`;
+    Binance pushes only the symbols that changed during the last second.
+    """
+
+    def __init__(
+        self,
+        stream: str = "!ticker@arr",
+        reconnect_delay: float = 3.0,
+        *,
+        base_url: str = "wss://fstream.binance.com",
+        recorder=None,
+    ) -> None:
+        self.stream_url = f"{base_url.rstrip('/')}/ws/{stream}"
         self.reconnect_delay = reconnect_delay
+        self.recorder = recorder
         self._stop = asyncio.Event()
 
     async def stop(self):
         self._stop.set()
 
-    async def run(self) -> AsyncIterator[dict]:
+    async def run(self) -> AsyncIterator[List[Dict]]:
+        attempts = 0
         while not self._stop.is_set():
+            if attempts:
+                BINANCE_WS_RECONNECTS.labels(stream="ticker_arr").inc()
+            attempts += 1
             try:
                 async with websockets.connect(self.stream_url, ping_interval=20, ping_timeout=20) as ws:
                     async for msg in ws:
                         if self._stop.is_set():
                             break
+                        if self.recorder is not None:
+                            self.recorder.record("ticker_arr", msg)
                         try:
-                            data = json.loads(msg)
-                            s = data.get("s") or data.get("S")
-                            b = data.get("b")
-                            a = data.get("a")
-                            t = data.get("E") or data.get("T") or int(time.time() * 1000)
-                            if s is not None and b is not None and a is not None:
-                                bid = float(b)
-                                ask = float(a)
-                                mid = (bid + ask) / 2.0
-                                yield {"symbol": s, "price": mid, "bid": bid, "ask": ask, "ts": t}
+                            rows = self._parse(msg)
                         except Exception:
                             continue
+                        if rows:
+                            yield rows
             except asyncio.CancelledError:
                 break
             except Exception:
                 await asyncio.sleep(self.reconnect_delay)
 
+    @staticmethod
+    def _parse(msg) -> List[Dict]:
+        data = json_loads(msg)
+        if isinstance(data, dict):
+            data = data.get("data", [data])
+        rows: List[Dict] = []
+        for item in data:
+            symbol = item.get("s")
+            close = item.get("c")
+            if not symbol or close is None:
+                continue
+            last_price = float(close)
+            change = item.get("P")
+            if change is None:
+                # miniTicker не содержит P — считаем от цены открытия окна 24h
+                open_price = _to_float(item.get("o"))
+                change_pct = ((last_price - open_price) / open_price * 100) if open_price else 0.0
+            else:
+                change_pct = float(change)
+            rows.append({
+                "symbol": symbol,
+                "lastPrice": last_price,
+                "priceChangePercent": change_pct,
+                "ts": item.get("E") or int(time.time() * 1000),
+            })
+        return rows
+
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+# Аккаунт/позиции обслуживаются первыми, тикеры и income ждут за ними
+_ENDPOINT_PRIORITY: Dict[str, int] = {
+    "/fapi/v2/account": PRIORITY_HIGH,
+    "/fapi/v2/positionRisk": PRIORITY_HIGH,
+    "/fapi/v1/listenKey": PRIORITY_HIGH,
+    "/fapi/v1/userTrades": PRIORITY_NORMAL,
+    "/fapi/v1/ticker/24hr": PRIORITY_LOW,
+    "/fapi/v1/income": PRIORITY_LOW,
+}
+
+# Сколько секунд ответ GET считается свежим, если вызывающий код не передал max_age
+_ENDPOINT_TTL: Dict[str, float] = {
+    "/fapi/v2/account": 1.0,
+    "/fapi/v2/positionRisk": 1.0,
+    "/fapi/v1/userTrades": 1.0,
+    "/fapi/v1/ticker/24hr": 2.0,
+    "/fapi/v1/income": 5.0,
+}
+
+
+class WeightRateLimiter:
+    """Token bucket over Binance request weight with priority-ordered waiters.
+
+    Each call is charged its known endpoint weight before it is sent. Responses
+    re-sync the bucket from `X-MBX-USED-WEIGHT-1M`; 429/418 with `Retry-After`
+    pause every caller until the ban window has passed.
+    """
+
+    def __init__(self, weight_per_minute: Optional[int] = None, *, limits: Optional[APILimits] = None) -> None:
+        self.limits = limits or APILimits()
+        self.capacity = float(weight_per_minute or self.limits.futures_requests_per_minute)
+        self.tokens = self.capacity
+        self.refill_per_second = self.capacity / 60.0
+        self.used_weight: Optional[int] = None
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._waiters: List[tuple] = []
+        self._seq = itertools.count()
+        self._cond = asyncio.Condition()
+
+    def weight_for(self, path: str, params: Optional[Dict] = None) -> int:
+        if path == "/fapi/v1/ticker/24hr" and not (params or {}).get("symbol"):
+            return self.limits.futures_ticker_24h_all_weight
+        return self.limits.futures_endpoint_weights.get(path, 1)
+
+    def _refill(self) -> float:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.refill_per_second)
+        self._updated = now
+        return now
+
+    def _delay_for(self, weight: float) -> float:
+        now = self._refill()
+        if now < self._blocked_until:
+            return self._blocked_until - now
+        if self.tokens >= weight:
+            return 0.0
+        return (weight - self.tokens) / self.refill_per_second
+
+    async def acquire(self, weight: int, priority: int = PRIORITY_NORMAL) -> None:
+        weight = min(float(weight), self.capacity)
+        entry = (priority, next(self._seq), weight)
+        async with self._cond:
+            heapq.heappush(self._waiters, entry)
+            try:
+                while True:
+                    delay: Optional[float] = None
+                    if self._waiters[0] is entry:
+                        delay = self._delay_for(weight)
+                        if delay <= 0:
+                            heapq.heappop(self._waiters)
+                            self.tokens -= weight
+                            self._cond.notify_all()
+                            return
+                    try:
+                        await asyncio.wait_for(self._cond.wait(), timeout=delay)
+                    except asyncio.TimeoutError:
+                        pass
+            except BaseException:
+                if entry in self._waiters:
+                    self._waiters.remove(entry)
+                    heapq.heapify(self._waiters)
+                    self._cond.notify_all()
+                raise
+
+    def sync(self, response: httpx.Response) -> None:
+        """Align the bucket with Binance's view of used weight and honour bans."""
+
+        used_raw = response.headers.get("X-MBX-USED-WEIGHT-1M")
+        if used_raw is not None:
+            try:
+                self.used_weight = int(used_raw)
+            except ValueError:
+                pass
+            else:
+                self._refill()
+                # Заголовок только ужесточает бюджет: уже выданные, но ещё не учтённые
+                # сервером запросы не должны возвращаться в ведро
+                self.tokens = max(0.0, min(self.tokens, self.capacity - self.used_weight))
+        if response.status_code in (418, 429):
+            retry_after = _to_float(response.headers.get("Retry-After"), 60.0)
+            self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
+            self.tokens = 0.0
+            logger.warning(
+                "Binance rate limit hit (HTTP %s); pausing REST for %.0fs",
+                response.status_code,
+                retry_after,
+            )
+
+
+def _to_float(value, default: float = 0.0) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
 
 class BinanceFuturesRestClient:
     """Minimal async REST client for Binance Futures signed + public endpoints."""
@@ -90,23 +450,62 @@ class BinanceFuturesRestClient:
         testnet: bool = False,
         recv_window: int = 5_000,
         timeout: float = 10.0,
+        base_url: Optional[str] = None,
+        rate_limiter: Optional["WeightRateLimiter"] = None,
+        pool: Optional[RestClientPool] = None,
     ) -> None:
-        base_url = "https://testnet.binancefuture.com" if testnet else "https://fapi.binance.com"
+        if base_url is None:
+            base_url = pool.base_url if pool is not None else (
+                "https://testnet.binancefuture.com" if testnet else "https://fapi.binance.com"
+            )
         self._api_key = api_key
         self._api_secret = api_secret.encode()
         self._recv_window = recv_window
-        self._client = httpx.AsyncClient(base_url=base_url, timeout=timeout)
+        # Общий пул не закрывается клиентом: им владеет вызывающий код
+        self._owns_pool = pool is None
+        self._pool = pool or RestClientPool(base_url, timeout=timeout)
+        # Лимит веса считается на IP, поэтому лимитер хранится на пуле и общий для всех его
+        # клиентов; живёт столько же, сколько пул (и его event loop), а не весь процесс
+        if self._pool.limiter is None:
+            self._pool.limiter = rate_limiter or WeightRateLimiter()
+        self._limiter = rate_limiter or self._pool.limiter
+        self._cache: Dict[tuple, tuple] = {}
+        self._inflight: Dict[tuple, asyncio.Future] = {}
+        self.cache_max_entries = 256
+        self.cache_hits = 0
+        self.coalesced = 0
+
+    @property
+    def pool(self) -> RestClientPool:
+        return self._pool
+
+    @property
+    def limiter(self) -> "WeightRateLimiter":
+        return self._limiter
 
     async def close(self) -> None:
-        await self._client.aclose()
+        if self._owns_pool:
+            await self._pool.aclose()
+
+    async def warm_up(self, *, connections: int = 2) -> int:
+        """Open pooled connections ahead of the first poll (via `/fapi/v1/ping`)."""
+
+        weight = self._limiter.weight_for("/fapi/v1/ping") * connections
+        await self._limiter.acquire(weight, PRIORITY_LOW)
+        return await self._pool.warm_up("/fapi/v1/ping", connections=connections)
 
-    async def get_account_overview(self) -> Dict:
+    async def get_account_overview(self, *, max_age: Optional[float] = None) -> Dict:
         """Return account wallet balances and equity snapshot."""
 
-        data = await self._signed_request("GET", "/fapi/v2/account")
+        data = await self._signed_request("GET", "/fapi/v2/account", max_age=max_age)
         return data
 
-    async def get_positions(self, symbols: Optional[Iterable[str]] = None) -> List[Dict]:
+    async def get_positions(
+        self,
+        symbols: Optional[Iterable[str]] = None,
+        *,
+        max_age: Optional[float] = None,
+    ) -> List[Dict]:
         """Return position risk data (mark price, unrealizedPnL etc.)."""
 
         params = {}
@@ -114,11 +513,13 @@ class BinanceFuturesRestClient:
             # Binance expects single symbol; iterate to stay under weight limits
             results: List[Dict] = []
             for symbol in symbols:
-                response = await self._signed_request("GET", "/fapi/v2/positionRisk", {"symbol": symbol})
+                response = await self._signed_request(
+                    "GET", "/fapi/v2/positionRisk", {"symbol": symbol}, max_age=max_age
+                )
                 if isinstance(response, list):
                     results.extend(response)
             return results
-        response = await self._signed_request("GET", "/fapi/v2/positionRisk")
+        response = await self._signed_request("GET", "/fapi/v2/positionRisk", max_age=max_age)
         return response if isinstance(response, list) else []
 
     async def get_recent_trades(
@@ -127,25 +528,32 @@ class BinanceFuturesRestClient:
         *,
         from_id: Optional[int] = None,
         limit: int = 100,
+        max_age: Optional[float] = None,
     ) -> List[Dict]:
         params = {"symbol": symbol, "limit": limit}
         if from_id is not None:
             params["fromId"] = from_id
-        response = await self._signed_request("GET", "/fapi/v1/userTrades", params)
+        response = await self._signed_request("GET", "/fapi/v1/userTrades", params, max_age=max_age)
         return response if isinstance(response, list) else []
 
-    async def get_ticker_24h(self, symbols: Iterable[str]) -> List[Dict]:
+    async def get_ticker_24h(self, symbols: Iterable[str], *, max_age: Optional[float] = None) -> List[Dict]:
         """Fetch 24h statistics for provided symbols (public endpoint)."""
 
         stats: List[Dict] = []
         for symbol in symbols:
             try:
-                resp = await self._public_get("/fapi/v1/ticker/24hr", {"symbol": symbol})
+                resp = await self._public_get("/fapi/v1/ticker/24hr", {"symbol": symbol}, max_age=max_age)
                 stats.append(resp)
             except RuntimeError:
                 logger.exception("Failed to fetch 24h ticker for %s", symbol)
         return stats
 
+    async def get_all_tickers_24h(self, *, max_age: Optional[float] = None) -> List[Dict]:
+        """Fetch 24h statistics for every Futures symbol in one request (weight 40)."""
+
+        response = await self._public_get("/fapi/v1/ticker/24hr", max_age=max_age)
+        return response if isinstance(response, list) else []
+
     async def get_income_history(
         self,
         *,
@@ -154,6 +562,7 @@ class BinanceFuturesRestClient:
         start_time: Optional[int] = None,
         end_time: Optional[int] = None,
         limit: int = 1000,
+        max_age: Optional[float] = None,
     ) -> List[Dict]:
         """Return income records (realized PnL, funding, commissions) for the account."""
 
@@ -167,36 +576,148 @@ class BinanceFuturesRestClient:
         if end_time:
             params["endTime"] = int(end_time)
 
-        response = await self._signed_request("GET", "/fapi/v1/income", params)
+        response = await self._signed_request("GET", "/fapi/v1/income", params, max_age=max_age)
         return response if isinstance(response, list) else []
 
-    async def _public_get(self, path: str, params: Optional[Dict] = None) -> Dict:
-        try:
-            response = await self._client.get(path, params=params)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPError as exc:
-            raise RuntimeError(f"Binance public request failed: {exc}") from exc
+    async def create_listen_key(self) -> str:
+        """Open (or extend) the Futures user data stream and return its listenKey."""
 
-    async def _signed_request(self, method: str, path: str, params: Optional[Dict] = None) -> Dict:
-        params = params.copy() if params else {}
-        params.setdefault("recvWindow", self._recv_window)
-        params["timestamp"] = int(time.time() * 1000)
-        query = urlencode(params, doseq=True)
-        signature = hmac.new(self._api_secret, query.encode(), hashlib.sha256).hexdigest()
-        headers = {"X-MBX-APIKEY": self._api_key}
+        data = await self._api_key_request("POST", "/fapi/v1/listenKey")
+        listen_key = data.get("listenKey") if isinstance(data, dict) else None
+        if not listen_key:
+            raise RuntimeError("Binance listenKey response missing listenKey")
+        return listen_key
 
-        try:
-            response = await self._client.request(
+    async def keepalive_listen_key(self) -> None:
+        await self._api_key_request("PUT", "/fapi/v1/listenKey")
+
+    async def close_listen_key(self) -> None:
+        await self._api_key_request("DELETE", "/fapi/v1/listenKey")
+
+    async def _api_key_request(self, method: str, path: str) -> Dict:
+        """USER_STREAM endpoints need the API key header but no signature."""
+
+        return await self._send(
+            method,
+            path,
+            headers={"X-MBX-APIKEY": self._api_key},
+            error_label="user stream",
+        )
+
+    async def _public_get(self, path: str, params: Optional[Dict] = None, *, max_age: Optional[float] = None) -> Dict:
+        return await self._read(
+            path,
+            params,
+            max_age,
+            lambda: self._send("GET", path, params=params, error_label="public"),
+        )
+
+    async def _signed_request(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict] = None,
+        *,
+        max_age: Optional[float] = None,
+    ) -> Dict:
+        def sign() -> Dict:
+            # Подписываем после ожидания лимитера, чтобы timestamp не устарел
+            signed = params.copy() if params else {}
+            signed.setdefault("recvWindow", self._recv_window)
+            signed["timestamp"] = int(time.time() * 1000)
+            query = urlencode(signed, doseq=True)
+            signed["signature"] = hmac.new(self._api_secret, query.encode(), hashlib.sha256).hexdigest()
+            return signed
+
+        def send():
+            return self._send(
                 method,
                 path,
-                params={**params, "signature": signature},
-                headers=headers,
+                params=params,
+                build_params=sign,
+                headers={"X-MBX-APIKEY": self._api_key},
+                error_label="signed",
             )
+
+        if method != "GET":
+            return await send()
+        return await self._read(path, params, max_age, send)
+
+    async def _read(
+        self,
+        path: str,
+        params: Optional[Dict],
+        max_age: Optional[float],
+        fetch: Callable[[], Awaitable],
+    ):
+        """Serve a GET from cache, join an identical in-flight call, or start one."""
+
+        key = (path, tuple(sorted((params or {}).items())))
+        ttl = _ENDPOINT_TTL.get(path, 0.0) if max_age is None else max_age
+        cached = self._cache.get(key)
+        if cached is not None and time.monotonic() - cached[0] <= ttl:
+            self.cache_hits += 1
+            return cached[1]
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(fetch())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._settle(key, done))
+        # shield: отмена одного ожидающего не отменяет общий запрос для остальных
+        return await asyncio.shield(task)
+
+    def _settle(self, key: tuple, task: asyncio.Future) -> None:
+        self._inflight.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+        now = time.monotonic()
+        # Словарь упорядочен по времени записи: обновлённый ключ переезжает в конец
+        self._cache.pop(key, None)
+        if len(self._cache) >= self.cache_max_entries:
+            horizon = max(_ENDPOINT_TTL.values())
+            self._cache = {k: v for k, v in self._cache.items() if now - v[0] <= horizon}
+            # Все записи свежие (много разных параметров) — вытесняем самые старые
+            while len(self._cache) >= self.cache_max_entries:
+                del self._cache[next(iter(self._cache))]
+        self._cache[key] = (now, task.result())
+
+    def cache_stats(self) -> Dict:
+        return {
+            "entries": len(self._cache),
+            "in_flight": len(self._inflight),
+            "hits": self.cache_hits,
+            "coalesced": self.coalesced,
+        }
+
+    async def _send(
+        self,
+        method: str,
+        path: str,
+        *,
+        params: Optional[Dict] = None,
+        build_params: Optional[Callable[[], Dict]] = None,
+        headers: Optional[Dict] = None,
+        error_label: str,
+    ) -> Dict:
+        weight = self._limiter.weight_for(path, params)
+        with timed(BINANCE_REST_LIMITER_WAIT_SECONDS.labels(path=path)):
+            await self._limiter.acquire(weight, _ENDPOINT_PRIORITY.get(path, PRIORITY_NORMAL))
+        BINANCE_REST_WEIGHT.labels(path=path).inc(weight)
+        request_params = build_params() if build_params is not None else params
+        started = time.perf_counter()
+        status = "error"
+        try:
+            response = await self._pool.request(method, path, params=request_params, headers=headers)
+            status = str(response.status_code)
+            self._limiter.sync(response)
             response.raise_for_status()
             return response.json()
         except httpx.HTTPError as exc:
-            raise RuntimeError(f"Binance signed request failed: {exc}") from exc
+            raise RuntimeError(f"Binance {error_label} request failed: {exc}") from exc
+        finally:
+            BINANCE_REST_SECONDS.labels(path=path, status=status).observe(time.perf_counter() - started)
 
     async def __aenter__(self) -> "BinanceFuturesRestClient":
         return self
@@ -0,0 +1,213 @@
+"""Local message bus between the ingest process and fan-out worker processes.
+
+Назначение:
+        - Один ingest-процесс (`BACKEND_ROLE=ingest`) держит соединения с Binance и REST-поллеры
+            и публикует уже закодированные сообщения хаба в Unix-сокет; N fan-out воркеров
+            (`BACKEND_ROLE=fanout`, например `uvicorn --workers N`) подписываются на него и
+            обслуживают `/ws`. Число клиентов масштабируется по ядрам, а нагрузка на биржу и
+            расход лимитов запросов остаются как у одного процесса.
+
+Контракт:
+        - Фрейм на проводе: 4 байта длины (big-endian) + JSON-текст сообщения — тот же
+            текст, что уходит JSON-клиентам (`Frame.encode("json")`), кодируется один раз на
+            сообщение независимо от числа воркеров.
+        - `BusPublisher(path, snapshots, price_rate_hz=...)` — ретранслятор хаба
+            (`Hub.add_relay`): получает все широковещательные фреймы и `price_update` с
+            частотой `price_rate_hz`; `await publisher.start()` / `await publisher.close()`.
+            Новый подписчик первой пачкой получает `snapshots.frames()` — полное состояние —
+            и маркер `bus_synced`. `publisher.enqueue(Frame({"type": "equity_point", ...}))` —
+            служебная точка equity только для шины (клиентам `/ws` не уходит).
+        - `BusSubscriber(path)` — `async for message, frame, bootstrap in subscriber.run()`;
+            `bootstrap` истинно для стартовой пачки до `bus_synced` включительно. При обрыве
+            переподключается сам, после переподключения снова приходит полное состояние
+            (воркер перед ним сбрасывает аккаунт/позиции — `SnapshotCache.reset_state()`).
+        - `relay_to_hub(hub, conflator, message, frame, bootstrap=...)` — применяет сообщение
+            шины в воркере: котировки — в конфлейтер (частоты клиентов воркера), остальное —
+            в кэш снапшотов и рассылку без повторного JSON-кодирования; стартовая пачка —
+            только в кэш снапшотов, служебные сообщения не применяются. `state_delta`
+            другого `epoch` (рестарт ingest) или с откатившимся `seq` заменяет состояние
+            в кэше, и клиентам уходит полный `state_snapshot` вместо дельты.
+
+Ограничения/Политики:
+        - Медленный подписчик не тормозит ingest: если в буфере записи больше
+            `max_buffer` байт, подписчик отключается (`bus_subscribers_dropped_total`) и
+            после переподключения получает состояние заново.
+        - Котировки на шине уже конфлейтированы до `PRICE_MAX_RATE_HZ`; более редкие
+            частоты клиентов воркер конфлейтирует сам.
+        - Только один хост (Unix-сокет); ingest должен стартовать раньше воркеров или
+            воркеры дождутся его (повтор подключения каждые `reconnect_delay` с).
+
+ENV/Файлы состояния:
+        - `BACKEND_ROLE`, `BUS_SOCKET_PATH` читаются в `backend.main`.
+
+Интеграции:
+        - `backend.hub.Hub` (ретранслятор), `backend.conflation.PriceConflator`,
+            `backend.snapshots.SnapshotCache`, `backend.telemetry`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import struct
+from typing import AsyncIterator, Optional, Set, Tuple
+
+from .binance_client import BookTickerEvent
+from .conflation import PriceConflator
+from .encoding import ENCODING_JSON, Frame, json_loads
+from .hub import Hub
+from .snapshots import SnapshotCache
+from .telemetry import BUS_SUBSCRIBERS_DROPPED
+
+logger = logging.getLogger(__name__)
+
+_LENGTH = struct.Struct(">I")
+
+# Служебные сообщения шины — клиентам `/ws` не рассылаются
+BUS_SYNCED = "bus_synced"  # конец стартовой пачки состояния
+EQUITY_POINT = "equity_point"  # каждая точка equity ingest-процесса (тиры `/equity` воркера)
+
+
+def _pack(frame: Frame) -> bytes:
+    data = frame.encode(ENCODING_JSON).encode()
+    return _LENGTH.pack(len(data)) + data
+
+
+class BusPublisher:
+    """Hub relay that writes every frame to all connected Unix-socket subscribers."""
+
+    def __init__(
+        self,
+        path: str,
+        snapshots: SnapshotCache,
+        *,
+        price_rate_hz: float,
+        max_buffer: int = 8 * 1024 * 1024,
+    ) -> None:
+        self.path = path
+        self.snapshots = snapshots
+        self.price_rate_hz = price_rate_hz
+        self.max_buffer = max_buffer
+        self.published = 0
+        self._subscribers: Set[asyncio.StreamWriter] = set()
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    async def start(self) -> None:
+        if os.path.exists(self.path):
+            os.unlink(self.path)  # сокет от прошлого запуска
+        self._server = await asyncio.start_unix_server(self._on_connect, path=self.path)
+
+    async def _on_connect(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        bootstrap = [*self.snapshots.frames(), Frame({"type": BUS_SYNCED})]
+        writer.write(b"".join(_pack(frame) for frame in bootstrap))
+        self._subscribers.add(writer)
+        logger.info("Bus subscriber connected (%d total)", len(self._subscribers))
+        try:
+            # Подписчики ничего не пишут; ждём EOF, чтобы заметить отключение
+            await reader.read()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._drop(writer)
+
+    def _drop(self, writer: asyncio.StreamWriter) -> None:
+        if writer in self._subscribers:
+            self._subscribers.discard(writer)
+            writer.close()
+
+    def enqueue(self, frame: Frame) -> bool:
+        if not self._subscribers:
+            return True
+        data = _pack(frame)
+        self.published += 1
+        for writer in list(self._subscribers):
+            if writer.transport.get_write_buffer_size() > self.max_buffer:
+                logger.warning("Bus subscriber is %d bytes behind; disconnecting", self.max_buffer)
+                BUS_SUBSCRIBERS_DROPPED.inc()
+                self._drop(writer)
+                continue
+            writer.write(data)
+        return True
+
+    async def close(self) -> None:
+        for writer in list(self._subscribers):
+            self._drop(writer)
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+class BusSubscriber:
+    def __init__(self, path: str, *, reconnect_delay: float = 1.0) -> None:
+        self.path = path
+        self.reconnect_delay = reconnect_delay
+        self.connected = False
+        self._stop = asyncio.Event()
+
+    async def stop(self) -> None:
+        self._stop.set()
+
+    async def run(self) -> AsyncIterator[Tuple[dict, Frame, bool]]:
+        while not self._stop.is_set():
+            try:
+                reader, writer = await asyncio.open_unix_connection(self.path)
+            except OSError:
+                await asyncio.sleep(self.reconnect_delay)
+                continue
+            self.connected = True
+            logger.info("Connected to the ingest bus at %s", self.path)
+            bootstrap = True
+            try:
+                while not self._stop.is_set():
+                    header = await reader.readexactly(_LENGTH.size)
+                    text = (await reader.readexactly(_LENGTH.unpack(header)[0])).decode()
+                    message = json_loads(text)
+                    yield message, Frame(message, json_text=text), bootstrap
+                    if message.get("type") == BUS_SYNCED:
+                        bootstrap = False
+            except (asyncio.IncompleteReadError, ConnectionError):
+                logger.warning("Ingest bus connection lost; reconnecting")
+            finally:
+                self.connected = False
+                writer.close()
+            await asyncio.sleep(self.reconnect_delay)
+
+
+def relay_to_hub(hub: Hub, conflator: PriceConflator, message: dict, frame: Frame, *, bootstrap: bool = False) -> None:
+    """Apply one bus message inside a fan-out worker."""
+
+    kind = message.get("type")
+    if kind in (BUS_SYNCED, EQUITY_POINT):
+        return
+    if kind == "price_update":
+        if bootstrap:
+            hub.snapshots.record_price(message["symbol"], frame)
+            return
+        # Частоты клиентов у каждого воркера свои — цены снова идут через конфлейтер
+        conflator.update(BookTickerEvent(
+            message["symbol"],
+            message["price"],
+            message.get("bid", message["price"]),
+            message.get("ask", message["price"]),
+            message.get("tsMs", message.get("ts", 0) * 1000),
+        ))
+        return
+    if kind == "state_delta" and not bootstrap and hub.snapshots.starts_new_state(message):
+        # Новый ingest-процесс: кэш начинает состояние заново, клиентам — полный
+        # state_snapshot нового epoch вместо дельты, которую не к чему применить
+        hub.snapshots.record(message, frame)
+        hub.broadcast_frame(hub.snapshots.state_frame())
+        return
+    hub.snapshots.record(message, frame)
+    if not bootstrap:
+        # Пачка состояния при (пере)подключении — только в кэш снапшотов: подключённые
+        # клиенты уже получили его, пропущенные дельты они догонят через resync по seq
+        hub.broadcast_frame(frame)
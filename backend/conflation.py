@@ -0,0 +1,117 @@
+"""Per-symbol price conflation between the bookTicker stream and the WS hub.
+
+Назначение:
+        - `PriceConflator` хранит только последнюю котировку (bid/ask/mid) по каждому
+            символу и отдаёт её клиентам с ограниченной частотой вместо полного потока
+            `bookTicker`, сокращая JSON-кодирование, записи в сокеты и ререндеры браузера.
+
+Контракт:
+        - `update(event)` — O(1): запоминает последнее событие `BookTickerEvent`
+            (`symbol`, `price`, `bid`, `ask`, `ts`) и помечает символ изменённым.
+        - `run()` — фоновая задача: для каждой активной частоты клиентов (`Hub.price_rates()`)
+            раз в `1/rate` секунд рассылает `price_update` по символам, изменившимся с
+            прошлого flush этой группы. Фрейм строится один раз на обновление символа и
+            кодируется один раз на формат (`backend.encoding.Frame`).
+        - `resolve_rate(requested)` — нормализует частоту клиента: `None` → глобальная
+            частота, иначе ограничение сверху `max_rate_hz`, округление до 0.1 Гц.
+
+Ограничения/Политики:
+        - Устаревшие цены не показываются: на каждом flush уходит последняя известная
+            котировка, промежуточные значения отбрасываются.
+        - Новая группа частоты получает все последние цены на первом flush.
+
+ENV/Файлы состояния:
+        - Частоты задаются в `backend.main` (`PRICE_RATE_HZ`, `PRICE_MAX_RATE_HZ`) и
+            query-параметром `/ws?rate=<hz>`.
+
+Интеграции:
+        - `backend.hub.Hub.broadcast_frame` для адресной рассылки группе частоты и
+            `Hub.snapshots.record_price` для состояния новых клиентов.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Dict, Optional, Tuple
+
+from .binance_client import BookTickerEvent
+from .encoding import Frame
+from .hub import Hub
+
+
+class PriceConflator:
+    def __init__(self, hub: Hub, *, default_rate_hz: float = 20.0, max_rate_hz: float = 60.0) -> None:
+        self.hub = hub
+        self.max_rate_hz = max(0.1, max_rate_hz)
+        self.default_rate_hz = self._clamp(default_rate_hz)
+        self._latest: Dict[str, BookTickerEvent] = {}
+        self._seq: Dict[str, int] = {}
+        self._counter = 0
+        self._frames: Dict[str, Tuple[int, Frame]] = {}
+        self._flushed: Dict[float, int] = {}
+        self._next_due: Dict[float, float] = {}
+
+    def _clamp(self, rate: float) -> float:
+        return max(0.1, round(min(float(rate), self.max_rate_hz), 1))
+
+    def resolve_rate(self, requested: Optional[float]) -> float:
+        if requested is None or requested <= 0:
+            return self.default_rate_hz
+        return self._clamp(requested)
+
+    def update(self, event: BookTickerEvent) -> None:
+        self._counter += 1
+        self._latest[event.symbol] = event
+        self._seq[event.symbol] = self._counter
+
+    def _frame(self, symbol: str) -> Frame:
+        seq = self._seq[symbol]
+        cached = self._frames.get(symbol)
+        if cached is not None and cached[0] == seq:
+            return cached[1]
+        event = self._latest[symbol]
+        frame = Frame({
+            "type": "price_update",
+            "symbol": event.symbol,
+            "price": event.price,
+            "ts": int(event.ts) // 1000,
+            # Время события биржи в мс — для замера задержки доставки клиентом
+            "tsMs": event.ts,
+            "bid": event.bid,
+            "ask": event.ask,
+        })
+        self._frames[symbol] = (seq, frame)
+        self.hub.snapshots.record_price(symbol, frame)
+        return frame
+
+    def flush(self, rate: float) -> int:
+        """Send symbols changed since the previous flush of this rate group."""
+
+        last = self._flushed.get(rate, 0)
+        sent = 0
+        for symbol, seq in self._seq.items():
+            if seq > last:
+                self.hub.broadcast_frame(self._frame(symbol), price_rate_hz=rate)
+                sent += 1
+        self._flushed[rate] = self._counter
+        return sent
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            now = loop.time()
+            rates = self.hub.price_rates()
+            # Без клиентов просто периодически проверяем появление новых групп
+            next_wakeup = now + 0.1
+            for rate in rates:
+                due = self._next_due.get(rate, 0.0)
+                if now >= due:
+                    self.flush(rate)
+                    due = now + 1.0 / rate
+                    self._next_due[rate] = due
+                next_wakeup = min(next_wakeup, due)
+            for rate in list(self._next_due):
+                if rate not in rates:
+                    self._next_due.pop(rate, None)
+                    self._flushed.pop(rate, None)
+            await asyncio.sleep(max(0.0, next_wakeup - loop.time()))
@@ -0,0 +1,97 @@
+"""Delta encoding of account and position state for `/ws` clients.
+
+Назначение:
+        - `StateTracker` помнит последнее отправленное состояние аккаунта и каждой
+            позиции и на каждом цикле публикации отдаёт только изменившиеся поля.
+            В установившемся режиме (ничего не поменялось) в сеть не уходит ничего.
+
+Контракт:
+        - `diff(account, positions)` → `state_delta` или `None`, если изменений нет:
+            `{"type": "state_delta", "epoch", "seq", "account": {<изменённые поля>},
+              "positions": [{"id", <изменённые поля>}], "closed": [<id>], "ts"}`;
+            ключи `account` / `positions` / `closed` присутствуют только если непусты.
+            Новая позиция приходит целиком, у существующей — только изменённые поля.
+        - `apply_delta(account, positions, delta)` сворачивает `state_delta` в полное
+            состояние; из него `SnapshotCache` собирает `state_snapshot`
+            `{"type", "epoch", "seq", "account", "positions", "ts"}` с `seq` последнего
+            применённого `state_delta` — и для новых клиентов, и по запросу resync.
+        - `seq` растёт на 1 с каждым `state_delta` в пределах `epoch` — случайного id
+            экземпляра `StateTracker` (процесса-источника). Клиент, заметивший разрыв
+            (`seq != last + 1`) или другой `epoch`, отправляет `{"op": "resync"}` и получает
+            `state_snapshot`; новый `epoch` означает, что состояние заменяется, а не
+            сворачивается (рестарт ingest-процесса начинает `seq` заново).
+
+Ограничения/Политики:
+        - Позиции с нулевым количеством не отправляются; закрытая позиция
+            приходит одним id в `closed` вместо повторной рассылки нулей.
+        - Сравнение полей — точное: значения приходят из одного источника
+            (REST/User Data Stream) и не пересчитываются между циклами.
+
+ENV/Файлы состояния:
+        - Не читает окружение.
+
+Интеграции:
+        - `backend.main._publish_account` (формирование payload'ов),
+            `backend.snapshots.SnapshotCache` (`state_snapshot` для новых клиентов и resync).
+"""
+
+from __future__ import annotations
+
+import time
+import uuid
+from typing import Dict, Iterable, List, Optional
+
+
+def apply_delta(account: Dict, positions: Dict[str, Dict], delta: Dict) -> None:
+    """Fold a `state_delta` into `account` / `positions` in place."""
+
+    account.update(delta.get("account") or {})
+    for change in delta.get("positions") or []:
+        positions.setdefault(change["id"], {}).update(change)
+    for position_id in delta.get("closed") or []:
+        positions.pop(position_id, None)
+
+
+class StateTracker:
+    def __init__(self, epoch: Optional[str] = None) -> None:
+        self.epoch = epoch or uuid.uuid4().hex[:12]
+        self.seq = 0
+        self._account: Dict = {}
+        self._positions: Dict[str, Dict] = {}
+
+    @staticmethod
+    def _changed(previous: Dict, current: Dict) -> Dict:
+        return {key: value for key, value in current.items() if previous.get(key) != value}
+
+    def diff(self, account: Dict, positions: Iterable[Dict], now: Optional[float] = None) -> Optional[Dict]:
+        account_changes = self._changed(self._account, account)
+
+        open_positions = {pos["id"]: pos for pos in positions if pos.get("quantity")}
+        position_changes: List[Dict] = []
+        for position_id, pos in open_positions.items():
+            previous = self._positions.get(position_id)
+            if previous is None:
+                position_changes.append(dict(pos))
+                continue
+            changes = self._changed(previous, pos)
+            if changes:
+                changes["id"] = position_id
+                position_changes.append(changes)
+        closed = [position_id for position_id in self._positions if position_id not in open_positions]
+
+        if not account_changes and not position_changes and not closed:
+            return None
+
+        self._account = dict(account)
+        self._positions = {position_id: dict(pos) for position_id, pos in open_positions.items()}
+        self.seq += 1
+
+        delta: Dict = {"type": "state_delta", "epoch": self.epoch, "seq": self.seq}
+        if account_changes:
+            delta["account"] = account_changes
+        if position_changes:
+            delta["positions"] = position_changes
+        if closed:
+            delta["closed"] = closed
+        delta["ts"] = int(now if now is not None else time.time())
+        return delta
@@ -0,0 +1,145 @@
+"""Wire encodings for `/ws` frames, negotiated per client and encoded once per format.
+
+Назначение:
+        - `Frame` оборачивает исходящее сообщение и лениво кодирует его в формат
+            клиента, кэшируя результат: каждое сообщение кодируется один раз на формат,
+            а не один раз на клиента.
+        - `negotiate_encoding` выбирает формат по query-параметру `?encoding=` или по
+            WebSocket subprotocol (`Sec-WebSocket-Protocol: msgpack`).
+
+Контракт:
+        - Форматы: `json` (default, текстовые фреймы) и `msgpack` (бинарные фреймы, та же
+            структура сообщений, что и в JSON).
+        - `Frame(message)` или `Frame.from_json(text)` (уже закодированный JSON);
+            `frame.encode(fmt)` → `str` для JSON, `bytes` для MessagePack.
+        - `negotiate_encoding(websocket)` → `(encoding, subprotocol)`; subprotocol нужно
+            передать в `websocket.accept(subprotocol=...)`.
+        - `decode_client_message(message)` → dict из ASGI-сообщения `websocket.receive`
+            (JSON в текстовом фрейме, MessagePack в бинарном) либо `None`.
+        - `json_loads(data)` / `json_dumps(obj) -> str` — общий JSON-кодек бэкенда
+            (входящие фреймы Binance, исходящие фреймы клиентов).
+
+Ограничения/Политики:
+        - `msgpack` — опциональная зависимость: если пакет не установлен, запрос
+            MessagePack откатывается на JSON с предупреждением в логе.
+        - `orjson` — опциональная зависимость: если установлен, JSON разбирается и
+            кодируется через него (в разы быстрее stdlib), иначе — `json` из stdlib.
+            Вывод компактный (без пробелов) в обоих случаях.
+
+ENV/Файлы состояния:
+        - Не читает окружение.
+
+Интеграции:
+        - `backend.hub` (очереди клиентов хранят `Frame`), `backend.conflation`,
+            `backend.snapshots`.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from typing import Optional, Tuple, Union
+
+try:  # optional dependency
+    import msgpack
+except ImportError:  # pragma: no cover - depends on environment
+    msgpack = None
+
+try:  # optional dependency
+    import orjson
+except ImportError:  # pragma: no cover - depends on environment
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+ENCODING_JSON = "json"
+ENCODING_MSGPACK = "msgpack"
+
+
+if orjson is not None:
+    json_loads = orjson.loads
+
+    def json_dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+
+else:  # pragma: no cover - depends on environment
+    json_loads = json.loads
+    _compact = json.JSONEncoder(separators=(",", ":")).encode
+
+    def json_dumps(obj) -> str:
+        return _compact(obj)
+
+
+def available_encodings() -> Tuple[str, ...]:
+    if msgpack is None:
+        return (ENCODING_JSON,)
+    return (ENCODING_JSON, ENCODING_MSGPACK)
+
+
+class Frame:
+    """Outbound message with a per-format encoding cache."""
+
+    __slots__ = ("message", "_json", "_msgpack")
+
+    def __init__(self, message: Optional[dict] = None, *, json_text: Optional[str] = None) -> None:
+        if message is None and json_text is None:
+            raise ValueError("Frame needs a message or pre-encoded JSON")
+        self.message = message
+        self._json = json_text
+        self._msgpack: Optional[bytes] = None
+
+    @classmethod
+    def from_json(cls, text: str) -> "Frame":
+        return cls(json_text=text)
+
+    def _payload(self) -> dict:
+        if self.message is None:
+            self.message = json_loads(self._json)
+        return self.message
+
+    def encode(self, encoding: str = ENCODING_JSON) -> Union[str, bytes]:
+        if encoding == ENCODING_MSGPACK and msgpack is not None:
+            if self._msgpack is None:
+                self._msgpack = msgpack.packb(self._payload(), use_bin_type=True)
+            return self._msgpack
+        if self._json is None:
+            self._json = json_dumps(self.message)
+        return self._json
+
+
+def negotiate_encoding(websocket) -> Tuple[str, Optional[str]]:
+    """Pick the client's wire format from `?encoding=` or the offered subprotocols."""
+
+    offered = [p.strip().lower() for p in websocket.scope.get("subprotocols", []) or []]
+    requested = (websocket.query_params.get("encoding") or "").strip().lower()
+    subprotocol: Optional[str] = None
+    if not requested:
+        for proto in offered:
+            if proto in (ENCODING_JSON, ENCODING_MSGPACK):
+                requested = proto
+                break
+    encoding = requested or ENCODING_JSON
+    if encoding not in available_encodings():
+        if encoding == ENCODING_MSGPACK:
+            logger.warning("Client requested msgpack but the package is not installed; using JSON")
+        encoding = ENCODING_JSON
+    if encoding in offered:
+        subprotocol = encoding
+    return encoding, subprotocol
+
+
+def decode_client_message(message: dict) -> Optional[dict]:
+    """Decode an inbound ASGI `websocket.receive` message into a control dict."""
+
+    text = message.get("text")
+    raw = message.get("bytes")
+    try:
+        if text is not None:
+            payload = json_loads(text)
+        elif raw is not None and msgpack is not None:
+            payload = msgpack.unpackb(raw, raw=False)
+        else:
+            return None
+    except ValueError:
+        return None
+    return payload if isinstance(payload, dict) else None
@@ -0,0 +1,223 @@
+"""Server-side equity time series with resolution tiers and downsampled range queries.
+
+Назначение:
+        - `EquitySeries` хранит историю equity в памяти в кольцевых буферах на
+            `array('d')` (без dict на точку) и отдаёт её для графика одним небольшим
+            ответом `/equity?range=72H&points=500` вместо тысяч `equity_snapshot`.
+        - Тиры разрешения заполняются при записи: сырые точки (каденс опроса),
+            1 минута (72 часа) и 15 минут (30 дней). Запрос диапазона читает самый
+            детальный тир, который покрывает диапазон, и сжимает его LTTB.
+
+Контракт:
+        - `series.add(ts, equity, balance, unrealized)` — точка с временем в секундах;
+            повтор в ту же секунду заменяет последнюю точку.
+        - `series.query(range_sec, points)` → `(tier_sec, [{'time', 'equity', 'balance',
+            'unrealizedPnl'}, ...])` — не больше `points` точек, форма как у `equity_history`.
+        - `parse_range("72H")` → секунды (`m`/`H`/`D`/`W`, регистр не важен; `all` → `None`).
+        - `series.load(width, records)` — массовое заполнение тира (восстановление из
+            `backend.equity_log.EquityLog.tail`).
+        - `lttb(times, values, threshold)` → индексы выбранных точек (Largest-Triangle-Three-Buckets).
+
+Ограничения/Политики:
+        - Точка тира — последнее значение в бакете (close), время — начало бакета.
+        - Память фиксирована: ёмкость каждого тира задаётся при создании, старые точки
+            перезаписываются.
+        - Только в памяти; переживает рестарт через `backend.equity_log`.
+
+ENV/Файлы состояния:
+        - Не читает окружение; ёмкость сырого тира задаётся из `backend.main`
+            (`EQUITY_RAW_POINTS`).
+
+Интеграции:
+        - `backend.main._publish_account` (запись), `GET /equity` (чтение).
+"""
+
+from __future__ import annotations
+
+import re
+from array import array
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+_RANGE_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([mhdw])\s*$", re.IGNORECASE)
+_RANGE_UNITS = {"m": 60, "h": 3_600, "d": 86_400, "w": 604_800}
+
+
+def parse_range(raw: Optional[str]) -> Optional[float]:
+    """Parse `15m` / `72H` / `7D` / `2W` into seconds; `all` or empty → `None`."""
+
+    if raw is None or not raw.strip() or raw.strip().lower() == "all":
+        return None
+    match = _RANGE_RE.match(raw)
+    if match is None:
+        raise ValueError(f"Unsupported range {raw!r}; expected e.g. 15m, 24H, 72H, 7D")
+    return float(match.group(1)) * _RANGE_UNITS[match.group(2).lower()]
+
+
+class _Ring:
+    """Fixed-capacity ring of (time, equity, balance, unrealized) columns."""
+
+    __slots__ = ("capacity", "times", "equity", "balance", "unrealized", "start", "size")
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self.times = array("d", bytes(8 * capacity))
+        self.equity = array("d", bytes(8 * capacity))
+        self.balance = array("d", bytes(8 * capacity))
+        self.unrealized = array("d", bytes(8 * capacity))
+        self.start = 0
+        self.size = 0
+
+    def _index(self, i: int) -> int:
+        return (self.start + i) % self.capacity
+
+    def last_time(self) -> Optional[float]:
+        return self.times[self._index(self.size - 1)] if self.size else None
+
+    def first_time(self) -> Optional[float]:
+        return self.times[self.start] if self.size else None
+
+    def append(self, ts: float, equity: float, balance: float, unrealized: float) -> None:
+        if self.size < self.capacity:
+            idx = self._index(self.size)
+            self.size += 1
+        else:
+            idx = self.start
+            self.start = (self.start + 1) % self.capacity
+        self.times[idx] = ts
+        self.equity[idx] = equity
+        self.balance[idx] = balance
+        self.unrealized[idx] = unrealized
+
+    def replace_last(self, ts: float, equity: float, balance: float, unrealized: float) -> None:
+        idx = self._index(self.size - 1)
+        self.times[idx] = ts
+        self.equity[idx] = equity
+        self.balance[idx] = balance
+        self.unrealized[idx] = unrealized
+
+    def since(self, cutoff: Optional[float]) -> Tuple[List[float], List[float], List[float], List[float]]:
+        """Columns of points with `time >= cutoff` in chronological order."""
+
+        order = [self._index(i) for i in range(self.size)]
+        if cutoff is not None:
+            # Времена монотонны: бинарный поиск первой точки внутри диапазона
+            lo, hi = 0, len(order)
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if self.times[order[mid]] < cutoff:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            order = order[lo:]
+        return (
+            [self.times[i] for i in order],
+            [self.equity[i] for i in order],
+            [self.balance[i] for i in order],
+            [self.unrealized[i] for i in order],
+        )
+
+
+def lttb(times: Sequence[float], values: Sequence[float], threshold: int) -> List[int]:
+    """Largest-Triangle-Three-Buckets: indices of `threshold` shape-preserving points."""
+
+    n = len(values)
+    if threshold >= n:
+        return list(range(n))
+    if threshold <= 2:
+        return [0, n - 1][: max(threshold, 0)]
+    selected = [0]
+    every = (n - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        avg_start = int((i + 1) * every) + 1
+        avg_end = min(int((i + 2) * every) + 1, n)
+        span = avg_end - avg_start
+        avg_t = sum(times[avg_start:avg_end]) / span
+        avg_v = sum(values[avg_start:avg_end]) / span
+
+        range_start = int(i * every) + 1
+        range_end = int((i + 1) * every) + 1
+        ax, ay = times[a], values[a]
+        best_area = -1.0
+        best = range_start
+        for j in range(range_start, range_end):
+            area = abs((ax - avg_t) * (values[j] - ay) - (ax - times[j]) * (avg_v - ay))
+            if area > best_area:
+                best_area = area
+                best = j
+        selected.append(best)
+        a = best
+    selected.append(n - 1)
+    return selected
+
+
+class EquitySeries:
+    def __init__(self, *, raw_points: int = 4_320) -> None:
+        # (ширина бакета в секундах, кольцо); 0 — сырые точки без агрегации
+        self._tiers: List[Tuple[int, _Ring]] = [
+            (0, _Ring(raw_points)),
+            # Запас в один бакетный час/день, чтобы тир целиком покрывал 72H / 30D
+            (60, _Ring(73 * 60)),
+            (900, _Ring(31 * 96)),
+        ]
+
+    def __len__(self) -> int:
+        return self._tiers[0][1].size
+
+    def last_time(self) -> Optional[float]:
+        return self._tiers[0][1].last_time()
+
+    def tiers(self) -> List[Tuple[int, int]]:
+        """`(bucket width in seconds, capacity)` per tier, finest first."""
+
+        return [(width, ring.capacity) for width, ring in self._tiers]
+
+    def load(self, width: int, records: Iterable[Tuple[float, float, float, float]]) -> None:
+        """Bulk-append already bucketed `(ts, equity, balance, unrealized)` rows to one tier."""
+
+        for tier_width, ring in self._tiers:
+            if tier_width == width:
+                for ts, equity, balance, unrealized in records:
+                    ring.append(ts, equity, balance, unrealized)
+                return
+        raise ValueError(f"No equity tier with bucket width {width}")
+
+    def add(self, ts: float, equity: float, balance: float, unrealized: float) -> None:
+        ts = float(int(ts))
+        for width, ring in self._tiers:
+            bucket = ts if width == 0 else ts - ts % width
+            last = ring.last_time()
+            if last is not None and bucket < last:
+                continue  # точка из прошлого (сдвиг часов) — тиры только дописываются
+            if last == bucket:
+                ring.replace_last(bucket, equity, balance, unrealized)
+            else:
+                ring.append(bucket, equity, balance, unrealized)
+
+    def _tier_for(self, range_sec: Optional[float], now: float) -> Tuple[int, _Ring]:
+        cutoff = None if range_sec is None else now - range_sec
+        for width, ring in self._tiers:
+            first = ring.first_time()
+            # Тир подходит, если ещё не переполнялся (хранит всю историю) или покрывает диапазон
+            if first is not None and (ring.size < ring.capacity or (cutoff is not None and first <= cutoff)):
+                return width, ring
+        return self._tiers[-1]
+
+    def query(self, range_sec: Optional[float], points: int = 500) -> Tuple[int, List[Dict]]:
+        raw = self._tiers[0][1]
+        now = raw.last_time()
+        if now is None:
+            return 0, []
+        width, ring = self._tier_for(range_sec, now)
+        cutoff = None if range_sec is None else now - range_sec
+        times, equity, balance, unrealized = ring.since(cutoff)
+        indices = lttb(times, equity, points) if len(times) > points else range(len(times))
+        return width, [
+            {
+                "time": int(times[i]),
+                "equity": equity[i],
+                "balance": balance[i],
+                "unrealizedPnl": unrealized[i],
+            }
+            for i in indices
+        ]
@@ -0,0 +1,178 @@
+"""Append-only on-disk equity log with fixed-width records and the baseline equity.
+
+Назначение:
+        - `EquityLog` переживает рестарты: хранит базовый equity (`BASELINE_EQUITY`,
+            от которого считаются `totalPnL`/`totalPnLPercent`) и историю точек equity,
+            чтобы после деплоя метрики не перебазировались, а график не начинался с нуля.
+        - Чтение диапазонов идёт через `mmap` и бинарный поиск по времени, без разбора
+            всего файла.
+
+Контракт:
+        - Формат файла: заголовок 32 байта `<8s d d 8x>` (`EQLOG001`, baseline или NaN,
+            время создания) и записи по 32 байта `<d d d d>`
+            (`ts`, `equity`, `balance`, `unrealized`), время в секундах по возрастанию.
+        - `EquityLog.open(path)` — создаёт файл или открывает существующий (обрезая
+            недописанную последнюю запись после аварии); `readonly=True` — только чтение
+            без выравнивания хвоста (fan-out воркеры рядом с пишущим ingest-процессом).
+        - `log.baseline` / `log.set_baseline(value)` — базовый equity (перезапись поля
+            заголовка на месте; записи только дописываются).
+        - `log.append(ts, equity, balance, unrealized)` → `False`, если `ts` не позже последней
+            записи (шаг системных часов назад): такая точка не пишется, иначе сломался бы
+            бинарный поиск по времени.
+        - `log.since(cutoff)` → записи с `ts >= cutoff`; `log.tail(width, count)` → последние
+            `count` точек, по одной (последней) на бакет шириной `width` секунд
+            (`width=0` — сырые записи), время точки — начало бакета.
+
+Ограничения/Политики:
+        - Запись не вызывает `fsync`: при падении ОС можно потерять последние точки,
+            но не целостность файла (хвост выравнивается при открытии).
+        - Файл растёт на 32 байта за точку (~200 МБ в год при точке раз в 5 с);
+            ротация не выполняется.
+        - Один процесс-писатель на файл.
+
+ENV/Файлы состояния:
+        - Путь передаётся из `backend.main` (`EQUITY_LOG_PATH`, default `./equity_history.bin`).
+
+Интеграции:
+        - `backend.main` (восстановление при старте, запись в `_publish_account`),
+            `backend.equity.EquitySeries.load` (заполнение тиров).
+"""
+
+from __future__ import annotations
+
+import math
+import mmap
+import os
+import struct
+import time
+from typing import List, Optional, Tuple
+
+_MAGIC = b"EQLOG001"
+_HEADER = struct.Struct("<8sdd8x")
+_RECORD = struct.Struct("<dddd")
+_BASELINE_OFFSET = 8
+
+Record = Tuple[float, float, float, float]
+
+
+class EquityLog:
+    def __init__(self, path: str, file, baseline: Optional[float]) -> None:
+        self.path = path
+        self._file = file
+        self._baseline = baseline
+        count = len(self)
+        # Время последней записи: append пишет только строго более поздние точки
+        self._last_ts: Optional[float] = (
+            struct.unpack("<d", os.pread(file.fileno(), 8, _HEADER.size + (count - 1) * _RECORD.size))[0]
+            if count else None
+        )
+
+    @classmethod
+    def open(cls, path: str, *, readonly: bool = False) -> "EquityLog":
+        exists = os.path.exists(path) and os.path.getsize(path) >= _HEADER.size
+        if readonly:
+            if not exists:
+                raise FileNotFoundError(path)
+            file = open(path, "rb")
+            magic, baseline, _ = _HEADER.unpack(file.read(_HEADER.size))
+            if magic != _MAGIC:
+                file.close()
+                raise ValueError(f"{path} is not an equity log")
+            return cls(path, file, None if math.isnan(baseline) else baseline)
+        file = open(path, "r+b" if exists else "w+b")
+        if not exists:
+            file.write(_HEADER.pack(_MAGIC, math.nan, time.time()))
+            file.flush()
+            return cls(path, file, None)
+        magic, baseline, _ = _HEADER.unpack(file.read(_HEADER.size))
+        if magic != _MAGIC:
+            file.close()
+            raise ValueError(f"{path} is not an equity log")
+        size = os.path.getsize(path)
+        aligned = _HEADER.size + (size - _HEADER.size) // _RECORD.size * _RECORD.size
+        if aligned != size:
+            file.truncate(aligned)
+        file.seek(0, os.SEEK_END)
+        return cls(path, file, None if math.isnan(baseline) else baseline)
+
+    def __len__(self) -> int:
+        return (self._file.seek(0, os.SEEK_END) - _HEADER.size) // _RECORD.size
+
+    @property
+    def baseline(self) -> Optional[float]:
+        return self._baseline
+
+    def set_baseline(self, value: float) -> None:
+        os.pwrite(self._file.fileno(), struct.pack("<d", value), _BASELINE_OFFSET)
+        self._baseline = value
+
+    def append(self, ts: float, equity: float, balance: float, unrealized: float) -> bool:
+        """Append a record; a timestamp not after the last one (clock step back) is dropped."""
+
+        if self._last_ts is not None and ts <= self._last_ts:
+            return False
+        self._file.seek(0, os.SEEK_END)
+        self._file.write(_RECORD.pack(ts, equity, balance, unrealized))
+        self._file.flush()
+        self._last_ts = ts
+        return True
+
+    def _view(self) -> Tuple[Optional[mmap.mmap], int]:
+        self._file.flush()
+        count = len(self)
+        if count == 0:
+            return None, 0
+        return mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ), count
+
+    @staticmethod
+    def _ts(view: mmap.mmap, index: int) -> float:
+        return struct.unpack_from("<d", view, _HEADER.size + index * _RECORD.size)[0]
+
+    @classmethod
+    def _bisect(cls, view: mmap.mmap, ts: float, lo: int, hi: int) -> int:
+        """First index in [lo, hi) whose time is >= ts."""
+
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if cls._ts(view, mid) < ts:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def since(self, cutoff: float) -> List[Record]:
+        view, count = self._view()
+        if view is None:
+            return []
+        with view:
+            start = self._bisect(view, cutoff, 0, count)
+            offset = _HEADER.size + start * _RECORD.size
+            return list(_RECORD.iter_unpack(view[offset:_HEADER.size + count * _RECORD.size]))
+
+    def tail(self, width: int, count: int) -> List[Record]:
+        """Last `count` bucket-close records for bucket `width` seconds (0 = raw)."""
+
+        view, total = self._view()
+        if view is None or count <= 0:
+            return []
+        with view:
+            if width <= 0:
+                start = max(0, total - count)
+                offset = _HEADER.size + start * _RECORD.size
+                return list(_RECORD.iter_unpack(view[offset:_HEADER.size + total * _RECORD.size]))
+            # От конца назад: последняя запись бакета + бинарный поиск начала бакета —
+            # O(count · log n) чтений вместо прохода по всему файлу
+            out: List[Record] = []
+            pos = total
+            while pos > 0 and len(out) < count:
+                ts, equity, balance, unrealized = _RECORD.unpack_from(
+                    view, _HEADER.size + (pos - 1) * _RECORD.size
+                )
+                bucket = ts - ts % width
+                out.append((bucket, equity, balance, unrealized))
+                pos = self._bisect(view, bucket, 0, pos - 1)
+            out.reverse()
+            return out
+
+    def close(self) -> None:
+        self._file.close()
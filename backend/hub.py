@@ -0,0 +1,376 @@
+"""WebSocket fan-out hub with per-client bounded send queues.
+
+Назначение:
+        - `Hub` рассылает события всем подключённым клиентам `/ws`, не дожидаясь
+            медленных потребителей: `broadcast` лишь кладёт `Frame` в очередь каждого
+            клиента; кодирование в формат клиента (JSON/MessagePack) выполняется один раз
+            на формат и кэшируется во фрейме.
+        - `ClientSession` владеет ограниченной очередью исходящих фреймов и отдельной
+            writer-задачей, которая вычитывает очередь и пишет в сокет.
+
+Контракт:
+        - `await hub.add(ws)` → `ClientSession` (writer уже запущен); `await hub.remove(ws)`
+            останавливает writer и забывает клиента.
+        - `await hub.broadcast(message)` — O(N) неблокирующих `enqueue`, время не зависит
+            от скорости самого медленного клиента.
+        - При `add` клиент первой пачкой получает закэшированное состояние
+            (`backend.snapshots.SnapshotCache`), которое хаб обновляет на каждом `broadcast`.
+        - `broadcast_frame(frame, price_rate_hz=...)` — рассылка готового фрейма всем
+            клиентам либо только группе с заданной частотой цен (см. `backend.conflation`).
+        - `send(ws, frame)` — фрейм одному клиенту (ответ на resync).
+        - Подписки по темам (`backend.topics`): `add(ws, topics=...)` (default `*`),
+            `subscribe(ws, topics)` / `unsubscribe(ws, topics)` → текущий набор тем. Первый
+            явный `subscribe` заменяет подписку по умолчанию, следующие — добавляют темы;
+            по новым темам клиент сразу получает их закэшированное состояние. Хаб держит
+            индекс тема → подписчики, и рассылка обходит только заинтересованных клиентов;
+            фрейм без подписчиков не кодируется вовсе.
+        - `add_relay(relay)` / `remove_relay(relay)` — ретранслятор (`backend.bus.BusPublisher`)
+            с `enqueue(frame)` и `price_rate_hz`: получает все широковещательные фреймы и
+            цены своей группы частоты, как клиент, но без очереди и снапшота при подключении.
+        - Политика переполнения: при заполненной очереди выбрасывается самый старый фрейм
+            (drop-oldest) и засчитывается overflow — не больше одного за проход event loop,
+            так что синхронная пачка рассылок считается одним переполнением; после
+            `max_overflows` переполнений подряд (без полного опустошения очереди между ними)
+            клиент отключается.
+            `max_overflows=0` — никогда не отключать, только drop-oldest.
+
+Ограничения/Политики:
+        - Все операции выполняются в одном event loop; `enqueue` синхронный и не требует
+            блокировок, поэтому `add`/`remove` не ждут рассылки.
+        - Ошибка записи в сокет закрывает сессию и удаляет клиента из хаба.
+
+ENV/Файлы состояния:
+        - Параметры очереди передаются из `backend.main` (`WS_CLIENT_QUEUE_SIZE`,
+            `WS_CLIENT_MAX_OVERFLOWS`).
+
+Интеграции:
+        - FastAPI/Starlette `WebSocket.send_text` / `send_bytes`.
+        - `backend.encoding.Frame` — ленивое кодирование по форматам.
+        - `backend.telemetry` — время fan-out (`ws_broadcast_seconds`), выброшенные
+            фреймы и отключения клиентов.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+from fastapi import WebSocket
+
+from .encoding import ENCODING_JSON, Frame
+from .snapshots import SnapshotCache
+from .telemetry import WS_BROADCAST_SECONDS, WS_CLIENTS_DISCONNECTED, WS_FRAMES_DROPPED
+from .topics import ALL, message_topics
+
+logger = logging.getLogger(__name__)
+
+
+class ClientSession:
+    """Outbound queue plus writer task for a single WebSocket client."""
+
+    def __init__(
+        self,
+        ws: WebSocket,
+        *,
+        max_queue: int,
+        max_overflows: int,
+        price_rate_hz: Optional[float] = None,
+        encoding: str = ENCODING_JSON,
+        on_close: Optional[Callable[["ClientSession"], None]] = None,
+    ) -> None:
+        self.ws = ws
+        self.price_rate_hz = price_rate_hz
+        self.encoding = encoding
+        self.topics: Set[str] = {ALL}
+        self.explicit_topics = False
+        self.max_queue = max(1, max_queue)
+        self.max_overflows = max(0, max_overflows)
+        self.overflows = 0
+        self.dropped = 0
+        self.closed = False
+        self._overflow_counted = False
+        self._queue: Deque[Frame] = deque()
+        self._wakeup = asyncio.Event()
+        self._on_close = on_close
+        self._writer: Optional[asyncio.Task] = None
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    def start(self) -> None:
+        if self._writer is None:
+            self._writer = asyncio.create_task(self._drain())
+
+    def enqueue(self, frame: Frame) -> bool:
+        """Queue a pre-encoded frame; return False if the client was disconnected."""
+
+        if self.closed:
+            return False
+        if len(self._queue) >= self.max_queue:
+            self._queue.popleft()
+            self.dropped += 1
+            WS_FRAMES_DROPPED.inc()
+            # Не больше одного переполнения за проход event loop: при синхронной пачке
+            # рассылок writer не мог разгрузить очередь, клиент в этом не виноват
+            if not self._overflow_counted:
+                self._overflow_counted = True
+                asyncio.get_running_loop().call_soon(self._end_overflow_tick)
+                self.overflows += 1
+                if self.max_overflows and self.overflows >= self.max_overflows:
+                    logger.warning(
+                        "WS client overflowed %d times (dropped %d frames); disconnecting",
+                        self.overflows,
+                        self.dropped,
+                    )
+                    WS_CLIENTS_DISCONNECTED.labels(reason="overflow").inc()
+                    self._close()
+                    return False
+        self._queue.append(frame)
+        self._wakeup.set()
+        return True
+
+    def _end_overflow_tick(self) -> None:
+        self._overflow_counted = False
+
+    def enqueue_batch(self, frames: List[Frame]) -> None:
+        """Queue the on-connect state batch, bypassing the overflow policy."""
+
+        if self.closed or not frames:
+            return
+        self._queue.extend(frames)
+        self._wakeup.set()
+
+    async def _drain(self) -> None:
+        try:
+            while not self.closed:
+                await self._wakeup.wait()
+                self._wakeup.clear()
+                while self._queue and not self.closed:
+                    # Кодирование кэшируется во Frame: один раз на формат, а не на клиента
+                    data = self._queue.popleft().encode(self.encoding)
+                    if isinstance(data, bytes):
+                        await self.ws.send_bytes(data)
+                    else:
+                        await self.ws.send_text(data)
+                # Очередь опустошена — клиент успевает, сбрасываем счётчик переполнений
+                self.overflows = 0
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            WS_CLIENTS_DISCONNECTED.labels(reason="send_error").inc()
+            self._close()
+
+    def _close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        self._queue.clear()
+        self._wakeup.set()
+        if self._on_close is not None:
+            self._on_close(self)
+        if self._writer is not None and self._writer is not asyncio.current_task():
+            self._writer.cancel()
+        asyncio.create_task(self._close_socket())
+
+    async def _close_socket(self) -> None:
+        try:
+            await self.ws.close()
+        except Exception:
+            pass
+
+    async def stop(self) -> None:
+        self.closed = True
+        self._queue.clear()
+        writer = self._writer
+        if writer is not None and writer is not asyncio.current_task():
+            writer.cancel()
+            await asyncio.gather(writer, return_exceptions=True)
+
+
+class Hub:
+    def __init__(
+        self,
+        *,
+        max_queue: int = 256,
+        max_overflows: int = 20,
+        snapshots: Optional[SnapshotCache] = None,
+    ):
+        self.max_queue = max_queue
+        self.max_overflows = max_overflows
+        self.snapshots = snapshots or SnapshotCache()
+        self._sessions: Dict[WebSocket, ClientSession] = {}
+        self._by_rate: Dict[float, Set[ClientSession]] = {}
+        self._relays: List = []
+        self._by_topic: Dict[str, Set] = {}
+
+    @property
+    def clients(self):
+        return self._sessions.keys()
+
+    def sessions(self):
+        return list(self._sessions.values())
+
+    def price_rates(self) -> Set[float]:
+        return set(self._by_rate)
+
+    async def add(
+        self,
+        ws: WebSocket,
+        *,
+        price_rate_hz: Optional[float] = None,
+        encoding: str = ENCODING_JSON,
+        topics: Optional[Iterable[str]] = None,
+    ) -> ClientSession:
+        session = ClientSession(
+            ws,
+            max_queue=self.max_queue,
+            max_overflows=self.max_overflows,
+            price_rate_hz=price_rate_hz,
+            encoding=encoding,
+            on_close=self._forget,
+        )
+        self._sessions[ws] = session
+        if price_rate_hz is not None:
+            self._by_rate.setdefault(price_rate_hz, set()).add(session)
+        if topics:
+            session.topics = set(topics)
+            session.explicit_topics = True
+        for topic in session.topics:
+            self._by_topic.setdefault(topic, set()).add(session)
+        # Состояние на момент подключения уходит первой пачкой, до живых событий
+        session.enqueue_batch(self._snapshot_for(session.topics))
+        session.start()
+        return session
+
+    async def remove(self, ws: WebSocket) -> None:
+        session = self._sessions.get(ws)
+        if session is not None:
+            self._forget(session)
+            await session.stop()
+
+    def _forget(self, session: ClientSession) -> None:
+        if self._sessions.get(session.ws) is session:
+            del self._sessions[session.ws]
+        self._unindex(session, session.topics)
+        group = self._by_rate.get(session.price_rate_hz) if session.price_rate_hz is not None else None
+        if group is not None:
+            group.discard(session)
+            if not group:
+                del self._by_rate[session.price_rate_hz]
+
+    def _unindex(self, member, topics: Iterable[str]) -> None:
+        for topic in topics:
+            group = self._by_topic.get(topic)
+            if group is not None:
+                group.discard(member)
+                if not group:
+                    del self._by_topic[topic]
+
+    @staticmethod
+    def _matches(topics: Set[str], frame_topics: Tuple[str, ...]) -> bool:
+        return not frame_topics or ALL in topics or not topics.isdisjoint(frame_topics)
+
+    def _snapshot_for(self, topics: Set[str], *, exclude: Optional[Set[str]] = None) -> List[Frame]:
+        """Cached state frames matching `topics` (and not already matching `exclude`)."""
+
+        batch = []
+        for frame in self.snapshots.frames():
+            frame_topics = message_topics(frame.message)
+            if not self._matches(topics, frame_topics):
+                continue
+            if exclude is not None and self._matches(exclude, frame_topics):
+                continue
+            batch.append(frame)
+        return batch
+
+    def subscribe(self, ws: WebSocket, topics: Iterable[str]) -> Set[str]:
+        session = self._sessions.get(ws)
+        if session is None:
+            return set()
+        topics = set(topics)
+        previous = set(session.topics)
+        if not session.explicit_topics:
+            # Первый явный subscribe заменяет подписку по умолчанию (`*`)
+            self._unindex(session, session.topics)
+            session.topics = set()
+            session.explicit_topics = True
+        session.topics |= topics
+        for topic in session.topics:
+            self._by_topic.setdefault(topic, set()).add(session)
+        session.enqueue_batch(self._snapshot_for(session.topics, exclude=previous))
+        return session.topics
+
+    def unsubscribe(self, ws: WebSocket, topics: Iterable[str]) -> Set[str]:
+        session = self._sessions.get(ws)
+        if session is None:
+            return set()
+        topics = set(topics) & session.topics
+        session.topics -= topics
+        session.explicit_topics = True
+        self._unindex(session, topics)
+        return session.topics
+
+    def add_relay(self, relay) -> None:
+        self._relays.append(relay)
+        self._by_rate.setdefault(relay.price_rate_hz, set()).add(relay)
+        self._by_topic.setdefault(ALL, set()).add(relay)
+
+    def remove_relay(self, relay) -> None:
+        if relay in self._relays:
+            self._relays.remove(relay)
+        self._unindex(relay, (ALL,))
+        group = self._by_rate.get(relay.price_rate_hz)
+        if group is not None:
+            group.discard(relay)
+            if not group:
+                del self._by_rate[relay.price_rate_hz]
+
+    def send(self, ws: WebSocket, frame: Frame) -> bool:
+        """Enqueue a frame for a single client (e.g. a resync reply)."""
+
+        session = self._sessions.get(ws)
+        if session is None:
+            return False
+        return session.enqueue(frame)
+
+    def broadcast_frame(self, frame: Frame, *, price_rate_hz: Optional[float] = None) -> None:
+        """Enqueue a frame to everyone or to one price-rate group."""
+
+        started = time.perf_counter()
+        audience = self._audience(message_topics(frame.message))
+        if price_rate_hz is None:
+            if audience is None:
+                targets = list(self._sessions.values())
+                targets.extend(self._relays)
+            else:
+                targets = list(audience)
+        else:
+            group = self._by_rate.get(price_rate_hz, set())
+            targets = list(group if audience is None else group & audience)
+        if not targets:
+            return
+        for session in targets:
+            session.enqueue(frame)
+        kind = frame.message.get("type", "unknown") if frame.message is not None else "raw"
+        WS_BROADCAST_SECONDS.labels(kind=kind).observe(time.perf_counter() - started)
+
+    def _audience(self, topics: Tuple[str, ...]) -> Optional[Set]:
+        """Subscribers of any of `topics`; `None` when every member receives the frame."""
+
+        everyone = self._by_topic.get(ALL, ())
+        if not topics or len(everyone) == len(self._sessions) + len(self._relays):
+            return None
+        audience = set(everyone)
+        for topic in topics:
+            audience.update(self._by_topic.get(topic, ()))
+        return audience
+
+    async def broadcast(self, message: dict) -> None:
+        frame = Frame(message)
+        self.snapshots.record(message, frame)
+        if self._sessions or self._relays:
+            self.broadcast_frame(frame)
@@ -0,0 +1,143 @@
+"""Sliding-window ledger of Binance Futures income records (`/fapi/v1/income`).
+
+Назначение:
+        - Точный pnl24h без перевыкачки суток каждую минуту: при старте `IncomeLedger`
+            постранично (по `startTime`) загружает всё окно, дальше запрашивает только
+            записи новее курсора — обычно один маленький запрос за цикл. Лимит ответа
+            (1000 записей) больше не обрезает историю активных аккаунтов.
+        - Записи старше окна вытесняются из упорядоченной по времени очереди, суммы по
+            `incomeType` поддерживаются инкрементально.
+
+Контракт:
+        - `IncomeLedger(window_sec=86_400, symbol=None, page_limit=1000, max_pages=100)`.
+        - `await ledger.sync(client, now=None)` → число новых записей; `client` — объект с
+            `get_income_history(symbol=, start_time=, end_time=, limit=, max_age=)`
+            (`BinanceFuturesRestClient`). Ошибки запроса пробрасываются; уже полученные
+            страницы остаются в ледджере, следующий `sync` продолжит с курсора.
+        - `ledger.total(types=None)` — сумма `income` в окне по указанным типам (`None` —
+            по всем); `ledger.totals()` → `{incomeType: сумма}`; `len(ledger)` — записей в окне.
+            Записи без `incomeType` учитываются под типом `""`.
+
+Ограничения/Политики:
+        - Пагинация по времени: следующая страница начинается с времени последней записи
+            включительно, записи на границе дедуплицируются по (`tranId`, `incomeType`,
+            `asset`, `time`). Если больше `page_limit` записей пришлось на одну миллисекунду,
+            остаток этой миллисекунды пропускается с предупреждением в логе.
+        - `max_pages` ограничивает догрузку за один `sync` (долгий простой); недогруженное
+            подтянется следующими вызовами.
+        - Суммы поддерживаются сложением/вычитанием; при опустевшем окне обнуляются.
+
+ENV/Файлы состояния:
+        - Не читает окружение; состояние только в памяти (после рестарта окно
+            загружается заново).
+
+Интеграции:
+        - `backend.binance_client.BinanceFuturesRestClient.get_income_history`,
+            `backend.main.account_polling_loop` (pnl24h).
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from collections import deque
+from typing import Deque, Dict, Iterable, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+_Key = Tuple[object, str, str, int]
+
+
+class IncomeLedger:
+    def __init__(
+        self,
+        *,
+        window_sec: float = 86_400,
+        symbol: Optional[str] = None,
+        page_limit: int = 1000,
+        max_pages: int = 100,
+    ) -> None:
+        self.window_ms = int(window_sec * 1000)
+        self.symbol = symbol
+        self.page_limit = page_limit
+        self.max_pages = max_pages
+        self._records: Deque[Tuple[int, str, float]] = deque()
+        self._totals: Dict[str, float] = {}
+        self._cursor: Optional[int] = None
+        self._boundary: Set[_Key] = set()
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    @staticmethod
+    def _parse(record: dict) -> Optional[Tuple[int, str, float, _Key]]:
+        try:
+            ts = int(record.get("time") or record.get("updateTime"))
+            amount = float(record.get("income") or 0.0)
+        except (TypeError, ValueError):
+            return None
+        income_type = (record.get("incomeType") or "").upper()
+        key = (record.get("tranId"), income_type, record.get("asset") or "", ts)
+        return ts, income_type, amount, key
+
+    def _absorb(self, records: Iterable[dict]) -> int:
+        added = 0
+        parsed = [p for p in map(self._parse, records) if p is not None]
+        parsed.sort(key=lambda p: p[0])
+        for ts, income_type, amount, key in parsed:
+            if self._cursor is not None:
+                if ts < self._cursor or (ts == self._cursor and key in self._boundary):
+                    continue
+            if self._cursor is None or ts > self._cursor:
+                self._cursor = ts
+                self._boundary = set()
+            self._boundary.add(key)
+            self._records.append((ts, income_type, amount))
+            self._totals[income_type] = self._totals.get(income_type, 0.0) + amount
+            added += 1
+        return added
+
+    def _expire(self, now_ms: int) -> None:
+        cutoff = now_ms - self.window_ms
+        records = self._records
+        while records and records[0][0] < cutoff:
+            _, income_type, amount = records.popleft()
+            self._totals[income_type] -= amount
+        if not records:
+            self._totals = {}
+
+    async def sync(self, client, now: Optional[float] = None) -> int:
+        now_ms = int((time.time() if now is None else now) * 1000)
+        window_start = now_ms - self.window_ms
+        start = window_start if self._cursor is None else max(self._cursor, window_start)
+        added = 0
+        for _ in range(self.max_pages):
+            page = await client.get_income_history(
+                symbol=self.symbol,
+                start_time=start,
+                end_time=now_ms,
+                limit=self.page_limit,
+                max_age=0,
+            )
+            fresh = self._absorb(page)
+            added += fresh
+            if len(page) < self.page_limit:
+                break
+            next_start = self._cursor if self._cursor is not None else start
+            if next_start == start and not fresh:
+                # Целая страница в одной миллисекунде — дальше по времени не продвинуться
+                logger.warning("More than %d income records at %d ms; skipping the rest", self.page_limit, start)
+                next_start = start + 1
+                self._cursor = next_start
+                self._boundary = set()
+            start = next_start
+        self._expire(now_ms)
+        return added
+
+    def totals(self) -> Dict[str, float]:
+        return dict(self._totals)
+
+    def total(self, types: Optional[Iterable[str]] = None) -> float:
+        if types is None:
+            return sum(self._totals.values())
+        return sum(self._totals.get(income_type, 0.0) for income_type in types)
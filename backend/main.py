@@ -2,21 +2,75 @@
 
 Назначение:
         - WebSocket `/ws`: публикует live события `price_update`, `heartbeat`,
-            `account_snapshot`, `metrics_snapshot`, `ticker_snapshot`, `position_update`,
-                        `trade_executed`, `trades_snapshot`, `equity_snapshot` (содержит баланс и unrealized PnL, а цена — bid/ask).
+            `state_snapshot`/`state_delta` (аккаунт и позиции), `metrics_snapshot`,
+            `ticker_snapshot`, `trade_executed`, `trades_snapshot`, `equity_snapshot` (содержит баланс и
+            unrealized PnL, а цена — bid/ask), `equity_history` (окно equity при подключении).
+        - Формат фреймов согласуется на соединение: JSON (default) или MessagePack
+            (`/ws?encoding=msgpack` либо subprotocol `msgpack`); каждое сообщение
+            кодируется один раз на формат.
+        - Аккаунт и позиции рассылаются дельтами (`backend.deltas`): только изменившиеся
+            поля, закрытые позиции — id в `closed`; `state_delta.seq` растёт на 1 в
+            пределах `epoch` (id ingest-процесса), при разрыве или смене `epoch` клиент
+            шлёт `{"op": "resync"}` и получает `state_snapshot`.
+            `equity_snapshot` — только при изменении equity либо раз в
+            `EQUITY_SNAPSHOT_KEEPALIVE_SEC`.
+        - Новый клиент сразу после accept получает одной пачкой последнее состояние:
+            аккаунт, позиции, окно equity, метрики, тикеры, последние сделки и цены.
+        - Подписки по темам (`backend.topics`): `/ws?topics=price:BTCUSDT,metrics` или
+            сообщения `{"op": "subscribe"|"unsubscribe", "topics": [...]}`; ответ —
+            `{"type": "subscriptions", "topics": [...], "invalid": [...]}`. Без подписки
+            клиент получает всё (`*`).
+        - Тикеры 24h берутся из all-market стрима `!ticker@arr` (таблица `backend.tickers`);
+            bulk REST `/fapi/v1/ticker/24hr` без `symbol` — fallback, если стрим молчит.
         - REST-фоны: периодически опрашивают Binance Futures API для расчёта equity,
-            метрик (win-rate, sharpe, profit factor по последним сделкам, нормализованных
-            относительно базового equity при запуске), тикеров, позиций и pnl24h (по
-            `/fapi/v1/income` за последние 24 часа).
+            метрик (win-rate, sharpe, profit factor инкрементально через
+            `MetricsAccumulator`, нормализованных относительно базового equity), тикеров,
+            позиций и pnl24h (скользящее окно `/fapi/v1/income` за 24 часа,
+            `backend.income_ledger`: сутки догружаются постранично при старте, дальше раз в
+            `INCOME_POLL_SEC` запрашиваются только новые записи; суммы по `incomeType` — в
+            `/health.income24h`).
+        - `metrics_snapshot.metrics.windows` — win rate, realized PnL, profit factor и max
+            drawdown по окнам `1h`/`24h`/`7d`/`30d` (`WindowedMetrics`, инкрементально);
+            снапшот метрик публикуется раз в `METRICS_PUBLISH_SEC`, если что-то изменилось.
+        - Опционально (`BINANCE_USER_STREAM=true`) аккаунт и позиции обновляются из
+            Futures User Data Stream, REST — только снапшот и периодическая сверка.
+        - Базовый equity и точки equity пишутся в append-only лог с записями фиксированной
+            ширины (`backend.equity_log`); при старте baseline, тиры `/equity` и окно
+            `equity_history` восстанавливаются из него, поэтому `totalPnL` не перебазируется
+            после рестарта.
+        - `GET /metrics` — метрики в текстовом формате Prometheus (`backend.telemetry`):
+            время fan-out хаба, латентность/вес REST по эндпоинтам, длительность итераций
+            поллеров, переподключения стримов, глубина очередей клиентов, возраст
+            последнего bookTicker.
+        - `GET /equity?range=72H&points=500` — история equity из кольцевых буферов в памяти
+            (`backend.equity`: сырые точки, 1m и 15m тиры), сжатая LTTB до `points` точек.
+        - `GET /analytics?range=90D` — метрики по всей истории сделок из хранилища
+            (`backend.analytics`, NumPy): метрики `metrics_snapshot` плюс Sortino, Calmar,
+            expectancy и разбивка по символам; 503 без NumPy или без ключей API.
+        - Все REST-циклы делят один `BinanceFuturesRestClient` поверх общего пула
+            соединений (`backend.rest_pool`): прогрев при старте, HTTP/2 при наличии `h2`,
+            утилизация пула и ожидание соединения — в `/health` (`rest_pool`).
+            Одинаковые параллельные GET объединяются в один запрос, ответы кэшируются на
+            короткий TTL эндпоинта (`/health` → `rest_cache`).
+        - Сделки синхронизируются в локальное SQLite-хранилище (`backend.trade_store`)
+            по курсору `fromId` (страницами до догоняния, с адаптивным интервалом опроса);
+            метрики и `trades_snapshot` читаются из него. `trades_snapshot` строится из
+            хранилища до первой синхронизации, поэтому сделки, догруженные после рестарта,
+            рассылаются как `trade_executed`; если за опрос пришло больше 50 сделок
+            (долгий простой), вместо них уходит один обновлённый `trades_snapshot`. Общие метрики — по последним
+            `METRICS_HISTORY_TRADES` сделкам, а не по всей истории хранилища.
 
 Контракт:
     - WS сообщения соответствуют типам, описанным в `frontend/src/types/index.ts`.
-    - Периодичность: `price_update` до 60/s; `heartbeat` каждые 5s; прочие
-      снапшоты — 5–10s.
+    - Периодичность: `price_update` — конфлейтированные последние котировки по символу
+      с частотой `PRICE_RATE_HZ` (или `/ws?rate=<hz>` для соединения, не выше
+      `PRICE_MAX_RATE_HZ`); `heartbeat` каждые 5s; прочие снапшоты — 5–10s.
     - Ошибки: при сетевых сбоях перезапускаем фоновые задачи и логируем.
 
 CLI/Примеры:
     `BINANCE_SYMBOL=BTCUSDT uvicorn backend.main:app --reload --host 0.0.0.0 --port 8000`
+    `BACKEND_ROLE=ingest uvicorn backend.main:app --port 8001` и
+    `BACKEND_ROLE=fanout uvicorn backend.main:app --port 8000 --workers 4`
 
 Ограничения/Политики:
     - Live-only: реальные данные Binance Futures (или testnet при `BINANCE_TESTNET=true`).
@@ -26,11 +80,63 @@ CLI/Примеры:
 
 ENV/Файлы состояния:
     - `BINANCE_SYMBOL` — пара Binance Futures (default `BTCUSDT`).
+    - `BINANCE_SYMBOLS` — дополнительные пары для `price_update` через запятую; символы
+      открытых позиций добавляются к подписке автоматически.
     - `BINANCE_API_KEY` / `BINANCE_API_SECRET` — для подписанных запросов.
     - `BINANCE_TESTNET` — переключение на тестовую среду.
+    - `BINANCE_USER_STREAM` — `true` включает режим User Data Stream (listenKey):
+      `ACCOUNT_UPDATE`/`ORDER_TRADE_UPDATE` применяются к модели аккаунта в памяти и
+      сразу рассылаются; REST `/fapi/v2/account` + `positionRisk` — только начальный
+      снапшот и сверка раз в `USER_STREAM_RECONCILE_SEC` (default 300).
+    - `BINANCE_REST_URL` / `BINANCE_WS_URL` — переопределение базовых URL (например,
+      локальный fake-сервер для тестов).
+    - `TICKER_STREAM_MAX_AGE` — сколько секунд без обновлений стрима тикеров допустимо
+      до bulk REST fallback (default 30).
+    - `DATABASE_URL` (`Settings.database_url`, default `sqlite:///./binance_adviser.db`) —
+      локальное хранилище сделок.
+    - `WS_CLIENT_QUEUE_SIZE` — размер исходящей очереди каждого WS-клиента (default 256).
+    - `WS_CLIENT_MAX_OVERFLOWS` — переполнений подряд до отключения клиента
+      (default 20; `0` — только drop-oldest без отключения).
+    - `WS_SNAPSHOT_TRADES` / `WS_SNAPSHOT_EQUITY_POINTS` — размер кэша сделок и окна
+      equity, отправляемых при подключении (default 100 / 720).
+    - `PRICE_RATE_HZ` — частота flush `price_update` по умолчанию (default 20 Гц).
+    - `PRICE_MAX_RATE_HZ` — верхняя граница частоты, запрашиваемой клиентом (default 60 Гц).
+    - `REST_POOL_MAX_CONNECTIONS` / `REST_POOL_MAX_KEEPALIVE` — размер общего пула
+      REST-соединений (default 10 / 10); `REST_HTTP2` — `auto` (HTTP/2, если установлен
+      `h2`), `true` или `false`; `REST_WARMUP_CONNECTIONS` — сколько соединений открыть
+      при старте (default 2, `0` — без прогрева; при HTTP/2 открывается одно).
+    - `PRICE_SOURCE` — источник котировок: `binance` (default) или `synthetic`
+      (`backend.synthetic`, случайное блуждание с частотой `SYNTHETIC_RATE_HZ` на символ,
+      default 100) — для бенчмарка `benchmarks/fanout.py` и работы без сети; либо `replay`
+      (`backend.replay`, воспроизведение записи `REPLAY_PATH` со скоростью `REPLAY_SPEED`:
+      `1` — реальный темп, `N` — ускорение, `max` — без пауз; `REPLAY_LOOP=true` — по кругу).
+    - `RECORD_STREAMS_PATH` — если задан, сырые фреймы `bookTicker` и `!ticker@arr`
+      дописываются в этот gzip-файл для последующего replay.
+    - `EQUITY_LOG_PATH` — файл лога equity и baseline (default `./equity_history.bin`;
+      пустое значение отключает персистентность).
+    - `EQUITY_RAW_POINTS` — ёмкость сырого тира equity (default 4320 точек; 1m тир —
+      72 часа, 15m — 30 дней).
+    - `EQUITY_SNAPSHOT_KEEPALIVE_SEC` — как часто слать неизменившуюся точку equity
+      (default 60).
+    - `METRICS_HISTORY_TRADES` — по скольким последним сделкам считаются общие метрики
+      `metrics_snapshot` (win rate, Sharpe, max drawdown, profit factor; default 500, как
+      раньше `userTrades?limit=500`); окна `metrics.windows` — по своему периоду времени.
+    - `METRICS_PUBLISH_SEC` — период публикации `metrics_snapshot` с окнами (default 1).
+    - `INCOME_POLL_SEC` — период инкрементального опроса `/fapi/v1/income` для pnl24h (default 60;
+      запрос весит 30 независимо от размера страницы).
+    - `TRADES_POLL_MIN_SEC` / `TRADES_POLL_MAX_SEC` — границы адаптивного интервала опроса
+      `userTrades` (default 1 / 10): минимум, пока приходят сделки, в простое интервал
+      удваивается до максимума.
+    - `BACKEND_ROLE` — `all` (default, один процесс), `ingest` (соединения с Binance,
+      поллеры, лог equity; публикует сообщения хаба в шину) или `fanout` (без соединений с
+      биржей: подписка на шину и обслуживание `/ws`, можно `uvicorn --workers N`).
+      `BUS_SOCKET_PATH` — Unix-сокет шины (default `/tmp/backend-bus.sock`), см. `backend.bus`.
 
 Интеграции:
     - `BinanceBookTickerClient` и `BinanceFuturesRestClient` из `backend.binance_client`.
+    - `Hub` из `backend.hub`: per-client очереди и writer-задачи для рассылки.
+    - `PriceConflator` из `backend.conflation`: последняя котировка по символу, flush по частоте.
+    - `BusPublisher` / `BusSubscriber` из `backend.bus`: шина ingest → fan-out воркеры.
     - `python-dotenv` подхватывает `.env` до чтения переменных окружения.
     - async фоновые таски: ценовой стрим, heartbeat, REST-полы.
 """
@@ -38,19 +144,40 @@ ENV/Файлы состояния:
 from __future__ import annotations
 
 import asyncio
-import json
 import logging
 import os
 import time
+from collections import deque
 from datetime import datetime, timezone
-from typing import Optional, Set
+from typing import Deque, List, Optional, Set, Tuple
 
 from dotenv import load_dotenv, find_dotenv
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-
-from .binance_client import BinanceBookTickerClient, BinanceFuturesRestClient
-from .metrics import compute_metrics
+from fastapi.responses import PlainTextResponse
+
+from config.settings import settings
+
+from .binance_client import BinanceBookTickerClient, BinanceFuturesRestClient, BinanceTickerArrayClient
+from .conflation import PriceConflator
+from .deltas import StateTracker
+from .encoding import Frame, decode_client_message, negotiate_encoding
+from .analytics import TradeColumns, available as analytics_available, compute_analytics
+from .equity import EquitySeries, parse_range
+from .equity_log import EquityLog
+from .hub import Hub
+from .income_ledger import IncomeLedger
+from .topics import normalize_topic
+from .rest_pool import RestClientPool
+from .metrics import DEFAULT_WINDOWS, MetricsAccumulator, WindowedMetrics
+from .snapshots import SnapshotCache
+from .bus import BUS_SYNCED, EQUITY_POINT, BusPublisher, BusSubscriber, relay_to_hub
+from .replay import FrameRecorder, ReplayPriceSource
+from .synthetic import SyntheticPriceSource
+from .telemetry import POLLER_ITERATION_SECONDS, REGISTRY, Gauge
+from .tickers import TickerTable
+from .trade_store import AdaptivePollInterval, TradeStore, _trade_id, sync_trades
+from .user_stream import AccountState, BinanceUserDataStream
 
 # Robustly load .env from current working directory or project root
 _dotenv_path = find_dotenv(usecwd=True)
@@ -73,41 +200,88 @@ app.add_middleware(
 logger = logging.getLogger(__name__)
 
 
-class Hub:
-    def __init__(self):
-        self.clients: Set[WebSocket] = set()
-        self._lock = asyncio.Lock()
-
-    async def add(self, ws: WebSocket):
-        async with self._lock:
-            self.clients.add(ws)
+WS_CLIENT_QUEUE_SIZE = int(os.getenv("WS_CLIENT_QUEUE_SIZE", "256"))
+WS_CLIENT_MAX_OVERFLOWS = int(os.getenv("WS_CLIENT_MAX_OVERFLOWS", "20"))
 
-    async def remove(self, ws: WebSocket):
-        async with self._lock:
-            self.clients.discard(ws)
-
-    async def broadcast(self, message: dict):
-        data = json.dumps(message)
-        async with self._lock:
-            to_remove = []
-            for ws in self.clients:
-                try:
-                    await ws.send_text(data)
-                except Exception:
-                    to_remove.append(ws)
-            for ws in to_remove:
-                self.clients.discard(ws)
+PRICE_RATE_HZ = float(os.getenv("PRICE_RATE_HZ", "20"))
+PRICE_MAX_RATE_HZ = float(os.getenv("PRICE_MAX_RATE_HZ", "60"))
 
+WS_SNAPSHOT_TRADES = int(os.getenv("WS_SNAPSHOT_TRADES", "100"))
+WS_SNAPSHOT_EQUITY_POINTS = int(os.getenv("WS_SNAPSHOT_EQUITY_POINTS", "720"))
 
-hub = Hub()
+hub = Hub(
+    max_queue=WS_CLIENT_QUEUE_SIZE,
+    max_overflows=WS_CLIENT_MAX_OVERFLOWS,
+    snapshots=SnapshotCache(max_trades=WS_SNAPSHOT_TRADES, max_equity_points=WS_SNAPSHOT_EQUITY_POINTS),
+)
+conflator = PriceConflator(hub, default_rate_hz=PRICE_RATE_HZ, max_rate_hz=PRICE_MAX_RATE_HZ)
 STREAM_SYMBOL = os.getenv("BINANCE_SYMBOL", "BTCUSDT").upper()
+STREAM_SYMBOLS = {
+    s.strip().upper()
+    for s in os.getenv("BINANCE_SYMBOLS", "").split(",")
+    if s.strip()
+} | {STREAM_SYMBOL}
+PRICE_SOURCE = os.getenv("PRICE_SOURCE", "binance").lower()
+SYNTHETIC_RATE_HZ = float(os.getenv("SYNTHETIC_RATE_HZ", "100"))
+REPLAY_PATH = os.getenv("REPLAY_PATH", "")
+_replay_speed = os.getenv("REPLAY_SPEED", "1").lower()
+REPLAY_SPEED = 0.0 if _replay_speed == "max" else float(_replay_speed)
+REPLAY_LOOP = os.getenv("REPLAY_LOOP", "false").lower() == "true"
+RECORD_STREAMS_PATH = os.getenv("RECORD_STREAMS_PATH", "")
+BACKEND_ROLE = os.getenv("BACKEND_ROLE", "all").lower()
+BUS_SOCKET_PATH = os.getenv("BUS_SOCKET_PATH", "/tmp/backend-bus.sock")
+bus_publisher: Optional[BusPublisher] = None
+bus_subscriber: Optional[BusSubscriber] = None
 API_KEY = os.getenv("BINANCE_API_KEY")
 API_SECRET = os.getenv("BINANCE_API_SECRET")
 USE_TESTNET = os.getenv("BINANCE_TESTNET", "false").lower() == "true"
 
 
+USE_USER_STREAM = os.getenv("BINANCE_USER_STREAM", "false").lower() == "true"
+USER_STREAM_RECONCILE_SEC = float(os.getenv("USER_STREAM_RECONCILE_SEC", "300"))
+REST_BASE_URL = os.getenv("BINANCE_REST_URL") or None
+USER_STREAM_WS_URL = os.getenv("BINANCE_WS_URL") or (
+    "wss://stream.binancefuture.com" if USE_TESTNET else "wss://fstream.binance.com"
+)
+
+
+REST_POOL_MAX_CONNECTIONS = int(os.getenv("REST_POOL_MAX_CONNECTIONS", "10"))
+REST_POOL_MAX_KEEPALIVE = int(os.getenv("REST_POOL_MAX_KEEPALIVE", "10"))
+REST_WARMUP_CONNECTIONS = int(os.getenv("REST_WARMUP_CONNECTIONS", "2"))
+_rest_http2_raw = os.getenv("REST_HTTP2", "auto").lower()
+REST_HTTP2: Optional[bool] = None if _rest_http2_raw == "auto" else _rest_http2_raw == "true"
+rest_client: Optional[BinanceFuturesRestClient] = None
+
+
 BASELINE_EQUITY: Optional[float] = None
+PNL_24H: float = 0.0
+metrics_windows = WindowedMetrics()
+METRICS_HISTORY_TRADES = int(os.getenv("METRICS_HISTORY_TRADES", "500"))
+metrics_engine = MetricsAccumulator(max_samples=METRICS_HISTORY_TRADES, windows=metrics_windows)
+METRICS_PUBLISH_SEC = float(os.getenv("METRICS_PUBLISH_SEC", "1"))
+_metrics_base: Optional[dict] = None
+state_tracker = StateTracker()
+EQUITY_SNAPSHOT_KEEPALIVE_SEC = float(os.getenv("EQUITY_SNAPSHOT_KEEPALIVE_SEC", "60"))
+_last_equity_point: Optional[Tuple[float, float, float]] = None
+EQUITY_RAW_POINTS = int(os.getenv("EQUITY_RAW_POINTS", "4320"))
+EQUITY_MAX_QUERY_POINTS = 5_000
+equity_series = EquitySeries(raw_points=EQUITY_RAW_POINTS)
+EQUITY_LOG_PATH = os.getenv("EQUITY_LOG_PATH", "./equity_history.bin")
+equity_log: Optional[EquityLog] = None
+_last_equity_ts = 0.0
+trade_store: Optional[TradeStore] = None
+ticker_table = TickerTable()
+TICKER_STREAM_MAX_AGE = float(os.getenv("TICKER_STREAM_MAX_AGE", "30"))
+account_state: Optional[AccountState] = AccountState() if USE_USER_STREAM else None
+_emitted_trade_order: Deque[Tuple[str, int]] = deque(maxlen=2_000)
+_emitted_trade_keys: Set[Tuple[str, int]] = set()
 INCOME_TYPES_24H = {"REALIZED_PNL", "FUNDING_FEE", "COMMISSION", "INSURANCE_CLEAR"}
+INCOME_POLL_SEC = float(os.getenv("INCOME_POLL_SEC", "60"))
+income_ledger: Optional[IncomeLedger] = None
+TRADES_POLL_MIN_SEC = float(os.getenv("TRADES_POLL_MIN_SEC", "1"))
+TRADES_POLL_MAX_SEC = float(os.getenv("TRADES_POLL_MAX_SEC", "10"))
+# Больше новых сделок за опрос — рассылаются обновлённым trades_snapshot вместо trade_executed
+TRADE_EMIT_BATCH_MAX = 50
 
 
 def _to_float(value, default: float = 0.0) -> float:
@@ -118,9 +292,20 @@ def _to_float(value, default: float = 0.0) -> float:
 
 
 def _rest_client_factory() -> Optional[BinanceFuturesRestClient]:
+    """Return the process-wide REST client (one pool, one limiter for every poller)."""
+
+    global rest_client
     if not API_KEY or not API_SECRET:
         return None
-    return BinanceFuturesRestClient(API_KEY, API_SECRET, testnet=USE_TESTNET)
+    if rest_client is None:
+        pool = RestClientPool(
+            REST_BASE_URL or ("https://testnet.binancefuture.com" if USE_TESTNET else "https://fapi.binance.com"),
+            max_connections=REST_POOL_MAX_CONNECTIONS,
+            max_keepalive=REST_POOL_MAX_KEEPALIVE,
+            http2=REST_HTTP2,
+        )
+        rest_client = BinanceFuturesRestClient(API_KEY, API_SECRET, testnet=USE_TESTNET, pool=pool)
+    return rest_client
 
 
 def _normalize_symbol(raw: str) -> str:
@@ -167,26 +352,185 @@ def _format_trade(symbol: str, trade: dict) -> dict:
     return payload
 
 
-async def binance_pump(symbol: str):
-    client = BinanceBookTickerClient(symbol)
+async def _emit_trade(symbol: str, trade: dict) -> None:
+    """Broadcast `trade_executed` once per fill, whichever source reports it first."""
+
+    try:
+        payload = _format_trade(symbol, trade)
+    except ValueError:
+        return
+    if _remember_trade(symbol, payload["id"]):
+        await hub.broadcast({"type": "trade_executed", "trade": payload})
+
+
+def _remember_trade(symbol: str, trade_id: int) -> bool:
+    """Mark a fill as sent to clients; False if it already was."""
+
+    key = (symbol.upper(), trade_id)
+    if key in _emitted_trade_keys:
+        return False
+    if len(_emitted_trade_order) == _emitted_trade_order.maxlen:
+        _emitted_trade_keys.discard(_emitted_trade_order[0])
+    _emitted_trade_order.append(key)
+    _emitted_trade_keys.add(key)
+    return True
+
+
+price_client: Optional[BinanceBookTickerClient] = None
+stream_recorder: Optional[FrameRecorder] = None
+_last_price_event = 0.0
+
+
+def _watch_symbols(symbols: Set[str]) -> None:
+    """Extend the bookTicker subscription with symbols that have open positions."""
+
+    if price_client is not None and price_client.set_symbols(STREAM_SYMBOLS | symbols):
+        logger.info("bookTicker symbols updated: %s", ", ".join(sorted(STREAM_SYMBOLS | symbols)))
+
+
+async def binance_pump(symbols: Set[str]):
+    global price_client, _last_price_event
+    if PRICE_SOURCE == "synthetic":
+        # Бенчмарки и офлайн-отладка: без сети, частота SYNTHETIC_RATE_HZ на символ
+        client = SyntheticPriceSource(symbols, rate_hz=SYNTHETIC_RATE_HZ)
+    elif PRICE_SOURCE == "replay":
+        # Записанный рынок через тот же разбор и конвейер; тикеры из записи — в ticker_table
+        client = ReplayPriceSource(
+            REPLAY_PATH, speed=REPLAY_SPEED, loop=REPLAY_LOOP, ticker_sink=ticker_table.update_many
+        )
+    else:
+        client = BinanceBookTickerClient(symbols, recorder=stream_recorder)
+        price_client = client
     try:
         async for event in client.run():
-            payload = {
-                "type": "price_update",
-                "symbol": event["symbol"],
-                "price": event["price"],
-                "ts": event["ts"] // 1000,
-            }
-            if "bid" in event:
-                payload["bid"] = event["bid"]
-            if "ask" in event:
-                payload["ask"] = event["ask"]
-            await hub.broadcast(payload)
+            _last_price_event = time.monotonic()
+            # Конфлейтер хранит только последнюю котировку; рассылка идёт из conflator.run()
+            conflator.update(event)
+            if account_state is not None:
+                account_state.apply_price(event.symbol, event.price)
     except asyncio.CancelledError:
         await client.stop()
         raise
     finally:
         await client.stop()
+        price_client = None
+
+
+async def _publish_account(
+    account: dict,
+    positions: List[dict],
+    now: float,
+    symbol: str,
+) -> Tuple[float, float, float, Set[str]]:
+    """Broadcast account/position deltas and the equity point if anything changed.
+
+    Returns `(equity, wallet_balance, unrealized_total, positions_symbols)`.
+    """
+
+    positions_symbols = {symbol.upper()}
+
+    wallet_balance = _to_float(account.get("totalWalletBalance"))
+    available = _to_float(account.get("availableBalance"), _to_float(account.get("totalAvailableBalance")))
+    total_unrealized = _to_float(account.get("totalUnrealizedProfit"), _to_float(account.get("totalCrossUnPnl")))
+    initial_margin = _to_float(account.get("totalInitialMargin"))
+    margin_balance = _to_float(account.get("totalMarginBalance"), wallet_balance)
+
+    margin_ratio = (initial_margin / margin_balance * 100) if margin_balance else 0.0
+    leverage = (margin_balance / initial_margin) if initial_margin else 0.0
+
+    equity = wallet_balance + total_unrealized
+    global BASELINE_EQUITY
+    if BASELINE_EQUITY is None:
+        BASELINE_EQUITY = equity
+        if equity_log is not None:
+            equity_log.set_baseline(equity)
+
+    account_payload = {
+        "balance": wallet_balance,
+        "availableBalance": available,
+        "marginRatio": margin_ratio,
+        "leverage": leverage,
+        "pnl24h": PNL_24H,
+    }
+
+    unrealized_total = 0.0
+    open_symbols: Set[str] = set()
+    position_payloads: List[dict] = []
+    for pos in positions or []:
+        symbol_u = pos.get("symbol", "")
+        if not symbol_u:
+            continue
+        positions_symbols.add(symbol_u)
+        raw_qty = _to_float(pos.get("positionAmt"))
+        quantity = abs(raw_qty)
+        if quantity == 0:
+            # Плоские позиции не рассылаются; закрытие уходит в `closed` дельты
+            continue
+        mark_price = _to_float(pos.get("markPrice"), _to_float(pos.get("entryPrice")))
+        entry_price = _to_float(pos.get("entryPrice"))
+        unrealized_pnl = _to_float(pos.get("unRealizedProfit"))
+        unrealized_percent = _to_float(pos.get("marginRatio")) * 100
+        notional = mark_price * quantity
+
+        direction = 1 if raw_qty >= 0 else -1
+        if unrealized_percent == 0 and entry_price:
+            price_diff = (mark_price - entry_price) * direction
+            unrealized_percent = (price_diff / entry_price) * 100
+
+        position_payloads.append({
+            "id": f"{symbol_u}-{pos.get('positionSide', 'BOTH')}",
+            "symbol": _normalize_symbol(symbol_u),
+            "side": "LONG" if raw_qty >= 0 else "SHORT",
+            "entryPrice": entry_price,
+            "currentPrice": mark_price,
+            "quantity": quantity,
+            "unrealizedPnl": unrealized_pnl,
+            "unrealizedPnlPercent": unrealized_percent,
+            "notional": notional,
+        })
+        unrealized_total += unrealized_pnl
+        open_symbols.add(symbol_u)
+
+    _watch_symbols(open_symbols)
+
+    # Только изменившиеся поля; в установившемся режиме ничего не отправляется
+    delta = state_tracker.diff(account_payload, position_payloads, now)
+    if delta is not None:
+        await hub.broadcast(delta)
+
+    equity_series.add(now, equity, wallet_balance, unrealized_total)
+    if bus_publisher is not None:
+        # Воркеры ведут те же тиры /equity: каждая точка, а не только изменившийся equity_snapshot
+        bus_publisher.enqueue(Frame({
+            "type": EQUITY_POINT,
+            "time": now,
+            "equity": equity,
+            "balance": wallet_balance,
+            "unrealizedPnl": unrealized_total,
+        }))
+    if equity_log is not None:
+        equity_log.append(now, equity, wallet_balance, unrealized_total)
+
+    global _last_equity_point, _last_equity_ts
+    equity_point = (equity, wallet_balance, unrealized_total)
+    if equity_point != _last_equity_point or now - _last_equity_ts >= EQUITY_SNAPSHOT_KEEPALIVE_SEC:
+        _last_equity_point = equity_point
+        _last_equity_ts = now
+        await hub.broadcast({
+            "type": "equity_snapshot",
+            "time": int(now),
+            "equity": equity,
+            "balance": wallet_balance,
+            "unrealizedPnl": unrealized_total,
+        })
+    return equity, wallet_balance, unrealized_total, positions_symbols
+
+
+async def _end_iteration(loop: str, started: float, interval: float) -> None:
+    """Record how long the poller iteration took, then sleep until the next cycle."""
+
+    POLLER_ITERATION_SECONDS.labels(loop=loop).observe(time.perf_counter() - started)
+    await asyncio.sleep(interval)
 
 
 async def account_polling_loop(symbol: str, interval: float = 5.0):
@@ -195,250 +539,232 @@ async def account_polling_loop(symbol: str, interval: float = 5.0):
         logger.warning("Binance API credentials absent; account snapshots disabled")
         return
 
+    global PNL_24H, _metrics_base, income_ledger
+    income_ledger = IncomeLedger(window_sec=86_400, symbol=symbol.upper())
     last_metrics_ts = 0
     last_ticker_ts = 0
     last_income_ts = 0
-    cached_pnl24h = 0.0
+    last_reconcile_ts = 0.0
 
-    try:
-        while True:
-            now = time.time()
-            positions_symbols = {symbol.upper()}
-
-            # Account snapshot + positions
+    while True:
+        started = time.perf_counter()
+        now = time.time()
+
+        # Account snapshot + positions: REST каждый цикл либо, в режиме user data
+        # stream, только для начального снапшота и периодической сверки
+        if account_state is None or now - last_reconcile_ts >= USER_STREAM_RECONCILE_SEC:
+            # Сверка с user data stream должна видеть свежие данные, а не кэш
+            max_age = 0.0 if account_state is not None else None
             try:
-                account = await client.get_account_overview()
-                positions = await client.get_positions()
+                account = await client.get_account_overview(max_age=max_age)
+                positions = await client.get_positions(max_age=max_age)
             except Exception as exc:  # noqa: broad-except (логируем и продолжаем)
                 logger.warning("Account polling error: %s", exc)
-                await asyncio.sleep(interval)
+                await _end_iteration("account", started, interval)
                 continue
+            if account_state is not None:
+                account_state.load_snapshot(account, positions)
+                last_reconcile_ts = now
+        else:
+            account = account_state.account_overview()
+            positions = account_state.position_list()
+
+        if now - last_income_ts >= INCOME_POLL_SEC:
+            last_income_ts = now
+            try:
+                # Первый вызов загружает сутки постранично, дальше — только новые записи
+                await income_ledger.sync(client, now)
+            except Exception as exc:  # noqa: broad-except
+                logger.warning("Income history fetch error: %s", exc)
+            # Записи без `incomeType` ледджер хранит под "" — они входят в pnl24h, как и раньше
+            PNL_24H = income_ledger.total(INCOME_TYPES_24H | {""})
 
-            wallet_balance = _to_float(account.get("totalWalletBalance"))
-            available = _to_float(account.get("availableBalance"), _to_float(account.get("totalAvailableBalance")))
-            total_unrealized = _to_float(account.get("totalUnrealizedProfit"), _to_float(account.get("totalCrossUnPnl")))
-            initial_margin = _to_float(account.get("totalInitialMargin"))
-            margin_balance = _to_float(account.get("totalMarginBalance"), wallet_balance)
-
-            margin_ratio = (initial_margin / margin_balance * 100) if margin_balance else 0.0
-            leverage = (margin_balance / initial_margin) if initial_margin else 0.0
-            income_interval = 60
-            if now - last_income_ts >= income_interval:
-                last_income_ts = now
-                start_window = int((now - 86_400) * 1000)
-                try:
-                    income_records = await client.get_income_history(
-                        symbol=symbol.upper(),
-                        start_time=start_window,
-                        end_time=int(now * 1000),
-                        limit=1000,
-                    )
-                except Exception as exc:  # noqa: broad-except
-                    logger.warning("Income history fetch error: %s", exc)
-                else:
-                    pnl_sum = 0.0
-                    for record in income_records:
-                        try:
-                            income_type = (record.get("incomeType") or "").upper()
-                            if income_type and income_type not in INCOME_TYPES_24H:
-                                continue
-                            ts_raw = record.get("time") or record.get("updateTime")
-                            if ts_raw is None:
-                                continue
-                            ts_ms = int(ts_raw)
-                            if ts_ms < start_window:
-                                continue
-                            pnl_sum += _to_float(record.get("income"))
-                        except (TypeError, ValueError):
-                            continue
-                    cached_pnl24h = pnl_sum
-
-            pnl_24h = cached_pnl24h
-
-            equity = wallet_balance + total_unrealized
-            global BASELINE_EQUITY
-            if BASELINE_EQUITY is None:
-                BASELINE_EQUITY = equity
-
-            await hub.broadcast({
-                "type": "account_snapshot",
-                "account": {
-                    "balance": wallet_balance,
-                    "availableBalance": available,
-                    "marginRatio": margin_ratio,
-                    "leverage": leverage,
-                    "pnl24h": pnl_24h,
-                },
-                "ts": int(now),
-            })
+        equity, wallet_balance, unrealized_total, positions_symbols = await _publish_account(
+            account, positions, now, symbol
+        )
 
-            unrealized_total = 0.0
-            for pos in positions or []:
-                symbol_u = pos.get("symbol", "")
-                if not symbol_u:
-                    continue
-                positions_symbols.add(symbol_u)
-                raw_qty = _to_float(pos.get("positionAmt"))
-                quantity = abs(raw_qty)
-                mark_price = _to_float(pos.get("markPrice"), _to_float(pos.get("entryPrice")))
-                entry_price = _to_float(pos.get("entryPrice"))
-                unrealized_pnl = _to_float(pos.get("unRealizedProfit"))
-                unrealized_percent = _to_float(pos.get("marginRatio")) * 100
-                notional = mark_price * quantity
-
-                if quantity == 0:
-                    notional = 0.0
-                    unrealized_pnl = 0.0
-                    unrealized_percent = 0.0
-                else:
-                    direction = 1 if raw_qty >= 0 else -1
-                    if unrealized_percent == 0 and entry_price:
-                        price_diff = (mark_price - entry_price) * direction
-                        unrealized_percent = (price_diff / entry_price) * 100
-
-                position_payload = {
-                    "id": f"{symbol_u}-{pos.get('positionSide', 'BOTH')}",
-                    "symbol": _normalize_symbol(symbol_u),
-                    "side": "LONG" if raw_qty >= 0 else "SHORT",
-                    "entryPrice": entry_price,
-                    "currentPrice": mark_price,
-                    "quantity": quantity,
-                    "unrealizedPnl": unrealized_pnl,
-                    "unrealizedPnlPercent": unrealized_percent,
-                    "notional": notional,
-                }
-                if quantity > 0:
-                    unrealized_total += position_payload["unrealizedPnl"]
-                await hub.broadcast({"type": "position_update", "position": position_payload})
-
-            await hub.broadcast({
-                "type": "equity_snapshot",
-                "time": int(now),
-                "equity": equity,
-                "balance": wallet_balance,
-                "unrealizedPnl": unrealized_total,
+        # Metrics snapshot (reuse account totals)
+        metrics_interval = 5
+        if now - last_metrics_ts >= metrics_interval:
+            last_metrics_ts = now
+            # Сделки поглощает trades_polling_loop из локального хранилища
+            metrics_payload = metrics_engine.snapshot(
+                equity=equity,
+                baseline_equity=BASELINE_EQUITY,
+                unrealized_total=unrealized_total,
+            )
+
+            total_pnl = PNL_24H + unrealized_total
+            reference_equity = wallet_balance - PNL_24H
+            if reference_equity <= 0:
+                reference_equity = wallet_balance or equity or 1.0
+
+            metrics_payload.update({
+                "realizedPnL": PNL_24H,
+                "unrealizedPnL": unrealized_total,
+                "totalPnL": total_pnl,
+                "totalPnLPercent": (total_pnl / reference_equity * 100) if reference_equity else 0.0,
             })
-
-            # Metrics snapshot (reuse account totals)
-            metrics_interval = 5
-            if now - last_metrics_ts >= metrics_interval:
-                last_metrics_ts = now
+            # Рассылает metrics_publish_loop вместе с окнами
+            _metrics_base = metrics_payload
+
+        # Ticker snapshot
+        ticker_interval = 10
+        if now - last_ticker_ts >= ticker_interval:
+            last_ticker_ts = now
+            if not ticker_table.is_fresh(TICKER_STREAM_MAX_AGE):
+                # Стрим !ticker@arr молчит — один bulk-запрос вместо запроса на символ
                 try:
-                    recent_trades = await client.get_recent_trades(symbol.upper(), limit=500)
-                except Exception as exc:  # noqa: broad-except
-                    logger.warning("Metrics trade fetch error: %s", exc)
-                    recent_trades = []
-
-                metrics_payload = compute_metrics(
-                    recent_trades,
-                    equity=equity,
-                    baseline_equity=BASELINE_EQUITY,
-                    unrealized_total=unrealized_total,
-                )
+                    ticker_table.update_many(await client.get_all_tickers_24h())
+                except RuntimeError as exc:
+                    logger.warning("Bulk ticker fetch error: %s", exc)
+            tickers = ticker_table.snapshot(positions_symbols or {symbol})
+            payload = []
+            for item in tickers:
+                sym = item.get("symbol", "")
+                if not sym:
+                    continue
+                payload.append({
+                    "symbol": _normalize_symbol(sym),
+                    "price": float(item.get("lastPrice", 0)),
+                    "change24h": float(item.get("priceChangePercent", 0)),
+                })
+            if payload:
+                await hub.broadcast({"type": "ticker_snapshot", "tickers": payload, "ts": int(now)})
 
-                total_pnl = cached_pnl24h + unrealized_total
-                reference_equity = wallet_balance - cached_pnl24h
-                if reference_equity <= 0:
-                    reference_equity = wallet_balance or equity or 1.0
+        await _end_iteration("account", started, interval)
 
-                metrics_payload.update({
-                    "realizedPnL": cached_pnl24h,
-                    "unrealizedPnL": unrealized_total,
-                    "totalPnL": total_pnl,
-                    "totalPnLPercent": (total_pnl / reference_equity * 100) if reference_equity else 0.0,
-                })
-                await hub.broadcast({
-                    "type": "metrics_snapshot",
-                    "metrics": metrics_payload,
-                    "ts": int(now),
-                })
 
-            # Ticker snapshot
-            ticker_interval = 10
-            if now - last_ticker_ts >= ticker_interval:
-                last_ticker_ts = now
-                tickers = await client.get_ticker_24h(positions_symbols or {symbol})
-                payload = []
-                for item in tickers:
-                    sym = item.get("symbol", "")
-                    if not sym:
-                        continue
-                    payload.append({
-                        "symbol": _normalize_symbol(sym),
-                        "price": float(item.get("lastPrice", 0)),
-                        "change24h": float(item.get("priceChangePercent", 0)),
-                    })
-                if payload:
-                    await hub.broadcast({"type": "ticker_snapshot", "tickers": payload, "ts": int(now)})
-
-            await asyncio.sleep(interval)
+async def metrics_publish_loop():
+    """Publish `metrics_snapshot` with rolling windows whenever anything changed."""
+
+    last_base: Optional[dict] = None
+    last_windows: Optional[dict] = None
+    while True:
+        await asyncio.sleep(METRICS_PUBLISH_SEC)
+        if _metrics_base is None:
+            continue
+        now = time.time()
+        windows = metrics_windows.snapshot(now)
+        if _metrics_base is last_base and windows == last_windows:
+            continue
+        last_base, last_windows = _metrics_base, windows
+        await hub.broadcast({
+            "type": "metrics_snapshot",
+            "metrics": {**_metrics_base, "windows": windows},
+            "ts": int(now),
+        })
+
+
+async def user_stream_loop(symbol: str):
+    """Apply Futures user data stream events and push them to clients immediately."""
+
+    client = _rest_client_factory()
+    if client is None or account_state is None:
+        return
+
+    stream = BinanceUserDataStream(client, ws_base_url=USER_STREAM_WS_URL)
+    try:
+        async for event in stream.run():
+            kind = event.get("e")
+            if kind == "ACCOUNT_UPDATE":
+                account_state.apply_account_update(event)
+                if account_state.ready:
+                    await _publish_account(
+                        account_state.account_overview(),
+                        account_state.position_list(),
+                        time.time(),
+                        symbol,
+                    )
+            elif kind == "ORDER_TRADE_UPDATE":
+                fill = account_state.apply_order_update(event)
+                if fill is not None:
+                    # Быстрый путь; хранилище и метрики пополняет REST-синхронизация по fromId
+                    await _emit_trade(fill["symbol"], fill)
     finally:
-        if client:
-            await client.close()
+        await stream.stop()
 
 
-async def trades_polling_loop(symbol: str, interval: float = 5.0):
+async def trades_polling_loop(symbol: str):
     client = _rest_client_factory()
     if client is None:
         logger.warning("Binance API credentials absent; trade snapshots disabled")
         return
 
     symbol = symbol.upper()
-    last_trade_id: Optional[int] = None
-    snapshot_sent = False
+    store = trade_store
+    # Пока идут исполнения — опрос каждые TRADES_POLL_MIN_SEC, в простое — реже
+    poll = AdaptivePollInterval(TRADES_POLL_MIN_SEC, TRADES_POLL_MAX_SEC)
 
-    try:
-        while True:
-            try:
-                trades = await client.get_recent_trades(symbol, limit=50)
-            except Exception as exc:  # noqa: broad-except
-                logger.warning("Trade polling error: %s", exc)
-                await asyncio.sleep(interval)
-                continue
-
-            if not trades:
-                await asyncio.sleep(interval)
-                continue
+    # История из локального хранилища: метрики доступны сразу после рестарта.
+    # Общие метрики — по последним METRICS_HISTORY_TRADES сделкам, окна — за свой период
+    since_ms = int((time.time() - max(DEFAULT_WINDOWS.values())) * 1000)
+    windowed = [trade for trade in await store.history(since_ms) if (trade.get("symbol") or "").upper() == symbol]
+    metrics_engine.absorb(await store.recent(symbol, METRICS_HISTORY_TRADES) + windowed)
 
-            ordered = sorted(trades, key=lambda t: int(t.get("id") or t.get("tradeId") or 0))
-            if last_trade_id is None and ordered:
-                last_trade_id = int(ordered[-1].get("id") or ordered[-1].get("tradeId") or 0)
-                if not snapshot_sent:
-                    snapshot_trades = []
-                    for trade in ordered[-100:]:
-                        try:
-                            snapshot_trades.append(_format_trade(symbol, trade))
-                        except ValueError:
-                            continue
-                    if snapshot_trades:
-                        await hub.broadcast({
-                            "type": "trades_snapshot",
-                            "trades": list(reversed(snapshot_trades)),
-                            "ts": int(time.time()),
-                        })
-                        snapshot_sent = True
-                await asyncio.sleep(interval)
-                continue
-
-            for trade in ordered:
-                trade_id_raw = trade.get("id") or trade.get("tradeId")
-                if trade_id_raw is None:
-                    continue
-                trade_id = int(trade_id_raw)
-                if last_trade_id is not None and trade_id <= last_trade_id:
-                    continue
+    # Снапшот — до первой синхронизации: всё, что она догрузит, уходит как trade_executed
+    snapshot_sent = await _broadcast_trades_snapshot(symbol, store)
 
-                try:
-                    payload = _format_trade(symbol, trade)
-                except ValueError:
-                    continue
-                await hub.broadcast({"type": "trade_executed", "trade": payload})
-                last_trade_id = trade_id
-
-            await asyncio.sleep(interval)
+    caught_up = False
+    while True:
+        started = time.perf_counter()
+        try:
+            new_trades = await sync_trades(client, store, symbol)
+        except Exception as exc:  # noqa: broad-except
+            logger.warning("Trade polling error: %s", exc)
+            await _end_iteration("trades", started, poll.next(0))
+            continue
+
+        metrics_engine.absorb(new_trades)
+        # Первая синхронизация возвращает накопленное (bootstrap или догрузку после рестарта) —
+        # это не признак идущих исполнений
+        interval = poll.next(len(new_trades) if caught_up else 0)
+        caught_up = True
+
+        if not snapshot_sent:
+            # Пустое хранилище: первая синхронизация — история, а не новые исполнения
+            await _broadcast_trades_snapshot(symbol, store)
+            snapshot_sent = True
+        elif len(new_trades) > TRADE_EMIT_BATCH_MAX:
+            # Большая догрузка (простой, рестарт) — одним trades_snapshot, а не N фреймов
+            for trade in new_trades:
+                trade_id = _trade_id(trade)
+                if trade_id is not None:
+                    _remember_trade(symbol, trade_id)
+            await _broadcast_trades_snapshot(symbol, store)
+        else:
+            for trade in new_trades:
+                await _emit_trade(symbol, trade)
+                # Hub.broadcast не уступает управление — даём writer'ам клиентов разгрузить очереди
+                await asyncio.sleep(0)
+
+        await _end_iteration("trades", started, interval)
+
+
+async def _broadcast_trades_snapshot(symbol: str, store: TradeStore) -> bool:
+    snapshot_trades = []
+    for trade in await store.recent(symbol, 100):
+        try:
+            snapshot_trades.append(_format_trade(symbol, trade))
+        except ValueError:
+            continue
+    if not snapshot_trades:
+        return False
+    await hub.broadcast({
+        "type": "trades_snapshot",
+        "trades": list(reversed(snapshot_trades)),
+        "ts": int(time.time()),
+    })
+    return True
+
+
+async def ticker_stream_pump():
+    client = BinanceTickerArrayClient(recorder=stream_recorder)
+    try:
+        async for rows in client.run():
+            ticker_table.update_many(rows)
     finally:
-        if client:
-            await client.close()
+        await client.stop()
 
 
 async def heartbeat_pump():
@@ -447,28 +773,142 @@ async def heartbeat_pump():
         await asyncio.sleep(5)
 
 
+def _restore_equity(log: EquityLog) -> None:
+    """Restore the baseline, equity tiers and the on-connect window from the log."""
+
+    global BASELINE_EQUITY
+    if log.baseline is not None:
+        BASELINE_EQUITY = log.baseline
+    for width, capacity in equity_series.tiers():
+        equity_series.load(width, log.tail(width, capacity))
+    hub.snapshots.seed_equity(
+        {"time": int(ts), "equity": equity, "balance": balance, "unrealizedPnl": unrealized}
+        for ts, equity, balance, unrealized in log.tail(0, WS_SNAPSHOT_EQUITY_POINTS)
+    )
+
+
 _background_tasks: Set[asyncio.Task] = set()
 
 
+async def bus_consume_loop():
+    """Fan-out worker: apply messages published by the ingest process."""
+
+    global bus_subscriber, _last_price_event
+    bus_subscriber = BusSubscriber(BUS_SOCKET_PATH)
+    in_bootstrap = False
+    previous_epoch = None
+    try:
+        async for message, frame, bootstrap in bus_subscriber.run():
+            kind = message.get("type")
+            if bootstrap and not in_bootstrap:
+                # (Пере)подключение к шине: ingest мог перезапуститься — состояние аккаунта
+                # и позиций берём только из новой стартовой пачки, не сливаем со старым
+                in_bootstrap = True
+                previous_epoch = hub.snapshots.state_epoch
+                hub.snapshots.reset_state()
+            if kind == EQUITY_POINT:
+                equity_series.add(
+                    message["time"], message["equity"], message["balance"], message["unrealizedPnl"]
+                )
+                continue
+            if kind == BUS_SYNCED:
+                in_bootstrap = False
+                # Точки, пропущенные, пока шина была недоступна, — из лога ingest
+                _catch_up_equity()
+                state = hub.snapshots.state_frame()
+                if state is not None and hub.snapshots.state_epoch != previous_epoch:
+                    # Подключённые клиенты держат состояние старого ingest-процесса
+                    hub.broadcast_frame(state)
+            relay_to_hub(hub, conflator, message, frame, bootstrap=bootstrap)
+            if kind == "price_update":
+                _last_price_event = time.monotonic()
+    finally:
+        await bus_subscriber.stop()
+        bus_subscriber = None
+
+
+def _catch_up_equity() -> None:
+    if not EQUITY_LOG_PATH or not os.path.exists(EQUITY_LOG_PATH):
+        return
+    last = equity_series.last_time()
+    log = EquityLog.open(EQUITY_LOG_PATH, readonly=True)
+    try:
+        for record in log.since(0 if last is None else last + 1):
+            equity_series.add(*record)
+    finally:
+        log.close()
+
+
+async def _start_fanout_worker() -> None:
+    # Воркер не ходит на биржу: всё состояние приходит по шине от ingest-процесса,
+    # тиры /equity дочитываются из лога ingest (только чтение)
+    if EQUITY_LOG_PATH and os.path.exists(EQUITY_LOG_PATH):
+        log = EquityLog.open(EQUITY_LOG_PATH, readonly=True)
+        try:
+            _restore_equity(log)
+        finally:
+            log.close()
+    for task in (asyncio.create_task(bus_consume_loop()), asyncio.create_task(conflator.run())):
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+
+
 @app.on_event("startup")
 async def on_startup():
     # Re-read credentials at startup to avoid stale module-level env
-    global API_KEY, API_SECRET
+    global API_KEY, API_SECRET, trade_store, equity_log, stream_recorder, bus_publisher
+    if BACKEND_ROLE == "fanout":
+        await _start_fanout_worker()
+        return
     API_KEY = os.getenv("BINANCE_API_KEY")
     API_SECRET = os.getenv("BINANCE_API_SECRET")
 
+    if EQUITY_LOG_PATH:
+        started = time.perf_counter()
+        equity_log = EquityLog.open(EQUITY_LOG_PATH)
+        _restore_equity(equity_log)
+        logger.info(
+            "Equity log restored: %d records, baseline=%s in %.1f ms",
+            len(equity_log),
+            BASELINE_EQUITY,
+            (time.perf_counter() - started) * 1000,
+        )
+
+    if BACKEND_ROLE == "ingest":
+        # Цены уходят в шину с максимальной частотой, воркеры конфлейтируют их под своих клиентов
+        bus_publisher = BusPublisher(BUS_SOCKET_PATH, hub.snapshots, price_rate_hz=conflator.max_rate_hz)
+        await bus_publisher.start()
+        hub.add_relay(bus_publisher)
+        logger.info("Publishing hub messages to the bus at %s", BUS_SOCKET_PATH)
+
+    if RECORD_STREAMS_PATH and PRICE_SOURCE == "binance":
+        stream_recorder = FrameRecorder(RECORD_STREAMS_PATH)
+        logger.info("Recording raw market data frames to %s", RECORD_STREAMS_PATH)
+
     # Запускаем фоновые задачи и сохраняем ссылки
-    task1 = asyncio.create_task(binance_pump(STREAM_SYMBOL))
+    task1 = asyncio.create_task(binance_pump(STREAM_SYMBOLS))
     task2 = asyncio.create_task(heartbeat_pump())
-    _background_tasks.add(task1)
-    _background_tasks.add(task2)
-    task1.add_done_callback(_background_tasks.discard)
-    task2.add_done_callback(_background_tasks.discard)
+    task3 = asyncio.create_task(conflator.run())
+    tasks = [task1, task2, task3]
+    if PRICE_SOURCE == "binance":
+        tasks.append(asyncio.create_task(ticker_stream_pump()))
+    for task in tasks:
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
 
     if API_KEY and API_SECRET:
+        trade_store = TradeStore.from_url(settings.database_url)
+        client = _rest_client_factory()
+        if REST_WARMUP_CONNECTIONS > 0:
+            # Холодный TLS-handshake не должен попадать в первый цикл опроса аккаунта
+            warmed = await client.warm_up(connections=REST_WARMUP_CONNECTIONS)
+            logger.info("REST pool warmed up: %d connection(s)", warmed)
         account_task = asyncio.create_task(account_polling_loop(STREAM_SYMBOL))
         trades_task = asyncio.create_task(trades_polling_loop(STREAM_SYMBOL))
-        for task in (account_task, trades_task):
+        rest_tasks = [account_task, trades_task, asyncio.create_task(metrics_publish_loop())]
+        if account_state is not None:
+            rest_tasks.append(asyncio.create_task(user_stream_loop(STREAM_SYMBOL)))
+        for task in rest_tasks:
             _background_tasks.add(task)
             task.add_done_callback(_background_tasks.discard)
     else:
@@ -480,26 +920,181 @@ async def on_startup():
 
 @app.on_event("shutdown")
 async def on_shutdown():
+    global rest_client, stream_recorder, bus_publisher
     for task in list(_background_tasks):
         task.cancel()
     if _background_tasks:
         await asyncio.gather(*_background_tasks, return_exceptions=True)
     _background_tasks.clear()
+    if trade_store is not None:
+        await trade_store.close()
+    if rest_client is not None:
+        await rest_client.pool.aclose()
+        rest_client = None
+    if equity_log is not None:
+        equity_log.close()
+    if stream_recorder is not None:
+        stream_recorder.close()
+        stream_recorder = None
+    if bus_publisher is not None:
+        hub.remove_relay(bus_publisher)
+        await bus_publisher.close()
+        bus_publisher = None
 
 
 @app.get("/health")
 async def health():
-    return {"status": "ok"}
+    payload = {"status": "ok", "role": BACKEND_ROLE}
+    if bus_publisher is not None:
+        payload["bus"] = {"subscribers": bus_publisher.subscribers, "published": bus_publisher.published}
+    if bus_subscriber is not None:
+        payload["bus"] = {"connected": bus_subscriber.connected}
+    if rest_client is not None:
+        payload["rest_pool"] = rest_client.pool.stats()
+        payload["rest_cache"] = rest_client.cache_stats()
+    if income_ledger is not None:
+        payload["income24h"] = {"records": len(income_ledger), "totals": income_ledger.totals()}
+    return payload
+
+
+def _queue_depths() -> List[int]:
+    return [session.queue_depth for session in hub.sessions()]
+
+
+Gauge("ws_clients", "Connected /ws clients.", callback=lambda: len(hub.clients))
+Gauge(
+    "bus_subscribers",
+    "Fan-out workers subscribed to this ingest process.",
+    callback=lambda: bus_publisher.subscribers if bus_publisher is not None else None,
+)
+Gauge(
+    "ws_client_queue_depth",
+    "Outbound queue depth across /ws clients.",
+    ["stat"],
+    callback=lambda: {
+        ("max",): max(_queue_depths(), default=0),
+        ("total",): sum(_queue_depths()),
+    },
+)
+Gauge(
+    "binance_bookticker_event_age_seconds",
+    "Seconds since the last bookTicker event.",
+    callback=lambda: time.monotonic() - _last_price_event if _last_price_event else None,
+)
+Gauge(
+    "binance_rest_used_weight_1m",
+    "Used request weight reported by Binance (X-MBX-USED-WEIGHT-1M).",
+    callback=lambda: rest_client.limiter.used_weight if rest_client is not None else None,
+)
+Gauge(
+    "binance_rest_pool_in_flight",
+    "REST requests holding a pooled connection.",
+    callback=lambda: rest_client.pool.in_flight if rest_client is not None else None,
+)
+Gauge(
+    "binance_rest_pool_wait_seconds_total",
+    "Total time REST requests waited for a pooled connection.",
+    callback=lambda: rest_client.pool.wait_total if rest_client is not None else None,
+)
+
+
+@app.get("/metrics")
+async def metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/equity")
+async def equity_history(range: str = "24H", points: int = 500):
+    """Downsampled equity series for the chart: `/equity?range=72H&points=500`."""
+
+    try:
+        range_sec = parse_range(range)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    points = max(2, min(points, EQUITY_MAX_QUERY_POINTS))
+    tier, series = equity_series.query(range_sec, points)
+    return {"range": range, "tier": tier, "points": series}
+
+
+@app.get("/analytics")
+async def trade_analytics(range: str = "all"):
+    """Columnar metrics over the stored trade history: `/analytics?range=90D`."""
+
+    try:
+        range_sec = parse_range(range)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    if not analytics_available():
+        raise HTTPException(status_code=503, detail="numpy is not installed")
+    if trade_store is None:
+        raise HTTPException(status_code=503, detail="trade history is not available")
+    since_ms = int((time.time() - range_sec) * 1000) if range_sec is not None else 0
+    trades = await trade_store.history(since_ms)
+    equity, _, unrealized = _last_equity_point or (0.0, 0.0, 0.0)
+    columns = await asyncio.to_thread(TradeColumns.from_trades, trades)
+    result = await asyncio.to_thread(
+        compute_analytics,
+        columns,
+        equity=equity,
+        baseline_equity=BASELINE_EQUITY,
+        unrealized_total=unrealized,
+    )
+    return {"range": range, "trades": len(columns), "metrics": result}
+
+
+def _parse_topics(raw) -> Tuple[List[str], List[str]]:
+    """Split requested topics into normalized valid ones and rejected raw values."""
+
+    if isinstance(raw, str):
+        raw = [raw]
+    if not isinstance(raw, list):
+        return [], []
+    valid, invalid = [], []
+    for item in raw:
+        topic = normalize_topic(item)
+        if topic is None:
+            invalid.append(str(item))
+        else:
+            valid.append(topic)
+    return valid, invalid
 
 
 @app.websocket("/ws")
 async def ws_endpoint(websocket: WebSocket):
-    await websocket.accept()
-    await hub.add(websocket)
+    encoding, subprotocol = negotiate_encoding(websocket)
+    await websocket.accept(subprotocol=subprotocol)
+    requested_rate = _to_float(websocket.query_params.get("rate"), 0.0)
+    requested_topics = [t for t in (websocket.query_params.get("topics") or "").split(",") if t.strip()]
+    topics, _ = _parse_topics(requested_topics)
+    await hub.add(
+        websocket,
+        price_rate_hz=conflator.resolve_rate(requested_rate),
+        encoding=encoding,
+        topics=topics or None,
+    )
     try:
         while True:
-            # Поддерживаем соединение живым, входящие сообщения не требуются
-            await asyncio.sleep(30)
+            message = await websocket.receive()
+            if message.get("type") == "websocket.disconnect":
+                break
+            command = decode_client_message(message)
+            op = command.get("op") if command is not None else None
+            if op in ("subscribe", "unsubscribe"):
+                topics, invalid = _parse_topics(command.get("topics"))
+                if op == "subscribe":
+                    current = hub.subscribe(websocket, topics)
+                else:
+                    current = hub.unsubscribe(websocket, topics)
+                hub.send(websocket, Frame({
+                    "type": "subscriptions",
+                    "topics": sorted(current),
+                    "invalid": invalid,
+                }))
+            elif op == "resync":
+                # Клиент заметил разрыв seq (или потерял состояние) — полный state_snapshot
+                frame = hub.snapshots.state_frame()
+                if frame is not None:
+                    hub.send(websocket, frame)
     except WebSocketDisconnect:
         pass
     finally:
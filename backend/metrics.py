@@ -11,13 +11,25 @@
       словарь метрик с ключами, ожидаемыми фронтендом.
     - Функция устойчиво обрабатывает пропуски полей и некорректные значения,
       пропуская нечитаемые сделки вместо выброса исключений.
+    - `MetricsAccumulator` — инкрементальный вариант: `absorb(trades)` учитывает только
+      новые сделки (по id), `snapshot(...)` возвращает словарь той же формы, что и
+      `compute_metrics` по последним `max_samples` сделкам (default 500), за
+      амортизированное O(1) на сделку (Welford с обратным шагом для Sharpe, очередь
+      сегментов кривой PnL на двух стеках для drawdown).
+    - `WindowedMetrics` — win rate, realized PnL, profit factor и max drawdown по
+      скользящим окнам времени (default `1h`/`24h`/`7d`/`30d`): `add_sample(sample)`,
+      `snapshot(now)` → `{window: {...}}`. Сделки входят в окно и выходят из него за
+      амортизированное O(1) (deque по времени + очередь на двух стеках для drawdown).
+      `MetricsAccumulator(windows=...)` передаёт в него каждую новую сделку.
 
 CLI/Примеры:
     Не предоставляет CLI; модуль подключается из FastAPI сервиса.
 
 Ограничения/Политики:
     - Live-only: работает только с реальными сделками Binance, не создаёт мок-данные.
-    - Считает метрики по последним N сделкам, переданным вызывающей стороной.
+    - `compute_metrics` считает метрики по последним N сделкам, переданным вызывающей
+      стороной; `MetricsAccumulator` — по последним `max_samples` поглощённым сделкам
+      (память O(max_samples), сделка не по порядку времени пересобирает только это окно).
 
 ENV/Файлы состояния:
     - Использует только данные, переданные в параметрах; состояние окружения не читает.
@@ -29,9 +41,11 @@ ENV/Файлы состояния:
 from __future__ import annotations
 
 import math
+import time
+from collections import deque
 from dataclasses import dataclass
 from statistics import mean, pstdev
-from typing import Iterable, List, Sequence
+from typing import Deque, Dict, Iterable, List, Optional, Sequence
 
 
 @dataclass(frozen=True)
@@ -41,42 +55,63 @@ class TradeSample:
     timestamp: int
 
 
+def _normalize_user_trade(raw: dict) -> Optional[TradeSample]:
+    """Convert a single raw Binance userTrades payload into a typed sample (or None)."""
+
+    try:
+        pnl_raw = raw.get("realizedPnl")
+        if pnl_raw is None:
+            pnl_raw = raw.get("realizedProfit")
+        if pnl_raw is None:
+            return None
+        pnl = float(pnl_raw)
+
+        quote_raw = raw.get("quoteQty")
+        if quote_raw is None:
+            price_raw = raw.get("price")
+            qty_raw = raw.get("qty") or raw.get("quantity")
+            if price_raw is None or qty_raw is None:
+                quote_volume = 0.0
+            else:
+                quote_volume = float(price_raw) * float(qty_raw)
+        else:
+            quote_volume = float(quote_raw)
+
+        timestamp_raw = raw.get("time") or raw.get("updateTime")
+        if timestamp_raw is None:
+            return None
+        timestamp = int(int(timestamp_raw) // 1000)
+    except (TypeError, ValueError):
+        return None
+
+    if not math.isfinite(pnl) or not math.isfinite(quote_volume):
+        return None
+
+    return TradeSample(pnl=pnl, quote_volume=abs(quote_volume), timestamp=timestamp)
+
+
 def _normalize_user_trades(trades: Iterable[dict]) -> List[TradeSample]:
     """Convert raw Binance userTrades payloads into typed trade samples."""
 
     samples: List[TradeSample] = []
     for raw in trades:
-        try:
-            pnl_raw = raw.get("realizedPnl")
-            if pnl_raw is None:
-                pnl_raw = raw.get("realizedProfit")
-            if pnl_raw is None:
-                continue
-            pnl = float(pnl_raw)
-
-            quote_raw = raw.get("quoteQty")
-            if quote_raw is None:
-                price_raw = raw.get("price")
-                qty_raw = raw.get("qty") or raw.get("quantity")
-                if price_raw is None or qty_raw is None:
-                    quote_volume = 0.0
-                else:
-                    quote_volume = float(price_raw) * float(qty_raw)
-            else:
-                quote_volume = float(quote_raw)
+        sample = _normalize_user_trade(raw)
+        if sample is not None:
+            samples.append(sample)
+    return samples
 
-            timestamp_raw = raw.get("time") or raw.get("updateTime")
-            if timestamp_raw is None:
-                continue
-            timestamp = int(int(timestamp_raw) // 1000)
-        except (TypeError, ValueError):
-            continue
 
-        if not math.isfinite(pnl) or not math.isfinite(quote_volume):
-            continue
+def _classify(sample: TradeSample) -> int:
+    """Return 1 for a win, -1 for a loss and 0 for a flat (micro) trade."""
 
-        samples.append(TradeSample(pnl=pnl, quote_volume=abs(quote_volume), timestamp=timestamp))
-    return samples
+    dynamic_threshold = max(0.05, 0.0005 * sample.quote_volume)
+    if abs(sample.pnl) < dynamic_threshold:
+        return 0
+    if sample.pnl > 0:
+        return 1
+    if sample.pnl < 0:
+        return -1
+    return 0
 
 
 def _calculate_drawdown(samples: Sequence[TradeSample]) -> float:
@@ -99,6 +134,14 @@ def _calculate_drawdown(samples: Sequence[TradeSample]) -> float:
     return (max_drawdown / peak) * 100
 
 
+def _profit_factor(wins_sum: float, losses_sum: float, winning_trades: int) -> float:
+    if losses_sum < 0:
+        return wins_sum / abs(losses_sum)
+    if winning_trades:
+        return wins_sum / max(wins_sum * 0.2, 1.0)
+    return 0.0
+
+
 def compute_metrics(
     trades: Sequence[dict],
     *,
@@ -115,13 +158,10 @@ def compute_metrics(
     flat_trades = 0
 
     for sample in samples:
-        dynamic_threshold = max(0.05, 0.0005 * sample.quote_volume)
-        if abs(sample.pnl) < dynamic_threshold:
-            flat_trades += 1
-            continue
-        if sample.pnl > 0:
+        outcome = _classify(sample)
+        if outcome > 0:
             filtered_wins.append(sample.pnl)
-        elif sample.pnl < 0:
+        elif outcome < 0:
             filtered_losses.append(sample.pnl)
         else:
             flat_trades += 1
@@ -140,13 +180,7 @@ def compute_metrics(
     else:
         sharpe_ratio = 0.0
 
-    loss_sum = sum(filtered_losses)
-    if loss_sum < 0:
-        profit_factor = sum(filtered_wins) / abs(loss_sum)
-    elif filtered_wins:
-        profit_factor = sum(filtered_wins) / max(sum(filtered_wins) * 0.2, 1.0)
-    else:
-        profit_factor = 0.0
+    profit_factor = _profit_factor(sum(filtered_wins), sum(filtered_losses), winning_trades)
 
     avg_win = (sum(filtered_wins) / len(filtered_wins)) if filtered_wins else 0.0
     avg_loss = (sum(filtered_losses) / len(filtered_losses)) if filtered_losses else 0.0
@@ -175,3 +209,316 @@ def compute_metrics(
         "unrealizedPnL": unrealized_total,
         "flatTrades": flat_trades,
     }
+
+
+# Сегмент кривой PnL: (sum, max_prefix, min_prefix, max_drawdown), префиксы включают 0.
+# Ассоциативная свёртка сегментов даёт drawdown окна без пересчёта истории.
+_EMPTY_SEGMENT = (0.0, 0.0, 0.0, 0.0)
+
+
+def _segment(pnl: float) -> tuple:
+    return (pnl, max(0.0, pnl), min(0.0, pnl), max(0.0, -pnl))
+
+
+def _combine(a: tuple, b: tuple) -> tuple:
+    return (
+        a[0] + b[0],
+        max(a[1], a[0] + b[1]),
+        min(a[2], a[0] + b[2]),
+        max(a[3], b[3], a[1] - (a[0] + b[2])),
+    )
+
+
+class _SegmentQueue:
+    """FIFO of PnL segments with O(1) amortized push/pop and whole-queue aggregate (two stacks)."""
+
+    __slots__ = ("_front", "_back", "_back_agg")
+
+    def __init__(self) -> None:
+        self._front: List[tuple] = []  # агрегаты «элемент + всё, что за ним» во front-стеке
+        self._back: List[tuple] = []
+        self._back_agg = _EMPTY_SEGMENT
+
+    def push(self, pnl: float) -> None:
+        segment = _segment(pnl)
+        self._back.append(segment)
+        self._back_agg = _combine(self._back_agg, segment)
+
+    def pop(self) -> None:
+        if not self._front:
+            agg = _EMPTY_SEGMENT
+            while self._back:
+                agg = _combine(self._back.pop(), agg)
+                self._front.append(agg)
+            self._back_agg = _EMPTY_SEGMENT
+        if self._front:
+            self._front.pop()
+
+    def aggregate(self) -> tuple:
+        if not self._front:
+            return self._back_agg
+        return _combine(self._front[-1], self._back_agg)
+
+
+class MetricsAccumulator:
+    """Stateful counterpart of `compute_metrics` that absorbs only new trades.
+
+    Trades are deduplicated by `(symbol, id)`. Like `compute_metrics` over the last N
+    fills, the accumulator covers the latest `max_samples` samples (by trade time):
+    win/loss counters, profit-factor sums and Welford mean/variance of returns are
+    updated on entry and eviction, and the PnL curve is a two-stack segment queue, so
+    each trade costs amortized O(1). A trade older than the newest sample rebuilds
+    only the bounded window.
+    """
+
+    def __init__(self, *, max_samples: int = 500, windows: Optional["WindowedMetrics"] = None) -> None:
+        self.max_samples = max_samples
+        self.windows = windows
+        self._last_ids: Dict[str, int] = {}
+        self._samples: Deque[TradeSample] = deque()
+        self._curve = _SegmentQueue()
+        self._reset()
+
+    def _reset(self) -> None:
+        self.winning_trades = 0
+        self.losing_trades = 0
+        self.flat_trades = 0
+        self.wins_sum = 0.0
+        self.losses_sum = 0.0
+        # Welford над доходностями pnl/quote_volume для Sharpe
+        self._returns_n = 0
+        self._returns_mean = 0.0
+        self._returns_m2 = 0.0
+
+    @property
+    def sample_count(self) -> int:
+        return len(self._samples)
+
+    def absorb(self, trades: Iterable[dict]) -> int:
+        """Absorb trades not seen before (by trade id per symbol); return how many were new."""
+
+        fresh = []
+        for raw in trades:
+            trade_id_raw = raw.get("id")
+            if trade_id_raw is None:
+                trade_id_raw = raw.get("tradeId")
+            if trade_id_raw is None:
+                continue
+            try:
+                fresh.append((int(trade_id_raw), raw))
+            except (TypeError, ValueError):
+                continue
+        fresh.sort(key=lambda item: item[0])
+
+        added = 0
+        for trade_id, raw in fresh:
+            symbol = (raw.get("symbol") or "").upper()
+            if trade_id <= self._last_ids.get(symbol, -1):
+                continue
+            self._last_ids[symbol] = trade_id
+            sample = _normalize_user_trade(raw)
+            if sample is None:
+                continue
+            self.add_sample(sample)
+            added += 1
+        return added
+
+    def add_sample(self, sample: TradeSample) -> None:
+        if self.windows is not None:
+            self.windows.add_sample(sample)
+
+        if self._samples and sample.timestamp < self._samples[-1].timestamp:
+            # Сделка не по порядку времени — пересобираем ограниченное окно (редкий случай)
+            samples = sorted([*self._samples, sample], key=lambda s: s.timestamp)
+            self._samples = deque()
+            self._curve = _SegmentQueue()
+            self._reset()
+            for item in samples[-self.max_samples:]:
+                self._push(item)
+            return
+
+        self._push(sample)
+        if len(self._samples) > self.max_samples:
+            self._evict()
+
+    def _push(self, sample: TradeSample) -> None:
+        self._samples.append(sample)
+        self._curve.push(sample.pnl)
+        self._count(sample, 1)
+        if sample.quote_volume > 0:
+            value = sample.pnl / sample.quote_volume
+            self._returns_n += 1
+            delta = value - self._returns_mean
+            self._returns_mean += delta / self._returns_n
+            self._returns_m2 += delta * (value - self._returns_mean)
+
+    def _evict(self) -> None:
+        sample = self._samples.popleft()
+        self._curve.pop()
+        self._count(sample, -1)
+        if sample.quote_volume > 0:
+            # Обратный шаг Welford
+            value = sample.pnl / sample.quote_volume
+            self._returns_n -= 1
+            if self._returns_n == 0:
+                self._returns_mean = self._returns_m2 = 0.0
+                return
+            delta = value - self._returns_mean
+            self._returns_mean -= delta / self._returns_n
+            self._returns_m2 = max(self._returns_m2 - delta * (value - self._returns_mean), 0.0)
+
+    def _count(self, sample: TradeSample, sign: int) -> None:
+        outcome = _classify(sample)
+        if outcome > 0:
+            self.winning_trades += sign
+            self.wins_sum += sign * sample.pnl
+        elif outcome < 0:
+            self.losing_trades += sign
+            self.losses_sum += sign * sample.pnl
+        else:
+            self.flat_trades += sign
+
+    def snapshot(
+        self,
+        *,
+        equity: float,
+        baseline_equity: float | None,
+        unrealized_total: float,
+    ) -> dict:
+        """Return metrics in the exact shape produced by `compute_metrics`."""
+
+        total_trades = self.winning_trades + self.losing_trades
+
+        if self._returns_n >= 2:
+            std_return = math.sqrt(self._returns_m2 / self._returns_n) if self._returns_m2 > 0 else 0.0
+            sharpe_ratio = (
+                self._returns_mean / std_return * math.sqrt(self._returns_n) if std_return > 0 else 0.0
+            )
+        else:
+            sharpe_ratio = 0.0
+
+        avg_win = (self.wins_sum / self.winning_trades) if self.winning_trades else 0.0
+        avg_loss = (self.losses_sum / self.losing_trades) if self.losing_trades else 0.0
+        win_rate = (self.winning_trades / total_trades * 100) if total_trades else 0.0
+
+        baseline = baseline_equity if baseline_equity and baseline_equity > 0 else equity or 1.0
+        total_pnl = equity - baseline
+        total_pnl_percent = (total_pnl / baseline * 100) if baseline else 0.0
+
+        _, peak, _, drawdown = self._curve.aggregate()
+        max_drawdown = (-drawdown / peak * 100) if peak > 0 and drawdown > 0 else 0.0
+
+        return {
+            "totalPnL": total_pnl,
+            "totalPnLPercent": total_pnl_percent,
+            "winRate": win_rate,
+            "sharpeRatio": sharpe_ratio,
+            "maxDrawdown": max_drawdown,
+            "avgWin": avg_win,
+            "avgLoss": avg_loss,
+            "profitFactor": _profit_factor(self.wins_sum, self.losses_sum, self.winning_trades),
+            "totalTrades": total_trades,
+            "winningTrades": self.winning_trades,
+            "losingTrades": self.losing_trades,
+            "realizedPnL": self.wins_sum + self.losses_sum,
+            "unrealizedPnL": unrealized_total,
+            "flatTrades": self.flat_trades,
+        }
+
+
+# --- Скользящие окна по времени ------------------------------------------------
+
+class _RollingWindow:
+    def __init__(self, seconds: int) -> None:
+        self.seconds = seconds
+        self._samples: Deque[TradeSample] = deque()
+        self._curve = _SegmentQueue()
+        self._reset_counters()
+
+    def _reset_counters(self) -> None:
+        self.winning_trades = 0
+        self.losing_trades = 0
+        self.flat_trades = 0
+        self.wins_sum = 0.0
+        self.losses_sum = 0.0
+
+    def _count(self, sample: TradeSample, sign: int) -> None:
+        outcome = _classify(sample)
+        if outcome > 0:
+            self.winning_trades += sign
+            self.wins_sum += sign * sample.pnl
+        elif outcome < 0:
+            self.losing_trades += sign
+            self.losses_sum += sign * sample.pnl
+        else:
+            self.flat_trades += sign
+
+    def add(self, sample: TradeSample, now: float) -> None:
+        if sample.timestamp < now - self.seconds:
+            return
+        if self._samples and sample.timestamp < self._samples[-1].timestamp:
+            # Сделка не по порядку времени — пересобираем окно (редкий случай)
+            self._rebuild(sorted([*self._samples, sample], key=lambda s: s.timestamp))
+            return
+        self._samples.append(sample)
+        self._curve.push(sample.pnl)
+        self._count(sample, 1)
+
+    def _rebuild(self, samples: List[TradeSample]) -> None:
+        self._samples = deque()
+        self._curve = _SegmentQueue()
+        self._reset_counters()
+        for sample in samples:
+            self._samples.append(sample)
+            self._curve.push(sample.pnl)
+            self._count(sample, 1)
+
+    def advance(self, now: float) -> None:
+        cutoff = now - self.seconds
+        while self._samples and self._samples[0].timestamp < cutoff:
+            self._count(self._samples.popleft(), -1)
+            self._curve.pop()
+        if not self._samples:
+            self._reset_counters()  # без накопленной ошибки вычитания
+
+    def snapshot(self) -> dict:
+        total = self.winning_trades + self.losing_trades
+        _, peak, _, drawdown = self._curve.aggregate()
+        return {
+            "winRate": (self.winning_trades / total * 100) if total else 0.0,
+            "realizedPnL": self.wins_sum + self.losses_sum,
+            "profitFactor": _profit_factor(self.wins_sum, self.losses_sum, self.winning_trades),
+            "maxDrawdown": (-drawdown / peak * 100) if peak > 0 and drawdown > 0 else 0.0,
+            "totalTrades": total,
+            "winningTrades": self.winning_trades,
+            "losingTrades": self.losing_trades,
+            "flatTrades": self.flat_trades,
+        }
+
+
+DEFAULT_WINDOWS = {"1h": 3_600, "24h": 86_400, "7d": 7 * 86_400, "30d": 30 * 86_400}
+
+
+class WindowedMetrics:
+    """Win rate, PnL, profit factor and max drawdown over several trailing time windows.
+
+    Each window keeps its samples in a time-ordered deque plus a two-stack queue of
+    PnL-curve segments, so trades entering or leaving a window cost amortized O(1)
+    and `snapshot(now)` never rescans history.
+    """
+
+    def __init__(self, windows: Optional[Dict[str, int]] = None) -> None:
+        self._windows = {name: _RollingWindow(seconds) for name, seconds in (windows or DEFAULT_WINDOWS).items()}
+
+    def add_sample(self, sample: TradeSample, now: Optional[float] = None) -> None:
+        now = time.time() if now is None else now
+        for window in self._windows.values():
+            window.add(sample, now)
+
+    def snapshot(self, now: Optional[float] = None) -> Dict[str, dict]:
+        now = time.time() if now is None else now
+        out = {}
+        for name, window in self._windows.items():
+            window.advance(now)
+            out[name] = window.snapshot()
+        return out
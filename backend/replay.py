@@ -0,0 +1,215 @@
+"""Record and replay raw Binance stream frames for offline load tests.
+
+Назначение:
+        - `FrameRecorder` пишет сырые фреймы стримов (`bookTicker`, `!ticker@arr`) в
+            gzip-файл вместе с временем получения, чтобы потом воспроизводить живой
+            рынок без `fstream.binance.com`.
+        - `ReplayPriceSource` читает запись и прогоняет фреймы через тот же разбор
+            (`BinanceBookTickerClient._parse`, `BinanceTickerArrayClient._parse`) и тот же
+            конвейер (конфлейтер → хаб) в реальном темпе, ускоренно (Nx) или на
+            максимальной скорости — для детерминированного замера потолка пропускной
+            способности и задержки tick-to-client.
+
+Контракт:
+        - Формат файла: gzip-текст, строка на фрейм `<recv_ts>\\t<stream>\\t<raw>\\n`, где
+            `recv_ts` — Unix-время получения в секундах, `stream` — `bookTicker` или
+            `ticker_arr`, `raw` — фрейм как пришёл с биржи.
+        - `recorder.record(stream, raw)`; `recorder.close()`.
+        - `ReplayPriceSource(path, speed=1.0, loop=False, ticker_sink=None)`:
+            `async for event in source.run()` — события `BookTickerEvent`;
+            строки `!ticker@arr` уходят в `ticker_sink(rows)`. `speed=0` — без пауз.
+            `ts` события переписывается на момент выдачи (`restamp=True`), чтобы задержка
+            до клиента считалась от воспроизведения, а не от исходной записи.
+
+CLI/Примеры:
+        `python -m backend.replay record --symbols BTCUSDT,ETHUSDT --duration 600 --out md.tsv.gz`
+        `python -m backend.replay info md.tsv.gz`
+        `PRICE_SOURCE=replay REPLAY_PATH=md.tsv.gz REPLAY_SPEED=10 uvicorn backend.main:app`
+
+Ограничения/Политики:
+        - Обрезанный хвост gzip (процесс убит во время записи) не ошибка: воспроизведение
+            останавливается на последней целой строке.
+        - Запись идёт синхронно из event loop (буферизованный gzip); при записи всех
+            символов рынка стоит выделять отдельный процесс-рекордер (`record` CLI).
+
+ENV/Файлы состояния:
+        - `RECORD_STREAMS_PATH`, `PRICE_SOURCE=replay`, `REPLAY_PATH`, `REPLAY_SPEED`,
+            `REPLAY_LOOP` читаются в `backend.main`.
+
+Интеграции:
+        - `backend.binance_client` (парсеры и `recorder=` у WS-клиентов),
+            `backend.main.binance_pump`, `benchmarks/fanout.py --source replay`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gzip
+import sys
+import time
+import zlib
+from typing import AsyncIterator, Callable, Iterator, List, Optional, Tuple
+
+from .binance_client import BinanceBookTickerClient, BinanceTickerArrayClient, BookTickerEvent
+
+STREAM_BOOK_TICKER = "bookTicker"
+STREAM_TICKER_ARR = "ticker_arr"
+
+
+class FrameRecorder:
+    def __init__(self, path: str, *, flush_interval: float = 5.0) -> None:
+        self.path = path
+        self.flush_interval = flush_interval
+        self.frames = 0
+        self._file = gzip.open(path, "at", compresslevel=6, encoding="utf-8")
+        self._last_flush = time.monotonic()
+
+    def record(self, stream: str, raw) -> None:
+        if isinstance(raw, bytes):
+            raw = raw.decode("utf-8", "replace")
+        self._file.write(f"{time.time():.6f}\t{stream}\t{raw}\n")
+        self.frames += 1
+        now = time.monotonic()
+        if now - self._last_flush >= self.flush_interval:
+            self._file.flush()
+            self._last_flush = now
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def read_frames(path: str) -> Iterator[Tuple[float, str, str]]:
+    """Yield `(recv_ts, stream, raw)` from a recording, stopping at a truncated tail."""
+
+    with gzip.open(path, "rt", encoding="utf-8") as fh:
+        try:
+            for line in fh:
+                parts = line.rstrip("\n").split("\t", 2)
+                if len(parts) != 3:
+                    continue
+                try:
+                    yield float(parts[0]), parts[1], parts[2]
+                except ValueError:
+                    continue
+        except (EOFError, zlib.error, gzip.BadGzipFile):
+            return
+
+
+class ReplayPriceSource:
+    def __init__(
+        self,
+        path: str,
+        *,
+        speed: float = 1.0,
+        loop: bool = False,
+        restamp: bool = True,
+        ticker_sink: Optional[Callable[[List[dict]], object]] = None,
+    ) -> None:
+        self.path = path
+        self.speed = max(0.0, speed)
+        self.loop = loop
+        self.restamp = restamp
+        self.ticker_sink = ticker_sink
+        self.frames = 0
+        self._stop = asyncio.Event()
+
+    async def stop(self) -> None:
+        self._stop.set()
+
+    async def run(self) -> AsyncIterator[BookTickerEvent]:
+        while not self._stop.is_set():
+            first_ts: Optional[float] = None
+            started = time.monotonic()
+            for recv_ts, stream, raw in read_frames(self.path):
+                if self._stop.is_set():
+                    return
+                if first_ts is None:
+                    first_ts = recv_ts
+                if self.speed > 0:
+                    delay = started + (recv_ts - first_ts) / self.speed - time.monotonic()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                elif self.frames % 256 == 0:
+                    await asyncio.sleep(0)  # максимальная скорость, но конфлейтер и хаб должны успевать
+                self.frames += 1
+                try:
+                    if stream == STREAM_TICKER_ARR:
+                        if self.ticker_sink is not None:
+                            self.ticker_sink(BinanceTickerArrayClient._parse(raw))
+                        continue
+                    event = BinanceBookTickerClient._parse(raw, {})
+                except (ValueError, TypeError, AttributeError):
+                    continue
+                if event is None:
+                    continue
+                if self.restamp:
+                    event.ts = time.time() * 1000
+                yield event
+            if not self.loop:
+                return
+
+
+async def _record(symbols: List[str], out: str, duration: float, with_tickers: bool) -> int:
+    recorder = FrameRecorder(out)
+    book = BinanceBookTickerClient(symbols, recorder=recorder)
+    tasks = [asyncio.create_task(_drain(book.run()))]
+    tickers = None
+    if with_tickers:
+        tickers = BinanceTickerArrayClient(recorder=recorder)
+        tasks.append(asyncio.create_task(_drain(tickers.run())))
+    try:
+        await asyncio.sleep(duration)
+    finally:
+        await book.stop()
+        if tickers is not None:
+            await tickers.stop()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        recorder.close()
+    return recorder.frames
+
+
+async def _drain(iterator) -> None:
+    async for _ in iterator:
+        pass
+
+
+def _info(path: str) -> None:
+    counts = {}
+    first = last = None
+    for recv_ts, stream, _ in read_frames(path):
+        counts[stream] = counts.get(stream, 0) + 1
+        first = recv_ts if first is None else first
+        last = recv_ts
+    span = (last - first) if first is not None else 0.0
+    total = sum(counts.values())
+    print(f"{path}: {total} frames over {span:.1f}s ({total / span if span else 0:.1f} frames/s)")
+    for stream, count in sorted(counts.items()):
+        print(f"  {stream}: {count}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Record or inspect raw Binance stream frames.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    rec = sub.add_parser("record")
+    rec.add_argument("--symbols", default="BTCUSDT")
+    rec.add_argument("--duration", type=float, default=600.0)
+    rec.add_argument("--out", required=True)
+    rec.add_argument("--no-tickers", action="store_true", help="skip the !ticker@arr stream")
+    info = sub.add_parser("info")
+    info.add_argument("path")
+    args = parser.parse_args(argv)
+
+    if args.command == "info":
+        _info(args.path)
+        return 0
+    symbols = [s.strip().upper() for s in args.symbols.split(",") if s.strip()]
+    frames = asyncio.run(_record(symbols, args.out, args.duration, not args.no_tickers))
+    print(f"recorded {frames} frames to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+"""Process-wide pooled HTTP client shared by every Binance REST poller.
+
+Назначение:
+        - `RestClientPool` владеет единственным `httpx.AsyncClient` с настроенным пулом
+            соединений: TLS-сессии и keep-alive соединения переиспользуются всеми
+            REST-циклами (account, trades, income, tickers), а не открываются заново
+            в каждом клиенте.
+        - Прогрев (`warm_up`) открывает соединения при старте, чтобы первый цикл
+            опроса не платил за холодный TLS-handshake.
+
+Контракт:
+        - `RestClientPool(base_url, max_connections=..., max_keepalive=..., http2=None)`;
+            `http2=None` — включить HTTP/2, если установлен пакет `h2`.
+        - `await pool.request(method, path, params=..., headers=...)` → `httpx.Response`;
+            запрос ждёт свободный слот пула (`max_connections`), время ожидания учитывается.
+        - `await pool.warm_up(path, connections=n)` — n параллельных GET для открытия
+            соединений HTTP/1.1 (при HTTP/2 — один GET: все запросы идут по одному
+            соединению); ошибки прогрева только логируются.
+        - `pool.limiter` — общий `WeightRateLimiter` клиентов пула (`None`, пока пул не
+            передан клиенту): бюджет веса делится всеми REST-циклами поверх пула.
+        - `pool.stats()` → `{'http2', 'max_connections', 'in_flight', 'peak_in_flight',
+            'utilisation', 'requests', 'wait_total_sec', 'wait_max_sec', 'wait_avg_ms',
+            'http_versions'}`.
+
+Ограничения/Политики:
+        - Параллелизм ограничивается семафором размером с пул, поэтому httpx никогда не
+            ставит запросы в собственную очередь и всё ожидание соединения видно в
+            `wait_*` метриках.
+        - Прогрев не проходит через `WeightRateLimiter`; вызывающий код отвечает за
+            выбор дешёвого эндпоинта (`/fapi/v1/ping`, вес 1).
+
+ENV/Файлы состояния:
+        - Параметры пула передаются из `backend.main` (`REST_POOL_MAX_CONNECTIONS`,
+            `REST_POOL_MAX_KEEPALIVE`, `REST_HTTP2`, `REST_WARMUP_CONNECTIONS`).
+
+Интеграции:
+        - httpx==0.27.*; опционально `h2` для HTTP/2.
+        - `BinanceFuturesRestClient(..., pool=...)` из `backend.binance_client`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import Counter
+from typing import Dict, Optional
+
+import httpx
+
+try:  # optional dependency
+    import h2  # noqa: F401
+except ImportError:  # pragma: no cover - depends on environment
+    h2 = None
+
+logger = logging.getLogger(__name__)
+
+
+def http2_available() -> bool:
+    return h2 is not None
+
+
+class RestClientPool:
+    """Shared `httpx.AsyncClient` with connection-wait and utilisation accounting."""
+
+    def __init__(
+        self,
+        base_url: str,
+        *,
+        max_connections: int = 10,
+        max_keepalive: int = 10,
+        keepalive_expiry: float = 120.0,
+        timeout: float = 10.0,
+        http2: Optional[bool] = None,
+    ) -> None:
+        if http2 is None:
+            http2 = http2_available()
+        elif http2 and not http2_available():
+            logger.warning("HTTP/2 requested but the 'h2' package is not installed; using HTTP/1.1")
+            http2 = False
+        self.base_url = base_url
+        self.http2 = http2
+        self.max_connections = max_connections
+        self._client = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=timeout,
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=min(max_keepalive, max_connections),
+                keepalive_expiry=keepalive_expiry,
+            ),
+        )
+        self._slots = asyncio.Semaphore(max_connections)
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.requests = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self._versions: Counter = Counter()
+        # `WeightRateLimiter` клиентов этого пула (назначает первый `BinanceFuturesRestClient`)
+        self.limiter = None
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        *,
+        params: Optional[Dict] = None,
+        headers: Optional[Dict] = None,
+    ) -> httpx.Response:
+        started = time.perf_counter()
+        async with self._slots:
+            waited = time.perf_counter() - started
+            self.requests += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            try:
+                response = await self._client.request(method, path, params=params, headers=headers)
+            finally:
+                self.in_flight -= 1
+        self._versions[response.http_version] += 1
+        return response
+
+    async def warm_up(self, path: str, *, connections: int = 2) -> int:
+        """Open up to `connections` pooled connections; return how many succeeded."""
+
+        connections = max(0, min(connections, self.max_connections))
+        if self.http2:
+            # Параллельные запросы HTTP/2 мультиплексируются в одно соединение
+            connections = min(connections, 1)
+        results = await asyncio.gather(
+            *(self.request("GET", path) for _ in range(connections)),
+            return_exceptions=True,
+        )
+        ok = 0
+        for result in results:
+            if isinstance(result, BaseException):
+                logger.warning("REST pool warm-up request failed: %s", result)
+            else:
+                ok += 1
+        return ok
+
+    def stats(self) -> Dict:
+        return {
+            "http2": self.http2,
+            "max_connections": self.max_connections,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "utilisation": self.in_flight / self.max_connections if self.max_connections else 0.0,
+            "requests": self.requests,
+            "wait_total_sec": self.wait_total,
+            "wait_max_sec": self.wait_max,
+            "wait_avg_ms": (self.wait_total / self.requests * 1000) if self.requests else 0.0,
+            "http_versions": dict(self._versions),
+        }
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
@@ -0,0 +1,185 @@
+"""Latest-state cache replayed to WebSocket clients right after they connect.
+
+Назначение:
+        - `SnapshotCache` запоминает последнюю версию каждого снапшота, который проходит
+            через `Hub.broadcast`, чтобы новый клиент `/ws` сразу получил пригодное
+            состояние UI без ожидания следующего цикла опроса и без запросов к Binance.
+
+Контракт:
+        - `record(message, frame)` вызывается хабом для каждого рассылаемого сообщения:
+            `metrics_snapshot`, `ticker_snapshot` — последний фрейм;
+            `state_delta` — сворачивается в полное состояние аккаунта и позиций
+            (`backend.deltas.apply_delta`); дельта с другим `epoch` или не растущим `seq`
+            сначала сбрасывает состояние (`reset_state()`), а не сворачивается в старое;
+            `trades_snapshot`/`trade_executed` — последние `max_trades` сделок;
+            `equity_snapshot` — окно последних `max_equity_points` точек;
+            `state_snapshot` / `equity_history` (пачка состояния от ingest-процесса,
+            `backend.bus`) — заменяют состояние аккаунта и окно equity целиком.
+        - `seed_equity(points)` — начальное окно equity (восстановление после рестарта).
+        - `record_price(symbol, frame)` — последний `price_update` по символу (из конфлейтера).
+        - `frames()` → список готовых фреймов для отправки одной пачкой: `state_snapshot`
+            (аккаунт и позиции с текущим `seq`), `equity_history`, metrics, tickers,
+            `trades_snapshot`, цены.
+        - `state_frame()` → текущий `state_snapshot` (ответ на `{"op": "resync"}`).
+
+Ограничения/Политики:
+        - Агрегированные фреймы (`state_snapshot`, `trades_snapshot`, `equity_history`) собираются лениво и
+            кодируются не чаще одного раза на изменение и формат, независимо от числа
+            подключений.
+
+ENV/Файлы состояния:
+        - Размеры окон передаются из `backend.main` (`WS_SNAPSHOT_TRADES`,
+            `WS_SNAPSHOT_EQUITY_POINTS`).
+
+Интеграции:
+        - `backend.hub.Hub` (запись при рассылке, выдача при подключении).
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional
+
+from .deltas import apply_delta
+from .encoding import Frame
+
+_LATEST_TYPES = ("metrics_snapshot", "ticker_snapshot")
+
+
+class SnapshotCache:
+    def __init__(self, *, max_trades: int = 100, max_equity_points: int = 720) -> None:
+        self.max_trades = max_trades
+        self._latest: Dict[str, Frame] = {}
+        self._epoch: Optional[str] = None
+        self._seq = 0
+        self._state_ts = 0
+        self._account: Dict = {}
+        self._positions: Dict[str, Dict] = {}
+        self._state_frame: Optional[Frame] = None
+        self._prices: Dict[str, Frame] = {}
+        self._trades: List[dict] = []
+        self._trades_ts = 0
+        self._trades_frame: Optional[Frame] = None
+        self._equity: Deque[dict] = deque(maxlen=max_equity_points)
+        self._equity_frame: Optional[Frame] = None
+
+    def record(self, message: dict, frame: Frame) -> None:
+        kind = message.get("type")
+        if kind in _LATEST_TYPES:
+            self._latest[kind] = frame
+        elif kind == "state_delta":
+            if self.starts_new_state(message):
+                # Другой источник состояния (рестарт ingest) или откат seq — не сворачивать
+                # дельту в чужое состояние, а начать его заново
+                self.reset_state()
+                self._epoch = message.get("epoch")
+            apply_delta(self._account, self._positions, message)
+            self._seq = message.get("seq", self._seq)
+            self._state_ts = message.get("ts", self._state_ts)
+            self._state_frame = None
+        elif kind == "state_snapshot":
+            self._epoch = message.get("epoch")
+            self._account = dict(message.get("account") or {})
+            self._positions = {pos["id"]: dict(pos) for pos in message.get("positions") or []}
+            self._seq = message.get("seq", self._seq)
+            self._state_ts = message.get("ts", self._state_ts)
+            self._state_frame = frame
+        elif kind == "equity_history":
+            self._equity.clear()
+            self._equity.extend(message.get("points") or [])
+            self._equity_frame = frame
+        elif kind == "trades_snapshot":
+            self._trades = list(message.get("trades") or [])[: self.max_trades]
+            self._trades_ts = message.get("ts", 0)
+            self._trades_frame = frame
+        elif kind == "trade_executed":
+            trade = message.get("trade")
+            if trade is not None:
+                self._trades.insert(0, trade)
+                del self._trades[self.max_trades:]
+                self._trades_frame = None
+        elif kind == "equity_snapshot":
+            self._equity.append({
+                "time": message.get("time"),
+                "equity": message.get("equity"),
+                "balance": message.get("balance"),
+                "unrealizedPnl": message.get("unrealizedPnl"),
+            })
+            self._equity_frame = None
+
+    @property
+    def state_epoch(self) -> Optional[str]:
+        return self._epoch
+
+    def starts_new_state(self, delta: dict) -> bool:
+        """True if a state_delta can't extend the cached state (new epoch or seq went back)."""
+
+        return delta.get("epoch") != self._epoch or delta.get("seq", 0) <= self._seq
+
+    def reset_state(self) -> None:
+        """Forget account/positions (e.g. before state from a new ingest process)."""
+
+        self._epoch = None
+        self._seq = 0
+        self._state_ts = 0
+        self._account = {}
+        self._positions = {}
+        self._state_frame = None
+
+    def seed_equity(self, points: Iterable[dict]) -> None:
+        """Preload the equity window (e.g. restored from the on-disk log)."""
+
+        self._equity.extend(points)
+        self._equity_frame = None
+
+    def record_price(self, symbol: str, frame: Frame) -> None:
+        self._prices[symbol] = frame
+
+    def state_frame(self) -> Optional[Frame]:
+        if not self._seq:
+            return None
+        if self._state_frame is None:
+            self._state_frame = Frame({
+                "type": "state_snapshot",
+                "epoch": self._epoch,
+                "seq": self._seq,
+                "account": dict(self._account),
+                "positions": [dict(pos) for pos in self._positions.values()],
+                "ts": self._state_ts,
+            })
+        return self._state_frame
+
+    def _trades_snapshot(self) -> Optional[Frame]:
+        if not self._trades:
+            return None
+        if self._trades_frame is None:
+            self._trades_frame = Frame({
+                "type": "trades_snapshot",
+                "trades": list(self._trades),
+                "ts": self._trades_ts,
+            })
+        return self._trades_frame
+
+    def _equity_history(self) -> Optional[Frame]:
+        if not self._equity:
+            return None
+        if self._equity_frame is None:
+            self._equity_frame = Frame({"type": "equity_history", "points": list(self._equity)})
+        return self._equity_frame
+
+    def frames(self) -> List[Frame]:
+        batch: List[Frame] = []
+        state = self.state_frame()
+        if state is not None:
+            batch.append(state)
+        equity = self._equity_history()
+        if equity is not None:
+            batch.append(equity)
+        for kind in ("metrics_snapshot", "ticker_snapshot"):
+            if kind in self._latest:
+                batch.append(self._latest[kind])
+        trades = self._trades_snapshot()
+        if trades is not None:
+            batch.append(trades)
+        batch.extend(self._prices.values())
+        return batch
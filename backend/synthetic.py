@@ -0,0 +1,72 @@
+"""Synthetic bookTicker source for benchmarks and offline runs.
+
+Назначение:
+        - `SyntheticPriceSource` заменяет `BinanceBookTickerClient` при
+            `PRICE_SOURCE=synthetic`: генерирует случайное блуждание bid/ask по набору
+            символов с заданной частотой, без сети и ключей. Используется бенчмарком
+            fan-out (`benchmarks/fanout.py`) и для локальной отладки UI.
+
+Контракт:
+        - `async for event in source.run()` — события `BookTickerEvent`, как у
+            `BinanceBookTickerClient`; `ts` — время генерации в миллисекундах (float, для
+            замера задержки доставки).
+        - `await source.stop()` завершает итератор.
+
+Ограничения/Политики:
+        - Частота — суммарно `rate_hz` событий в секунду на символ; события выдаются
+            пачками по тику event loop (`tick` секунд), чтобы генератор не упирался в
+            `asyncio.sleep` на высоких частотах.
+
+ENV/Файлы состояния:
+        - `SYNTHETIC_RATE_HZ` читается в `backend.main`.
+
+Интеграции:
+        - `backend.main.binance_pump` (через `PRICE_SOURCE`).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from typing import AsyncIterator, Dict, Iterable
+
+from .binance_client import BookTickerEvent
+
+
+class SyntheticPriceSource:
+    def __init__(
+        self,
+        symbols: Iterable[str],
+        *,
+        rate_hz: float = 100.0,
+        tick: float = 0.01,
+        seed: int = 7,
+    ) -> None:
+        self.symbols = sorted({s.upper() for s in symbols})
+        self.rate_hz = max(0.1, rate_hz)
+        self.tick = tick
+        self._rng = random.Random(seed)
+        self._prices: Dict[str, float] = {symbol: 100.0 + 10.0 * i for i, symbol in enumerate(self.symbols)}
+        self._stop = asyncio.Event()
+
+    async def stop(self) -> None:
+        self._stop.set()
+
+    async def run(self) -> AsyncIterator[BookTickerEvent]:
+        owed = 0.0
+        last = time.perf_counter()
+        while not self._stop.is_set():
+            await asyncio.sleep(self.tick)
+            now = time.perf_counter()
+            owed += (now - last) * self.rate_hz
+            last = now
+            batch = int(owed)
+            owed -= batch
+            for _ in range(batch):
+                ts = time.time() * 1000
+                for symbol in self.symbols:
+                    price = self._prices[symbol] * (1.0 + self._rng.gauss(0.0, 0.0002))
+                    self._prices[symbol] = price
+                    spread = price * 0.00005
+                    yield BookTickerEvent(symbol, price, price - spread, price + spread, ts)
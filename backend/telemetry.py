@@ -0,0 +1,267 @@
+"""In-process metrics registry rendered in the Prometheus text exposition format.
+
+Назначение:
+        - Счётчики, gauge и гистограммы для горячих путей бэкенда (рассылка хаба,
+            REST-запросы к Binance, итерации поллеров, переподключения WS, очереди
+            клиентов) и их выдача на `GET /metrics` для алертов.
+
+Контракт:
+        - `Counter` / `Gauge` / `Histogram` регистрируются в `REGISTRY` при создании;
+            `metric.labels(path="/fapi/v2/account").observe(0.12)`, без labels —
+            `metric.inc()` / `metric.set()` / `metric.observe()`.
+        - `Gauge(..., callback=fn)` — значение снимается в момент scrape
+            (`fn() -> float` либо `{labels_tuple: float}` для метрики с labels).
+        - `REGISTRY.render()` → текст `text/plain; version=0.0.4`.
+        - `timed(histogram)` — контекстный менеджер для замера длительности в секундах.
+
+Ограничения/Политики:
+        - Без внешних зависимостей (prometheus_client не требуется); все метрики живут
+            в одном event loop, блокировки не нужны.
+        - Кардинальность labels ограничена вызывающим кодом (пути REST из известного
+            набора эндпоинтов, имена поллеров, имена стримов).
+
+ENV/Файлы состояния:
+        - Не читает окружение.
+
+Интеграции:
+        - `backend.hub`, `backend.binance_client`, `backend.user_stream`, `backend.main` (`/metrics`).
+"""
+
+from __future__ import annotations
+
+import math
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+FAST_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05)
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_str(names: Sequence[str], values: LabelValues, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: List["_Metric"] = []
+
+    def register(self, metric: "_Metric") -> None:
+        self._metrics.append(metric)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), *, registry: Registry = REGISTRY) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[LabelValues, object] = {}
+        registry.register(self)
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> List[str]:  # pragma: no cover - overridden
+        raise NotImplementedError
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def labels(self, **labels: str) -> _Value:
+        key = self._key(labels)
+        child = self._children.get(key)
+        if child is None:
+            child = self._children[key] = _Value()
+        return child
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_label_str(self.labelnames, key)} {_format_value(child.value)}"
+            for key, child in self._children.items()
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        *,
+        callback: Optional[Callable[[], object]] = None,
+        registry: Registry = REGISTRY,
+    ) -> None:
+        super().__init__(name, help, labelnames, registry=registry)
+        self.callback = callback
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+    def samples(self) -> List[str]:
+        if self.callback is None:
+            return super().samples()
+        try:
+            value = self.callback()
+        except Exception:  # noqa: broad-except (scrape не должен падать)
+            return []
+        if isinstance(value, dict):
+            return [
+                f"{self.name}{_label_str(self.labelnames, key)} {_format_value(v)}"
+                for key, v in value.items()
+            ]
+        if value is None:
+            return []
+        return [f"{self.name} {_format_value(float(value))}"]
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        *,
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        registry: Registry = REGISTRY,
+    ) -> None:
+        super().__init__(name, help, labelnames, registry=registry)
+        self.buckets = tuple(sorted(buckets))
+
+    def labels(self, **labels: str) -> _HistogramChild:
+        key = self._key(labels)
+        child = self._children.get(key)
+        if child is None:
+            child = self._children[key] = _HistogramChild(self.buckets)
+        return child
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def samples(self) -> List[str]:
+        lines: List[str] = []
+        for key, child in self._children.items():
+            cumulative = 0
+            for bound, count in zip(child.buckets, child.counts):
+                cumulative += count
+                labels = _label_str(self.labelnames, key, ("le", _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _label_str(self.labelnames, key, ("le", "+Inf"))
+            lines.append(f"{self.name}_bucket{labels} {child.count}")
+            plain = _label_str(self.labelnames, key)
+            lines.append(f"{self.name}_sum{plain} {_format_value(child.sum)}")
+            lines.append(f"{self.name}_count{plain} {child.count}")
+        return lines
+
+
+@contextmanager
+def timed(target: _HistogramChild | Histogram) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        target.observe(time.perf_counter() - started)
+
+
+# --- Метрики бэкенда -------------------------------------------------------
+
+WS_BROADCAST_SECONDS = Histogram(
+    "ws_broadcast_seconds",
+    "Time to enqueue one frame to every target client (fan-out).",
+    ["kind"],
+    buckets=FAST_BUCKETS,
+)
+WS_FRAMES_DROPPED = Counter("ws_frames_dropped_total", "Frames dropped by per-client drop-oldest overflow.")
+WS_CLIENTS_DISCONNECTED = Counter(
+    "ws_clients_disconnected_total", "Clients disconnected by the hub.", ["reason"]
+)
+BINANCE_WS_RECONNECTS = Counter(
+    "binance_ws_reconnects_total", "Reconnects of Binance WebSocket streams.", ["stream"]
+)
+BINANCE_BOOKTICKER_SUPERSEDED = Counter(
+    "binance_bookticker_superseded_total",
+    "bookTicker events replaced by a newer quote of the same symbol before being consumed.",
+)
+BINANCE_REST_SECONDS = Histogram(
+    "binance_rest_request_seconds", "Binance REST request latency (after rate-limiter wait).", ["path", "status"]
+)
+BINANCE_REST_LIMITER_WAIT_SECONDS = Histogram(
+    "binance_rest_limiter_wait_seconds", "Time spent waiting for request weight.", ["path"]
+)
+BINANCE_REST_WEIGHT = Counter(
+    "binance_rest_weight_total", "Request weight charged per endpoint.", ["path"]
+)
+BUS_SUBSCRIBERS_DROPPED = Counter(
+    "bus_subscribers_dropped_total", "Fan-out workers disconnected from the ingest bus for lagging."
+)
+POLLER_ITERATION_SECONDS = Histogram(
+    "poller_iteration_seconds", "Duration of one poller iteration (excluding sleep).", ["loop"]
+)
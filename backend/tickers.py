@@ -0,0 +1,73 @@
+"""Symbol-indexed in-memory table of 24h tickers for `ticker_snapshot`.
+
+Назначение:
+        - `TickerTable` хранит последнюю 24h-статистику по каждому символу, которую
+            наполняет all-market стрим `!ticker@arr`, и отдаёт строки для `ticker_snapshot`
+            без REST-запроса на символ.
+
+Контракт:
+        - `update_many(rows)` принимает строки `{'symbol', 'lastPrice', 'priceChangePercent'}`
+            (из WS или bulk REST `/fapi/v1/ticker/24hr` без `symbol`).
+        - `snapshot(symbols)` → строки для запрошенных символов (O(k) по числу символов).
+        - `is_fresh(max_age)` — были ли обновления за последние `max_age` секунд; если нет,
+            вызывающий код делает bulk REST fallback.
+
+Ограничения/Политики:
+        - Стоимость обновления тикеров не зависит от числа позиций: один стрим, один
+            bulk-запрос в fallback.
+
+ENV/Файлы состояния:
+        - Не читает окружение.
+
+Интеграции:
+        - `BinanceTickerArrayClient` и `BinanceFuturesRestClient.get_all_tickers_24h`
+            из `backend.binance_client`.
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Dict, Iterable, List
+
+
+def _to_float(value, default: float = 0.0) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+class TickerTable:
+    def __init__(self) -> None:
+        self._rows: Dict[str, Dict] = {}
+        self.updated_at = 0.0
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def update_many(self, rows: Iterable[Dict]) -> int:
+        count = 0
+        for row in rows:
+            symbol = row.get("symbol")
+            if not symbol:
+                continue
+            self._rows[symbol] = {
+                "symbol": symbol,
+                "lastPrice": _to_float(row.get("lastPrice")),
+                "priceChangePercent": _to_float(row.get("priceChangePercent")),
+            }
+            count += 1
+        if count:
+            self.updated_at = time.monotonic()
+        return count
+
+    def is_fresh(self, max_age: float) -> bool:
+        return bool(self._rows) and time.monotonic() - self.updated_at <= max_age
+
+    def snapshot(self, symbols: Iterable[str]) -> List[Dict]:
+        rows = []
+        for symbol in symbols:
+            row = self._rows.get(symbol.upper())
+            if row is not None:
+                rows.append(row)
+        return rows
@@ -0,0 +1,72 @@
+"""Topics of `/ws` messages for client subscriptions.
+
+Назначение:
+        - Сопоставляет типы сообщений хаба темам, на которые подписывается клиент `/ws`
+            (`{"op": "subscribe", "topics": ["price:BTCUSDT", "metrics"]}`), чтобы
+            многосимвольные дашборды и встраиваемые виджеты получали только то, что рисуют.
+
+Контракт:
+        - Темы: `*` (всё, default), `price` (цены всех символов), `price:<SYMBOL>`,
+            `account`, `positions` (`state_snapshot`/`state_delta` — одно состояние, приходит
+            подписчикам любой из двух тем), `trades`, `metrics`, `tickers`, `equity`,
+            `heartbeat`.
+        - `normalize_topic(raw)` → каноническая тема или `None` для неизвестной.
+        - `message_topics(message)` → кортеж тем сообщения; пустой кортеж — сообщение без
+            темы, его получают все клиенты.
+        - `price_topic(symbol)` → `price:<SYMBOL>`.
+
+Ограничения/Политики:
+        - Набор тем закрытый: неизвестные темы отклоняются и возвращаются клиенту в
+            ответе `subscriptions.invalid`.
+
+ENV/Файлы состояния:
+        - Не читает окружение.
+
+Интеграции:
+        - `backend.hub.Hub` (индекс подписчиков по темам), `backend.main` (`/ws`).
+"""
+
+from __future__ import annotations
+
+from typing import Optional, Tuple
+
+ALL = "*"
+PRICE = "price"
+STATE_TOPICS = ("account", "positions")
+TOPICS = frozenset({ALL, PRICE, *STATE_TOPICS, "trades", "metrics", "tickers", "equity", "heartbeat"})
+
+_BY_TYPE = {
+    "state_snapshot": STATE_TOPICS,
+    "state_delta": STATE_TOPICS,
+    "metrics_snapshot": ("metrics",),
+    "ticker_snapshot": ("tickers",),
+    "trade_executed": ("trades",),
+    "trades_snapshot": ("trades",),
+    "equity_snapshot": ("equity",),
+    "equity_history": ("equity",),
+    "heartbeat": ("heartbeat",),
+}
+
+
+def price_topic(symbol: str) -> str:
+    return f"{PRICE}:{symbol.upper()}"
+
+
+def normalize_topic(raw) -> Optional[str]:
+    if not isinstance(raw, str):
+        return None
+    topic = raw.strip()
+    if topic.lower().startswith(PRICE + ":"):
+        symbol = topic[len(PRICE) + 1:].strip()
+        return price_topic(symbol) if symbol.isalnum() else None
+    topic = topic.lower()
+    return topic if topic in TOPICS else None
+
+
+def message_topics(message: Optional[dict]) -> Tuple[str, ...]:
+    if not message:
+        return ()
+    kind = message.get("type")
+    if kind == "price_update":
+        return (PRICE, price_topic(message.get("symbol") or ""))
+    return _BY_TYPE.get(kind, ())
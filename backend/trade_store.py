@@ -0,0 +1,217 @@
+"""Persistent local store of Binance Futures userTrades with fromId-based sync.
+
+Назначение:
+        - `TradeStore` хранит сырые сделки `/fapi/v1/userTrades` в SQLite (по
+            `Settings.database_url`), чтобы история переживала рестарты и метрики /
+            `trades_snapshot` читались локально.
+        - `sync_trades` догружает только сделки новее максимального id в хранилище
+            (`fromId = last_id + 1`) вместо повторной выкачки последних N сделок.
+
+Контракт:
+        - `TradeStore.from_url("sqlite:///./binance_adviser.db")` — открывает/создаёт БД.
+        - `await store.last_trade_id(symbol)` → `Optional[int]`.
+        - `await store.insert(symbol, trades)` → список реально новых сделок (по возрастанию id).
+        - `await store.recent(symbol, limit)` / `await store.trades(symbol)` → сырые payload'ы
+            в порядке возрастания id.
+        - `await store.history(since_ms)` → сделки всех символов со временем `>= since_ms`
+            в порядке времени (для `backend.analytics`).
+        - `await sync_trades(client, store, symbol)` → новые сделки после синхронизации:
+            страницы `fromId = last_id + 1` (по `limit`) запрашиваются подряд, пока ответ не
+            окажется неполным, — всплеск исполнений между опросами не теряется.
+        - `AdaptivePollInterval(min_interval, max_interval)` — `next(new_count)` → задержка до
+            следующего опроса: `min_interval`, пока приходят сделки, дальше растёт в `factor`
+            раз за пустой опрос до `max_interval`; начальное значение — `max_interval`.
+
+Ограничения/Политики:
+        - Поддерживаются только URL вида `sqlite:///<path>` (и `sqlite:///:memory:`).
+        - Все обращения к SQLite идут через один поток-исполнитель: соединение не
+            используется конкурентно и event loop не блокируется.
+        - Первая синхронизация пустого хранилища берёт последние `bootstrap_limit` сделок
+            (без `fromId`), дальше — только новые.
+        - За один вызов — не больше `max_pages` страниц; остаток догружается следующим
+            (ближайшим, так как новые сделки сбрасывают интервал на минимум) опросом.
+
+ENV/Файлы состояния:
+        - Файл SQLite из `Settings.database_url` (ENV `DATABASE_URL`), таблица `user_trades`.
+
+Интеграции:
+        - `BinanceFuturesRestClient.get_recent_trades(symbol, from_id=..., limit=...)`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS user_trades (
+    symbol TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    time INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (symbol, id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS user_trades_time ON user_trades (time);
+"""
+
+
+def _sqlite_path(url: str) -> str:
+    prefix = "sqlite:///"
+    if not url.startswith(prefix):
+        raise ValueError(f"Trade store supports only sqlite URLs, got {url!r}")
+    return url[len(prefix):] or ":memory:"
+
+
+def _trade_id(trade: Dict) -> Optional[int]:
+    raw = trade.get("id")
+    if raw is None:
+        raw = trade.get("tradeId")
+    if raw is None:
+        return None
+    try:
+        return int(raw)
+    except (TypeError, ValueError):
+        return None
+
+
+class TradeStore:
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="trade-store")
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @classmethod
+    def from_url(cls, url: str) -> "TradeStore":
+        return cls(_sqlite_path(url))
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    async def _run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
+
+    def _last_trade_id(self, symbol: str) -> Optional[int]:
+        row = self._connection().execute(
+            "SELECT MAX(id) FROM user_trades WHERE symbol = ?", (symbol,)
+        ).fetchone()
+        return row[0] if row and row[0] is not None else None
+
+    def _insert(self, symbol: str, trades: List[Dict]) -> List[Dict]:
+        conn = self._connection()
+        fresh: List[Dict] = []
+        with conn:
+            for trade in sorted(trades, key=lambda t: _trade_id(t) or 0):
+                trade_id = _trade_id(trade)
+                if trade_id is None:
+                    continue
+                ts = int(trade.get("time") or 0)
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO user_trades (symbol, id, time, payload) VALUES (?, ?, ?, ?)",
+                    (symbol, trade_id, ts, json.dumps(trade)),
+                )
+                if cursor.rowcount:
+                    fresh.append(trade)
+        return fresh
+
+    def _select(self, symbol: str, limit: Optional[int]) -> List[Dict]:
+        conn = self._connection()
+        if limit is None:
+            rows = conn.execute(
+                "SELECT payload FROM user_trades WHERE symbol = ? ORDER BY id", (symbol,)
+            ).fetchall()
+        else:
+            rows = conn.execute(
+                "SELECT payload FROM user_trades WHERE symbol = ? ORDER BY id DESC LIMIT ?",
+                (symbol, limit),
+            ).fetchall()
+            rows.reverse()
+        return [json.loads(row[0]) for row in rows]
+
+    def _select_since(self, since_ms: int) -> List[Dict]:
+        rows = self._connection().execute(
+            "SELECT payload FROM user_trades WHERE time >= ? ORDER BY time, symbol, id", (since_ms,)
+        ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    async def last_trade_id(self, symbol: str) -> Optional[int]:
+        return await self._run(self._last_trade_id, symbol.upper())
+
+    async def insert(self, symbol: str, trades: Iterable[Dict]) -> List[Dict]:
+        """Store trades, returning only those that were not already present."""
+
+        return await self._run(self._insert, symbol.upper(), list(trades))
+
+    async def recent(self, symbol: str, limit: int = 100) -> List[Dict]:
+        return await self._run(self._select, symbol.upper(), limit)
+
+    async def trades(self, symbol: str) -> List[Dict]:
+        return await self._run(self._select, symbol.upper(), None)
+
+    async def history(self, since_ms: int = 0) -> List[Dict]:
+        return await self._run(self._select_since, since_ms)
+
+    def _close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    async def close(self) -> None:
+        await self._run(self._close)
+        self._executor.shutdown(wait=False)
+
+
+async def sync_trades(
+    client,
+    store: TradeStore,
+    symbol: str,
+    *,
+    limit: int = 1000,
+    bootstrap_limit: int = 500,
+    max_pages: int = 10,
+) -> List[Dict]:
+    """Page fills forward from the store cursor until caught up; return the new ones."""
+
+    symbol = symbol.upper()
+    last_id = await store.last_trade_id(symbol)
+    if last_id is None:
+        trades = await client.get_recent_trades(symbol, limit=bootstrap_limit)
+        return await store.insert(symbol, trades) if trades else []
+
+    new_trades: List[Dict] = []
+    for _ in range(max_pages):
+        page = await client.get_recent_trades(symbol, from_id=last_id + 1, limit=limit, max_age=0)
+        if not page:
+            break
+        new_trades.extend(await store.insert(symbol, page))
+        page_last = max((tid for tid in map(_trade_id, page) if tid is not None), default=None)
+        if len(page) < limit or page_last is None or page_last <= last_id:
+            break
+        last_id = page_last
+    return new_trades
+
+
+class AdaptivePollInterval:
+    """Poll delay that drops to `min_interval` while fills flow and backs off when idle."""
+
+    def __init__(self, min_interval: float, max_interval: float, *, factor: float = 2.0) -> None:
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self.factor = factor
+        # До первых сделок считаем аккаунт простаивающим
+        self.current = self.max_interval
+
+    def next(self, new_trades: int) -> float:
+        if new_trades:
+            self.current = self.min_interval
+        else:
+            self.current = min(self.current * self.factor, self.max_interval)
+        return self.current
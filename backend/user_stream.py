@@ -0,0 +1,227 @@
+"""Binance Futures User Data Stream (listenKey) client and in-memory account model.
+
+Назначение:
+        - `BinanceUserDataStream`: создаёт listenKey, держит его живым (keepalive) и
+            отдаёт события приватного стрима `wss://fstream.binance.com/ws/<listenKey>`.
+        - `AccountState`: модель аккаунта и позиций в памяти; REST-снапшот
+            (`/fapi/v2/account`, `/fapi/v2/positionRisk`) задаёт базу, события
+            `ACCOUNT_UPDATE`/`ORDER_TRADE_UPDATE` и котировки bookTicker применяются поверх.
+
+Контракт:
+        - `AccountState.load_snapshot(account, positions)` — полная замена состояния
+            (начальный снапшот и периодическая сверка).
+        - `account_overview()` / `position_list()` возвращают данные в той же форме, что и
+            REST (`totalWalletBalance`, `positionAmt`, `markPrice`, `unRealizedProfit`, ...),
+            поэтому публикация в `backend.main` не зависит от источника.
+        - `apply_order_update(event)` → сделка в форме `userTrades` для исполнения
+            (`x == "TRADE"`), иначе `None`.
+        - `BinanceUserDataStream.run()` — асинхронный итератор сырых событий (dict);
+            при `listenKeyExpired` или обрыве соединения ключ пересоздаётся.
+
+Ограничения/Политики:
+        - `ACCOUNT_UPDATE` не содержит mark price: он выводится из `ep + up / pa`, а между
+            событиями обновляется по bookTicker (`apply_price`).
+        - Баланс меняется дельтой по активу относительно последнего известного значения,
+            остальные поля аккаунта (available, margin) берутся из последней сверки.
+
+ENV/Файлы состояния:
+        - Базовые URL задаются вызывающим кодом (`BINANCE_WS_URL` в `backend.main`), что
+            позволяет гонять модуль против локального fake WS/REST сервера.
+
+Интеграции:
+        - `BinanceFuturesRestClient.create_listen_key` / `keepalive_listen_key` / `close_listen_key`.
+        - websockets==12.* для приватного стрима.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import websockets
+
+from .encoding import json_loads
+from .telemetry import BINANCE_WS_RECONNECTS
+
+logger = logging.getLogger(__name__)
+
+
+def _to_float(value, default: float = 0.0) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+class AccountState:
+    def __init__(self) -> None:
+        self.ready = False
+        self._account: Dict = {}
+        self._assets: Dict[str, float] = {}
+        self._positions: Dict[Tuple[str, str], Dict] = {}
+
+    def load_snapshot(self, account: Dict, positions: List[Dict]) -> None:
+        self._account = dict(account)
+        self._assets = {
+            asset.get("asset", ""): _to_float(asset.get("walletBalance"))
+            for asset in account.get("assets", []) or []
+            if asset.get("asset")
+        }
+        self._positions = {}
+        for pos in positions or []:
+            symbol = pos.get("symbol")
+            if not symbol:
+                continue
+            self._positions[(symbol, pos.get("positionSide", "BOTH"))] = {
+                "symbol": symbol,
+                "positionSide": pos.get("positionSide", "BOTH"),
+                "positionAmt": _to_float(pos.get("positionAmt")),
+                "entryPrice": _to_float(pos.get("entryPrice")),
+                "markPrice": _to_float(pos.get("markPrice"), _to_float(pos.get("entryPrice"))),
+                "unRealizedProfit": _to_float(pos.get("unRealizedProfit")),
+            }
+        self.ready = True
+        self._refresh_totals()
+
+    def account_overview(self) -> Dict:
+        return dict(self._account)
+
+    def position_list(self) -> List[Dict]:
+        return [dict(pos) for pos in self._positions.values()]
+
+    def _refresh_totals(self) -> None:
+        wallet = _to_float(self._account.get("totalWalletBalance"))
+        unrealized = sum(pos["unRealizedProfit"] for pos in self._positions.values())
+        self._account["totalUnrealizedProfit"] = unrealized
+        self._account["totalMarginBalance"] = wallet + unrealized
+
+    def apply_price(self, symbol: str, price: float) -> bool:
+        """Re-mark open positions of `symbol`; return True if anything changed."""
+
+        changed = False
+        for (pos_symbol, _), pos in self._positions.items():
+            if pos_symbol != symbol or not pos["positionAmt"]:
+                continue
+            pos["markPrice"] = price
+            pos["unRealizedProfit"] = (price - pos["entryPrice"]) * pos["positionAmt"]
+            changed = True
+        if changed:
+            self._refresh_totals()
+        return changed
+
+    def apply_account_update(self, event: Dict) -> None:
+        data = event.get("a") or {}
+        for balance in data.get("B", []) or []:
+            asset = balance.get("a")
+            if not asset:
+                continue
+            wallet = _to_float(balance.get("wb"))
+            previous = self._assets.get(asset, 0.0)
+            self._assets[asset] = wallet
+            total = _to_float(self._account.get("totalWalletBalance"))
+            self._account["totalWalletBalance"] = total + (wallet - previous)
+
+        for raw in data.get("P", []) or []:
+            symbol = raw.get("s")
+            if not symbol:
+                continue
+            side = raw.get("ps", "BOTH")
+            amount = _to_float(raw.get("pa"))
+            entry = _to_float(raw.get("ep"))
+            unrealized = _to_float(raw.get("up"))
+            pos = self._positions.setdefault(
+                (symbol, side),
+                {"symbol": symbol, "positionSide": side, "markPrice": entry},
+            )
+            pos["positionAmt"] = amount
+            pos["entryPrice"] = entry
+            pos["unRealizedProfit"] = unrealized
+            if amount:
+                pos["markPrice"] = entry + unrealized / amount
+        self._refresh_totals()
+
+    def apply_order_update(self, event: Dict) -> Optional[Dict]:
+        order = event.get("o") or {}
+        if order.get("x") != "TRADE":
+            return None
+        trade_id = order.get("t")
+        symbol = order.get("s")
+        if trade_id is None or not symbol:
+            return None
+        price = _to_float(order.get("L"))
+        qty = _to_float(order.get("l"))
+        return {
+            "id": int(trade_id),
+            "symbol": symbol,
+            "orderId": order.get("i"),
+            "side": order.get("S", "BUY"),
+            "price": price,
+            "qty": qty,
+            "quoteQty": price * qty,
+            "realizedPnl": _to_float(order.get("rp")),
+            "commission": _to_float(order.get("n")),
+            "commissionAsset": order.get("N"),
+            "time": order.get("T") or event.get("T") or event.get("E"),
+            "maker": bool(order.get("m", False)),
+            "positionSide": order.get("ps", "BOTH"),
+        }
+
+
+class BinanceUserDataStream:
+    def __init__(
+        self,
+        rest_client,
+        *,
+        ws_base_url: str = "wss://fstream.binance.com",
+        keepalive_interval: float = 30 * 60,
+        reconnect_delay: float = 3.0,
+    ) -> None:
+        self.rest_client = rest_client
+        self.ws_base_url = ws_base_url.rstrip("/")
+        self.keepalive_interval = keepalive_interval
+        self.reconnect_delay = reconnect_delay
+        self._stop = asyncio.Event()
+
+    async def stop(self) -> None:
+        self._stop.set()
+
+    async def _keepalive(self) -> None:
+        while True:
+            await asyncio.sleep(self.keepalive_interval)
+            try:
+                await self.rest_client.keepalive_listen_key()
+            except RuntimeError as exc:
+                logger.warning("listenKey keepalive failed: %s", exc)
+
+    async def run(self) -> AsyncIterator[Dict]:
+        attempts = 0
+        while not self._stop.is_set():
+            if attempts:
+                BINANCE_WS_RECONNECTS.labels(stream="user_data").inc()
+            attempts += 1
+            keepalive: Optional[asyncio.Task] = None
+            try:
+                listen_key = await self.rest_client.create_listen_key()
+                keepalive = asyncio.create_task(self._keepalive())
+                url = f"{self.ws_base_url}/ws/{listen_key}"
+                async with websockets.connect(url, ping_interval=20, ping_timeout=20) as ws:
+                    async for msg in ws:
+                        if self._stop.is_set():
+                            break
+                        try:
+                            event = json_loads(msg)
+                        except ValueError:
+                            continue
+                        if event.get("e") == "listenKeyExpired":
+                            logger.info("listenKey expired; reconnecting user data stream")
+                            break
+                        yield event
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.warning("User data stream error: %s", exc)
+                await asyncio.sleep(self.reconnect_delay)
+            finally:
+                if keepalive is not None:
+                    keepalive.cancel()
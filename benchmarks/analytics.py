@@ -0,0 +1,138 @@
+"""Benchmark: `compute_metrics` (Python lists) vs columnar `backend.analytics` (NumPy).
+
+Назначение:
+        - Показать, как растёт время расчёта метрик с размером истории сделок и где
+            окупается колоночный путь: отдельно загрузка в колонки (разовая) и расчёт по
+            уже загруженным колонкам (повторные запросы, диапазоны, разбивки).
+
+Контракт:
+        - Для каждого N из `--sizes` генерируются N синтетических сделок `userTrades`
+            (фиксированный seed, несколько символов, ~30% микро-сделок), затем лучшее из
+            `--repeat` прогонов:
+            `compute_metrics` — текущий путь; `load` — `TradeColumns.from_trades`;
+            `analytics` — `compute_analytics` по загруженным колонкам.
+        - Перед замером проверяется, что общие ключи совпадают с `compute_metrics`
+            (относительная точность 1e-9); при расхождении — код возврата 1.
+        - Вывод — таблица мс и ускорение; `--json` печатает результат JSON.
+
+CLI/Примеры:
+        `python -m benchmarks.analytics`
+        `python -m benchmarks.analytics --sizes 1000,50000,500000 --repeat 3 --json`
+
+Ограничения/Политики:
+        - Требует NumPy. Однопоточный замер; сравнивать прогоны стоит на одной машине.
+
+ENV/Файлы состояния:
+        - Не читает окружение.
+
+Интеграции:
+        - `backend.metrics.compute_metrics`, `backend.analytics`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import platform
+import random
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+from backend.analytics import TradeColumns, available, compute_analytics, np
+from backend.metrics import compute_metrics
+
+SYMBOLS = ["BTCUSDT", "ETHUSDT", "SOLUSDT", "BNBUSDT", "XRPUSDT"]
+METRIC_ARGS = {"equity": 10_500.0, "baseline_equity": 10_000.0, "unrealized_total": 12.5}
+
+
+def _trades(count: int) -> List[dict]:
+    rng = random.Random(11)
+    trades = []
+    ts = 1_700_000_000_000
+    for trade_id in range(count):
+        price = rng.uniform(10, 60_000)
+        qty = rng.uniform(0.001, 2.0)
+        pnl = 0.0 if rng.random() < 0.3 else rng.gauss(0.5, 25.0)
+        ts += rng.randint(1_000, 60_000)
+        trades.append({
+            "symbol": SYMBOLS[trade_id % len(SYMBOLS)],
+            "id": trade_id,
+            "price": f"{price:.2f}",
+            "qty": f"{qty:.3f}",
+            "quoteQty": f"{price * qty:.4f}",
+            "realizedPnl": f"{pnl:.6f}",
+            "time": ts,
+        })
+    return trades
+
+
+def _best(fn: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def _mismatches(trades: List[dict]) -> List[str]:
+    reference = compute_metrics(trades, **METRIC_ARGS)
+    columnar = compute_analytics(TradeColumns.from_trades(trades), **METRIC_ARGS)
+    return [
+        key for key, value in reference.items()
+        if not math.isclose(value, columnar[key], rel_tol=1e-9, abs_tol=1e-9)
+    ]
+
+
+def run(sizes: List[int], repeat: int) -> List[Dict]:
+    results = []
+    for size in sizes:
+        trades = _trades(size)
+        mismatched = _mismatches(trades)
+        columns = TradeColumns.from_trades(trades)
+        baseline_ms = _best(lambda: compute_metrics(trades, **METRIC_ARGS), repeat)
+        load_ms = _best(lambda: TradeColumns.from_trades(trades), repeat)
+        analytics_ms = _best(lambda: compute_analytics(columns, **METRIC_ARGS), repeat)
+        results.append({
+            "trades": size,
+            "compute_metrics_ms": round(baseline_ms, 3),
+            "load_ms": round(load_ms, 3),
+            "analytics_ms": round(analytics_ms, 3),
+            "speedup_compute": round(baseline_ms / analytics_ms, 2) if analytics_ms else None,
+            "speedup_with_load": round(baseline_ms / (load_ms + analytics_ms), 2),
+            "mismatched": mismatched,
+        })
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="compute_metrics vs columnar NumPy analytics.")
+    parser.add_argument("--sizes", default="1000,10000,50000,200000")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+    if not available():
+        print("numpy is not installed", file=sys.stderr)
+        return 2
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    results = run(sizes, args.repeat)
+    if args.json:
+        meta = {"python": platform.python_version(), "numpy": np.__version__, "repeat": args.repeat}
+        print(json.dumps({"meta": meta, "results": results}, indent=2))
+    else:
+        print(f"[analytics] python {platform.python_version()}, numpy {np.__version__}")
+        print(f"  {'trades':>8} {'compute_metrics':>16} {'load':>10} {'analytics':>10} {'x compute':>10} {'x total':>8}")
+        for row in results:
+            print(
+                f"  {row['trades']:>8} {row['compute_metrics_ms']:>14.1f}ms {row['load_ms']:>8.1f}ms "
+                f"{row['analytics_ms']:>8.1f}ms {row['speedup_compute']:>10} {row['speedup_with_load']:>8}"
+                + (f"  MISMATCH {row['mismatched']}" if row["mismatched"] else "")
+            )
+    return 1 if any(row["mismatched"] for row in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
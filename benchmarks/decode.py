@@ -0,0 +1,167 @@
+"""Microbenchmark: per-event cost of decoding bookTicker frames and encoding price_update.
+
+Назначение:
+        - Показать, сколько стоит одно событие рынка на горячем пути бэкенда: разбор
+            фрейма Binance, построение события и кодирование `price_update` для клиентов,
+            и сравнить быстрый путь с исходным (stdlib `json` + промежуточные dict).
+
+Контракт:
+        - Кейсы (нс на событие, лучшее из `--repeat` прогонов по `--events` фреймов):
+            `legacy_parse` — `json.loads` + dict-событие с fallback-цепочкой `dict.get`;
+            `parse` — `BinanceBookTickerClient._parse` (`json_loads` → `BookTickerEvent`);
+            `legacy_encode` / `encode` — `price_update` через `json.dumps` и через
+            `backend.encoding.json_dumps` (orjson, если установлен);
+            `pipeline` / `legacy_pipeline` — разбор + кодирование вместе.
+        - Вывод — таблица (нс/событие, событий/с на ядро); `--json` печатает результат JSON.
+
+CLI/Примеры:
+        `python -m benchmarks.decode`
+        `python -m benchmarks.decode --events 200000 --repeat 7 --json`
+
+Ограничения/Политики:
+        - Однопоточный замер в текущем интерпретаторе; сравнивать прогоны стоит на одной
+            машине. Сеть, event loop и рассылка хаба не участвуют (см. `benchmarks/fanout.py`).
+
+ENV/Файлы состояния:
+        - Не читает окружение.
+
+Интеграции:
+        - `backend.binance_client` (разбор), `backend.encoding` (JSON-кодек, orjson).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+from backend.binance_client import BinanceBookTickerClient, BookTickerEvent
+from backend.encoding import json_dumps, orjson
+
+SYMBOLS = ["BTCUSDT", "ETHUSDT", "SOLUSDT", "BNBUSDT", "XRPUSDT", "DOGEUSDT", "ADAUSDT", "LINKUSDT"]
+
+
+def _frames(count: int) -> List[str]:
+    rng = random.Random(7)
+    frames = []
+    update_id = 400900217
+    ts = 1_700_000_000_000
+    for i in range(count):
+        symbol = SYMBOLS[i % len(SYMBOLS)]
+        price = 100.0 + rng.random() * 50_000
+        update_id += 1
+        ts += rng.randint(0, 3)
+        frames.append(json.dumps({
+            "stream": f"{symbol.lower()}@bookTicker",
+            "data": {
+                "e": "bookTicker", "u": update_id, "s": symbol,
+                "b": f"{price:.2f}", "B": f"{rng.random() * 10:.3f}",
+                "a": f"{price + 0.1:.2f}", "A": f"{rng.random() * 10:.3f}",
+                "T": ts - 2, "E": ts,
+            },
+        }, separators=(",", ":")))
+    return frames
+
+
+def _legacy_parse(msg, streams: Dict[str, str]) -> Optional[dict]:
+    envelope = json.loads(msg)
+    data = envelope.get("data", envelope)
+    stream = envelope.get("stream")
+    s = streams.get(stream) if stream else None
+    if s is None:
+        s = data.get("s") or data.get("S")
+    b = data.get("b")
+    a = data.get("a")
+    t = data.get("E") or data.get("T") or int(time.time() * 1000)
+    if s is None or b is None or a is None:
+        return None
+    bid = float(b)
+    ask = float(a)
+    return {"symbol": s, "price": (bid + ask) / 2.0, "bid": bid, "ask": ask, "ts": t}
+
+
+def _legacy_payload(event: dict) -> str:
+    payload = {
+        "type": "price_update",
+        "symbol": event["symbol"],
+        "price": event["price"],
+        "ts": int(event["ts"]) // 1000,
+        "tsMs": event["ts"],
+    }
+    if "bid" in event:
+        payload["bid"] = event["bid"]
+    if "ask" in event:
+        payload["ask"] = event["ask"]
+    return json.dumps(payload)
+
+
+def _payload(event: BookTickerEvent) -> str:
+    return json_dumps({
+        "type": "price_update",
+        "symbol": event.symbol,
+        "price": event.price,
+        "ts": int(event.ts) // 1000,
+        "tsMs": event.ts,
+        "bid": event.bid,
+        "ask": event.ask,
+    })
+
+
+def _bench(fn: Callable[[], None], events: int, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best / events * 1e9
+
+
+def run(events: int, repeat: int) -> Dict[str, float]:
+    frames = _frames(events)
+    streams = {f"{s.lower()}@bookTicker": s for s in SYMBOLS}
+    parse = BinanceBookTickerClient._parse
+    legacy_events = [_legacy_parse(f, streams) for f in frames]
+    new_events = [parse(f, streams) for f in frames]
+
+    cases = {
+        "legacy_parse": lambda: [_legacy_parse(f, streams) for f in frames],
+        "parse": lambda: [parse(f, streams) for f in frames],
+        "legacy_encode": lambda: [_legacy_payload(e) for e in legacy_events],
+        "encode": lambda: [_payload(e) for e in new_events],
+        "legacy_pipeline": lambda: [_legacy_payload(_legacy_parse(f, streams)) for f in frames],
+        "pipeline": lambda: [_payload(parse(f, streams)) for f in frames],
+    }
+    return {name: _bench(fn, events, repeat) for name, fn in cases.items()}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Per-event decode/encode cost of the market data path.")
+    parser.add_argument("--events", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    results = run(args.events, args.repeat)
+    meta = {
+        "python": platform.python_version(),
+        "orjson": getattr(orjson, "__version__", None),
+        "events": args.events,
+        "repeat": args.repeat,
+    }
+    if args.json:
+        print(json.dumps({"meta": meta, "ns_per_event": {k: round(v, 1) for k, v in results.items()}}, indent=2))
+        return 0
+    print(f"[decode] python {meta['python']}, orjson {meta['orjson'] or 'not installed'}, {args.events} events")
+    for name, ns in results.items():
+        print(f"  {name:<16} {ns:>9.1f} ns/event  {1e9 / ns:>12,.0f} events/s")
+    speedup = results["legacy_pipeline"] / results["pipeline"]
+    print(f"  pipeline speedup x{speedup:.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,439 @@
+"""Fan-out benchmark: one backend with a synthetic price source and N `/ws` clients.
+
+Назначение:
+        - Измерить, сколько клиентов дашборда выдерживает один процесс бэкенда:
+            задержку доставки `price_update`, сообщения в секунду, CPU и RSS сервера
+            при смеси быстрых и намеренно медленных читателей.
+        - Сохранять результаты в JSON, сравнимый между коммитами (`--compare`), чтобы
+            ловить регрессии `Hub.broadcast`.
+
+Контракт:
+        - Для каждого N из `--clients` поднимается свежий `uvicorn backend.main:app` с
+            `PRICE_SOURCE=synthetic` (без ключей Binance и без сети), к нему подключаются N
+            клиентов из `--client-procs` процессов; доля `--slow-fraction` читает с
+            паузой `--slow-delay` секунд после каждого сообщения.
+        - Задержка = время получения клиентом − `tsMs` события (один хост, общие часы);
+            включает ожидание flush конфлейтера (до `1/--rate` секунд).
+        - Результат: `benchmarks/results/fanout-<commit>-<UTC время>.json`
+            `{"meta": {...}, "results": [{"clients", "msgs_per_sec", "latency_ms": {p50, p90,
+            p99, p999, max}, "server_cpu_percent", "server_rss_mb", ...}]}`.
+        - `--compare base.json new.json [--threshold 0.15]` печатает разницу по каждому N и
+            возвращает код 1, если p99/msgs_per_sec/CPU ухудшились больше порога.
+
+CLI/Примеры:
+        `python -m benchmarks.fanout --clients 1,10,100,1000,5000 --duration 10`
+        `python -m benchmarks.fanout --clients 100,1000 --replay md.tsv.gz --replay-speed max`
+        `python -m benchmarks.fanout --compare benchmarks/results/a.json benchmarks/results/b.json`
+
+Ограничения/Политики:
+        - Только Linux (CPU/RSS читаются из `/proc`, если не установлен `psutil`).
+        - Клиенты и сервер делят одну машину: при больших N клиентские процессы сами
+            потребляют CPU — число процессов задаётся `--client-procs`.
+        - Задержки собираются reservoir-выборкой (до `--max-samples` на процесс).
+
+ENV/Файлы состояния:
+        - Серверу передаются `PRICE_SOURCE=synthetic`, `SYNTHETIC_RATE_HZ`, `BINANCE_SYMBOLS`,
+            пустые `BINANCE_API_KEY`/`BINANCE_API_SECRET` и `EQUITY_LOG_PATH`.
+        - С `--replay PATH` сервер получает `PRICE_SOURCE=replay`, `REPLAY_PATH`,
+            `REPLAY_SPEED` (`--replay-speed`) и `REPLAY_LOOP=true`: записанный рынок вместо
+            синтетики; задержка считается от момента воспроизведения фрейма.
+        - Результаты — `benchmarks/results/` (или `--out`).
+
+Интеграции:
+        - `backend.synthetic.SyntheticPriceSource` / `backend.replay.ReplayPriceSource`
+            (через `PRICE_SOURCE`), websockets==12.*.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import multiprocessing as mp
+import os
+import platform
+import random
+import resource
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import websockets
+
+try:  # optional dependency
+    import psutil
+except ImportError:  # pragma: no cover - depends on environment
+    psutil = None
+
+ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = ROOT / "benchmarks" / "results"
+SYMBOLS = ["BTCUSDT", "ETHUSDT", "SOLUSDT", "BNBUSDT", "XRPUSDT", "DOGEUSDT", "ADAUSDT", "AVAXUSDT"]
+
+
+# --- Сервер -----------------------------------------------------------------
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _start_server(port: int, args: argparse.Namespace) -> subprocess.Popen:
+    env = dict(os.environ)
+    env.update({
+        "PRICE_SOURCE": "replay" if args.replay else "synthetic",
+        "SYNTHETIC_RATE_HZ": str(args.source_rate),
+        "REPLAY_PATH": os.path.abspath(args.replay) if args.replay else "",
+        "REPLAY_SPEED": args.replay_speed,
+        "REPLAY_LOOP": "true",
+        "BINANCE_SYMBOL": SYMBOLS[0],
+        "BINANCE_SYMBOLS": ",".join(SYMBOLS[: args.symbols]),
+        "BINANCE_API_KEY": "",
+        "BINANCE_API_SECRET": "",
+        "EQUITY_LOG_PATH": "",
+        "PRICE_MAX_RATE_HZ": str(max(args.rate, 60)),
+        "WS_CLIENT_QUEUE_SIZE": str(args.queue_size),
+    })
+    cmd = [
+        sys.executable, "-m", "uvicorn", "backend.main:app",
+        "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning",
+    ]
+    proc = subprocess.Popen(cmd, cwd=ROOT, env=env)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1):
+                return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError("backend did not become ready within 30s")
+
+
+class _ProcSampler:
+    """CPU seconds and RSS of the server process (psutil or /proc)."""
+
+    def __init__(self, pid: int) -> None:
+        self.pid = pid
+        self._proc = psutil.Process(pid) if psutil is not None else None
+
+    def cpu_seconds(self) -> float:
+        if self._proc is not None:
+            times = self._proc.cpu_times()
+            return times.user + times.system
+        with open(f"/proc/{self.pid}/stat") as fh:
+            fields = fh.read().rsplit(")", 1)[1].split()
+        ticks = os.sysconf("SC_CLK_TCK")
+        return (int(fields[11]) + int(fields[12])) / ticks
+
+    def rss_mb(self) -> float:
+        if self._proc is not None:
+            return self._proc.memory_info().rss / 1_048_576
+        with open(f"/proc/{self.pid}/status") as fh:
+            for line in fh:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+        return 0.0
+
+
+# --- Клиенты ----------------------------------------------------------------
+
+
+def _raise_fd_limit() -> None:
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+async def _client(url: str, slow_delay: float, window: Dict, stats: Dict, reservoir: List[float], rng: random.Random,
+                  max_samples: int) -> None:
+    try:
+        async with websockets.connect(url, max_size=None, ping_interval=None, open_timeout=60, max_queue=32) as ws:
+            stats["connected"] += 1
+            await window["ready"]
+            async for raw in ws:
+                now = time.time()
+                if now >= window["end"]:
+                    break
+                if now >= window["start"]:
+                    stats["messages"] += 1
+                    if not slow_delay:
+                        msg = json.loads(raw)
+                        if msg.get("type") == "price_update" and "tsMs" in msg:
+                            latency = now * 1000 - msg["tsMs"]
+                            stats["samples_seen"] += 1
+                            if len(reservoir) < max_samples:
+                                reservoir.append(latency)
+                            else:
+                                slot = rng.randrange(stats["samples_seen"])
+                                if slot < max_samples:
+                                    reservoir[slot] = latency
+                if slow_delay:
+                    await asyncio.sleep(slow_delay)
+            if time.time() < window["end"]:
+                stats["disconnected"] += 1  # сервер закрыл соединение (переполнение очереди)
+    except websockets.ConnectionClosed:
+        stats["disconnected"] += 1
+    except asyncio.CancelledError:
+        raise
+    except Exception:  # noqa: broad-except (отказ рукопожатия, лимит fd)
+        stats["errors"] += 1
+
+
+async def _run_clients(url: str, fast: int, slow: int, args: Dict, barrier, conn) -> None:
+    loop = asyncio.get_running_loop()
+    ready = loop.create_future()
+    window = {"ready": ready, "start": float("inf"), "end": float("inf")}
+    stats = {"connected": 0, "messages": 0, "samples_seen": 0, "disconnected": 0, "errors": 0}
+    reservoir: List[float] = []
+    rng = random.Random(os.getpid())
+    tasks = []
+    for i in range(fast + slow):
+        delay = args["slow_delay"] if i >= fast else 0.0
+        tasks.append(asyncio.create_task(
+            _client(url, delay, window, stats, reservoir, rng, args["max_samples"])
+        ))
+        if i % 100 == 99:
+            await asyncio.sleep(0)  # не душим accept сервера пачкой из тысяч рукопожатий
+    while stats["connected"] + stats["errors"] < fast + slow:
+        await asyncio.sleep(0.05)
+    # Все процессы подключились — общее окно замера
+    await loop.run_in_executor(None, barrier.wait)
+    window["start"] = time.time() + args["warmup"]
+    window["end"] = window["start"] + args["duration"]
+    ready.set_result(None)
+    await asyncio.sleep(args["warmup"] + args["duration"] + 0.5)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    conn.send({"stats": stats, "latencies": reservoir})
+
+
+def _client_worker(url: str, fast: int, slow: int, args: Dict, barrier, conn) -> None:
+    _raise_fd_limit()
+    asyncio.run(_run_clients(url, fast, slow, args, barrier, conn))
+
+
+# --- Прогон -----------------------------------------------------------------
+
+
+def _percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))
+    return round(ordered[index], 3)
+
+
+def _split(total: int, parts: int) -> List[int]:
+    return [total // parts + (1 if i < total % parts else 0) for i in range(parts)]
+
+
+def run_case(clients: int, args: argparse.Namespace) -> Dict:
+    port = _free_port()
+    server = _start_server(port, args)
+    sampler = _ProcSampler(server.pid)
+    try:
+        procs = args.client_procs or max(1, min(os.cpu_count() or 1, -(-clients // 500)))
+        procs = min(procs, clients)
+        slow_total = int(round(clients * args.slow_fraction))
+        fast_parts = _split(clients - slow_total, procs)
+        slow_parts = _split(slow_total, procs)
+        url = f"ws://127.0.0.1:{port}/ws?rate={args.rate}"
+        worker_args = {
+            "slow_delay": args.slow_delay,
+            "warmup": args.warmup,
+            "duration": args.duration,
+            "max_samples": args.max_samples,
+        }
+        barrier = mp.Barrier(procs + 1)
+        workers = []
+        pipes = []
+        for fast, slow in zip(fast_parts, slow_parts):
+            parent, child = mp.Pipe(duplex=False)
+            proc = mp.Process(target=_client_worker, args=(url, fast, slow, worker_args, barrier, child))
+            proc.start()
+            workers.append(proc)
+            pipes.append(parent)
+
+        connect_started = time.monotonic()
+        barrier.wait(timeout=300)
+        connect_seconds = time.monotonic() - connect_started
+        time.sleep(args.warmup)
+        cpu_start = sampler.cpu_seconds()
+        time.sleep(args.duration)
+        cpu_used = sampler.cpu_seconds() - cpu_start
+        rss = sampler.rss_mb()
+
+        totals = {"connected": 0, "messages": 0, "disconnected": 0, "errors": 0}
+        latencies: List[float] = []
+        for parent in pipes:
+            report = parent.recv()
+            for key in totals:
+                totals[key] += report["stats"][key]
+            latencies.extend(report["latencies"])
+        for proc in workers:
+            proc.join(timeout=30)
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+    return {
+        "clients": clients,
+        "slow_clients": slow_total,
+        "client_procs": procs,
+        "connect_seconds": round(connect_seconds, 3),
+        "connected": totals["connected"],
+        "disconnected": totals["disconnected"],
+        "errors": totals["errors"],
+        "messages": totals["messages"],
+        "msgs_per_sec": round(totals["messages"] / args.duration, 1),
+        "latency_ms": {
+            "samples": len(latencies),
+            "p50": _percentile(latencies, 0.50),
+            "p90": _percentile(latencies, 0.90),
+            "p99": _percentile(latencies, 0.99),
+            "p999": _percentile(latencies, 0.999),
+            "max": round(max(latencies), 3) if latencies else None,
+        },
+        "server_cpu_percent": round(cpu_used / args.duration * 100, 1),
+        "server_rss_mb": round(rss, 1),
+    }
+
+
+def _git_commit() -> Dict:
+    def git(*cmd: str) -> str:
+        try:
+            return subprocess.run(["git", *cmd], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return ""
+
+    return {"commit": git("rev-parse", "--short", "HEAD") or "unknown", "dirty": bool(git("status", "--porcelain", "backend"))}
+
+
+def run(args: argparse.Namespace) -> Path:
+    _raise_fd_limit()
+    git = _git_commit()
+    started = datetime.now(timezone.utc)
+    results = []
+    for clients in args.clients:
+        print(f"[fanout] {clients} clients ...", flush=True)
+        result = run_case(clients, args)
+        results.append(result)
+        lat = result["latency_ms"]
+        print(
+            f"[fanout] {clients:>5} clients: {result['msgs_per_sec']:>10} msg/s  "
+            f"p50={lat['p50']}ms p99={lat['p99']}ms  cpu={result['server_cpu_percent']}%  "
+            f"rss={result['server_rss_mb']}MB  disconnected={result['disconnected']}",
+            flush=True,
+        )
+    payload = {
+        "meta": {
+            **git,
+            "timestamp": started.isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "params": {
+                "rate_hz": args.rate,
+                "source_rate_hz": args.source_rate,
+                "symbols": args.symbols,
+                "slow_fraction": args.slow_fraction,
+                "slow_delay": args.slow_delay,
+                "duration": args.duration,
+                "warmup": args.warmup,
+                "queue_size": args.queue_size,
+                "replay": os.path.basename(args.replay) if args.replay else None,
+                "replay_speed": args.replay_speed if args.replay else None,
+            },
+        },
+        "results": results,
+    }
+    out_dir = Path(args.out)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    path = out_dir / f"fanout-{git['commit']}-{started.strftime('%Y%m%dT%H%M%SZ')}.json"
+    path.write_text(json.dumps(payload, indent=2) + "\n")
+    print(f"[fanout] results written to {path}")
+    return path
+
+
+# --- Сравнение --------------------------------------------------------------
+
+# (ключ, извлечение, True если больше — хуже)
+_COMPARED = (
+    ("p99_ms", lambda r: r["latency_ms"]["p99"], True),
+    ("p50_ms", lambda r: r["latency_ms"]["p50"], True),
+    ("msgs_per_sec", lambda r: r["msgs_per_sec"], False),
+    ("cpu_percent", lambda r: r["server_cpu_percent"], True),
+    ("rss_mb", lambda r: r["server_rss_mb"], True),
+)
+
+
+def compare(base_path: str, new_path: str, threshold: float) -> int:
+    base = json.loads(Path(base_path).read_text())
+    new = json.loads(Path(new_path).read_text())
+    if base["meta"].get("params") != new["meta"].get("params"):
+        print("[fanout] warning: runs used different parameters; comparison may be misleading")
+    base_by_n = {r["clients"]: r for r in base["results"]}
+    regressions = 0
+    print(f"{'clients':>7}  {'metric':<13} {'base':>12} {'new':>12} {'change':>8}")
+    for result in new["results"]:
+        old = base_by_n.get(result["clients"])
+        if old is None:
+            continue
+        for name, extract, higher_is_worse in _COMPARED:
+            a, b = extract(old), extract(result)
+            if a is None or b is None:
+                continue
+            change = (b - a) / a if a else 0.0
+            worse = change > threshold if higher_is_worse else change < -threshold
+            # RSS и p50 — справочно, регрессией считаются p99, пропускная способность и CPU
+            flagged = worse and name in ("p99_ms", "msgs_per_sec", "cpu_percent")
+            regressions += flagged
+            marker = "  REGRESSION" if flagged else ""
+            print(f"{result['clients']:>7}  {name:<13} {a:>12} {b:>12} {change:>+7.1%}{marker}")
+    return 1 if regressions else 0
+
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--clients", default="1,10,100,1000",
+                        type=lambda raw: [int(x) for x in raw.split(",") if x.strip()],
+                        help="comma-separated client counts (up to 5000)")
+    parser.add_argument("--slow-fraction", type=float, default=0.1)
+    parser.add_argument("--slow-delay", type=float, default=0.25, help="seconds slow readers pause per message")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--warmup", type=float, default=2.0)
+    parser.add_argument("--rate", type=float, default=20.0, help="price_update rate per client (/ws?rate=)")
+    parser.add_argument("--source-rate", type=float, default=100.0, help="synthetic updates/s per symbol")
+    parser.add_argument("--symbols", type=int, default=5, choices=range(1, len(SYMBOLS) + 1), metavar="1-8")
+    parser.add_argument("--queue-size", type=int, default=256, help="WS_CLIENT_QUEUE_SIZE for the server")
+    parser.add_argument("--client-procs", type=int, default=0, help="client processes (0 = auto)")
+    parser.add_argument("--max-samples", type=int, default=20_000, help="latency samples kept per client process")
+    parser.add_argument("--replay", metavar="PATH", help="replay a recorded market (backend.replay) instead of synthetic prices")
+    parser.add_argument("--replay-speed", default="1", help="replay speed: 1, N or max")
+    parser.add_argument("--out", default=str(RESULTS_DIR))
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"))
+    parser.add_argument("--threshold", type=float, default=0.15, help="relative change counted as regression")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = _parse_args(argv)
+    if args.compare:
+        return compare(args.compare[0], args.compare[1], args.threshold)
+    run(args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
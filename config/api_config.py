@@ -69,6 +69,19 @@ class APILimits:
     cancel_order_weight: int = 1
     order_book_weight: int = 1
 
+    # Futures Request Weights (USDⓈ-M, вес без параметров/с symbol)
+    futures_endpoint_weights: Dict[str, int] = field(default_factory=lambda: {
+        "/fapi/v1/ping": 1,
+        "/fapi/v2/account": 5,
+        "/fapi/v2/positionRisk": 5,
+        "/fapi/v1/userTrades": 5,
+        "/fapi/v1/income": 30,
+        "/fapi/v1/ticker/24hr": 1,
+        "/fapi/v1/listenKey": 1,
+    })
+    # /fapi/v1/ticker/24hr без symbol (все рынки)
+    futures_ticker_24h_all_weight: int = 40
+
 
 @dataclass 
 class APIConfig:
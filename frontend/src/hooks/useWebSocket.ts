@@ -13,8 +13,10 @@ export function useWebSocket({ url, autoReconnect = true, reconnectDelayMs = 200
   const setConnected = useTradingStore(s => s.setConnected)
   // actions
   const addEquityPoint = useTradingStore(s => s.addEquityPoint)
+  const setEquityData = useTradingStore(s => s.setEquityData)
   const updatePrice = useTradingStore(s => s.updatePrice)
-  const upsertPosition = useTradingStore(s => s.upsertPosition)
+  const setPositions = useTradingStore(s => s.setPositions)
+  const applyStateDelta = useTradingStore(s => s.applyStateDelta)
   const prependTrade = useTradingStore(s => s.prependTrade)
   const setTrades = useTradingStore(s => s.setTrades)
   const setMetrics = useTradingStore(s => s.setMetrics)
@@ -29,6 +31,10 @@ export function useWebSocket({ url, autoReconnect = true, reconnectDelayMs = 200
       try {
         const ws = new WebSocket(url)
         wsRef.current = ws
+        // epoch/seq of the last applied state_snapshot/state_delta (server deltas start at 1)
+        let stateEpoch: string | null = null
+        let stateSeq = 0
+        let resyncPending = false
 
         ws.onopen = () => {
           setConnected(true)
@@ -44,8 +50,28 @@ export function useWebSocket({ url, autoReconnect = true, reconnectDelayMs = 200
                 updatePrice(norm, msg.price)
                 break
               }
-              case 'position_update':
-                upsertPosition(msg.position)
+              case 'state_snapshot':
+                setAccount(msg.account)
+                setPositions(msg.positions)
+                stateEpoch = msg.epoch
+                stateSeq = msg.seq
+                resyncPending = false
+                break
+              case 'state_delta':
+                if (msg.epoch === stateEpoch && msg.seq <= stateSeq) {
+                  break
+                }
+                if (msg.epoch !== stateEpoch || msg.seq !== stateSeq + 1) {
+                  // Gap (frames dropped for a slow client) or a new server epoch whose seq
+                  // restarted: ask once for a full state_snapshot
+                  if (!resyncPending) {
+                    resyncPending = true
+                    ws.send(JSON.stringify({ op: 'resync' }))
+                  }
+                  break
+                }
+                applyStateDelta(msg)
+                stateSeq = msg.seq
                 break
               case 'trade_executed':
                 prependTrade(msg.trade)
@@ -62,15 +88,21 @@ export function useWebSocket({ url, autoReconnect = true, reconnectDelayMs = 200
                   unrealizedPnl: msg.unrealizedPnl,
                 })
                 break
+              case 'equity_history':
+                setEquityData(msg.points.map(p => ({
+                  timestamp: p.time * 1000,
+                  time: new Date(p.time * 1000).toISOString(),
+                  equity: p.equity,
+                  balance: p.balance,
+                  unrealizedPnl: p.unrealizedPnl,
+                })))
+                break
               case 'metrics_snapshot':
                 setMetrics(msg.metrics)
                 break
               case 'ticker_snapshot':
                 setTickers(msg.tickers)
                 break
-              case 'account_snapshot':
-                setAccount(msg.account)
-                break
               case 'heartbeat':
                 // no-op for now
                 break
@@ -1,5 +1,5 @@
 import { create } from 'zustand'
-import type { Position, Trade, Metrics, EquityPoint, TickerData, AccountSummary } from '@/types'
+import type { Position, Trade, Metrics, EquityPoint, TickerData, AccountSummary, StateDelta } from '@/types'
 
 interface TradingState {
   // Data
@@ -27,6 +27,7 @@ interface TradingState {
   updatePrice: (symbol: string, price: number) => void
   setConnected: (connected: boolean) => void
   setAccount: (account: AccountSummary) => void
+  applyStateDelta: (delta: StateDelta) => void
 }
 
 export const useTradingStore = create<TradingState>((set) => ({
@@ -84,7 +85,17 @@ export const useTradingStore = create<TradingState>((set) => ({
   setTrades: (trades) => set({ trades }),
   prependTrade: (trade) => set((state) => ({ trades: [trade, ...state.trades].slice(0, 1000) })),
   setMetrics: (metrics) => set({ metrics }),
-  setEquityData: (data) => set({ equityData: data }),
+  setEquityData: (data) => set((state) => {
+    const last = data[data.length - 1]
+    if (!last) {
+      return { equityData: data }
+    }
+    return {
+      equityData: data,
+      currentEquity: last.equity,
+      balance: typeof last.balance === 'number' ? last.balance : state.balance,
+    }
+  }),
   addEquityPoint: (point) => set((state) => {
     const filtered = state.equityData.filter(p => p.timestamp !== point.timestamp)
     const next = [...filtered, point].sort((a, b) => a.timestamp - b.timestamp)
@@ -104,6 +115,20 @@ export const useTradingStore = create<TradingState>((set) => ({
   }),
   setTickers: (tickers) => set({ tickers }),
   setAccount: (account) => set({ account, balance: account.balance }),
+  applyStateDelta: (delta) => set((state) => {
+    const account = delta.account ? { ...state.account, ...delta.account } : state.account
+    const closed = new Set(delta.closed ?? [])
+    let positions = closed.size ? state.positions.filter(p => !closed.has(p.id)) : state.positions
+    for (const change of delta.positions ?? []) {
+      const idx = positions.findIndex(p => p.id === change.id)
+      if (idx >= 0) {
+        positions = positions.map((p, i) => (i === idx ? { ...p, ...change } : p))
+      } else {
+        positions = [change as Position, ...positions]
+      }
+    }
+    return { account, balance: account.balance, positions }
+  }),
   updatePrice: (symbol, price) => set((state) => {
     const normalized = symbol.toUpperCase()
 
@@ -42,6 +42,49 @@ export interface Metrics {
   realizedPnL?: number
   unrealizedPnL?: number
   flatTrades?: number
+  // Rolling windows keyed by '1h' | '24h' | '7d' | '30d'
+  windows?: Record<string, WindowMetrics>
+}
+
+export interface WindowMetrics {
+  winRate: number
+  realizedPnL: number
+  profitFactor: number
+  maxDrawdown: number
+  totalTrades: number
+  winningTrades: number
+  losingTrades: number
+  flatTrades: number
+}
+
+// GET /analytics?range= (columnar analytics over the stored trade history)
+export interface AnalyticsResponse {
+  range: string
+  trades: number
+  metrics: Analytics
+}
+
+export interface Analytics extends Omit<Metrics, 'windows'> {
+  sortinoRatio: number
+  calmarRatio: number
+  // Max drawdown (%, <= 0) of the baseline + cumulative realized PnL curve
+  equityDrawdown: number
+  expectancy: number
+  bySymbol: Record<string, SymbolAnalytics>
+}
+
+export interface SymbolAnalytics {
+  totalTrades: number
+  winningTrades: number
+  losingTrades: number
+  flatTrades: number
+  winRate: number
+  realizedPnL: number
+  avgWin: number
+  avgLoss: number
+  profitFactor: number
+  expectancy: number
+  volume: number
 }
 
 export interface EquityPoint {
@@ -74,11 +117,29 @@ export type PriceUpdate = {
   bid?: number
   ask?: number
   ts?: number
+  tsMs?: number
 }
 
-export type PositionUpdate = {
-  type: 'position_update'
-  position: Position
+// Account/positions are delta-encoded: a full state_snapshot on connect or resync,
+// then state_delta with only the changed fields and a seq incremented by 1.
+// epoch identifies the server process producing the state; seq restarts with a new epoch
+export type StateSnapshot = {
+  type: 'state_snapshot'
+  epoch: string
+  seq: number
+  account: AccountSummary
+  positions: Position[]
+  ts: number
+}
+
+export type StateDelta = {
+  type: 'state_delta'
+  epoch: string
+  seq: number
+  account?: Partial<AccountSummary>
+  positions?: Array<Partial<Position> & { id: string }>
+  closed?: string[]
+  ts: number
 }
 
 export type TradeExecuted = {
@@ -100,6 +161,16 @@ export type EquitySnapshot = {
   unrealizedPnl?: number
 }
 
+export type EquityHistory = {
+  type: 'equity_history'
+  points: Array<{
+    time: number
+    equity: number
+    balance?: number
+    unrealizedPnl?: number
+  }>
+}
+
 export type MetricsSnapshot = {
   type: 'metrics_snapshot'
   metrics: Metrics
@@ -112,24 +183,28 @@ export type TickerSnapshot = {
   ts: number
 }
 
-export type AccountSnapshot = {
-  type: 'account_snapshot'
-  account: AccountSummary
-  ts: number
-}
-
 export type Heartbeat = {
   type: 'heartbeat'
   ts: number
 }
 
+// Reply to {op: 'subscribe' | 'unsubscribe', topics: [...]}; topics: '*', 'price',
+// 'price:<SYMBOL>', 'account', 'positions', 'trades', 'metrics', 'tickers', 'equity', 'heartbeat'
+export type Subscriptions = {
+  type: 'subscriptions'
+  topics: string[]
+  invalid: string[]
+}
+
 export type RealtimeMessage =
   | PriceUpdate
-  | PositionUpdate
+  | StateSnapshot
+  | StateDelta
   | TradeExecuted
   | TradesSnapshot
   | EquitySnapshot
+  | EquityHistory
   | MetricsSnapshot
   | TickerSnapshot
-  | AccountSnapshot
   | Heartbeat
+  | Subscriptions